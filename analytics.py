@@ -0,0 +1,99 @@
+# analytics.py - Blishko's Mindset : séries, tendances et corrélations des habitudes
+#
+# Tout est calculé en quelques passes vectorisées (NumPy / pandas), sans boucle par journée :
+# - séries par habitude (en cours et record) : une journée absente du journal coupe la série ;
+# - XP et écran moyens, dépenses et gain net (Bourse + Crypto) par semaine et par mois ;
+# - corrélations entre chaque habitude et l'XP / le temps d'écran.
+# Les résultats sont mémorisés par (version des données, fenêtre) : rouvrir l'onglet ne
+# recalcule rien. Sans dépendance à Streamlit (utilisable par bench.py).
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+import threading
+
+import tracing
+from compact import HABIT_COLS
+
+BUDGET_MS = 50  # calcul complet sur 20 ans de journal (vérifié par bench.py)
+CACHE_SIZE = 16
+PERIODS = {"weekly": "Semaine", "monthly": "Mois"}  # semaines commençant le lundi, mois calendaires
+CORRELATION_TARGETS = ["XP", "Phone"]
+
+def streaks(df: pd.DataFrame) -> pd.DataFrame:
+    """Par habitude : série en cours (jusqu'à la dernière journée) et record, en jours consécutifs."""
+    if df.empty:
+        return pd.DataFrame({"current": 0, "longest": 0}, index=HABIT_COLS)
+    days = df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    offset = days - days.min()
+    done = np.zeros((int(offset.max()) + 1, len(HABIT_COLS)), dtype=bool)
+    done[offset] = df[HABIT_COLS].to_numpy() != 0
+    # pour chaque jour, position du dernier jour manqué (-1 au départ) : la série en est l'écart
+    pos = np.arange(len(done))[:, None]
+    last_miss = np.maximum.accumulate(np.where(done, -1, pos), axis=0)
+    run = pos - last_miss
+    return pd.DataFrame({"current": run[-1], "longest": run.max(axis=0)}, index=HABIT_COLS)
+
+def _period_starts(dates: pd.Series, period: str) -> np.ndarray:
+    # premier jour (numéro de jour) de la semaine (lundi) ou du mois de chaque journée
+    if period == "weekly":
+        days = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+        return days - (days + 3) % 7  # le 1970-01-01 était un jeudi
+    return dates.to_numpy(dtype="datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+def trends(df: pd.DataFrame, period: str = "weekly") -> pd.DataFrame:
+    """XP et écran moyens, dépenses et gain net cumulés par semaine ou par mois (périodes sans journée omises)."""
+    if df.empty:
+        return pd.DataFrame(columns=["Date", "XP", "Phone", "Expenses", "Net", "Days"])
+    starts, groups = np.unique(_period_starts(df["Date"], period), return_inverse=True)
+    days = np.bincount(groups)
+    total = lambda values: np.bincount(groups, weights=np.asarray(values, dtype=float), minlength=len(starts))
+    return pd.DataFrame({
+        "Date": starts.astype("datetime64[D]").astype("datetime64[ns]"),
+        "XP": total(df["XP"]) / days,
+        "Phone": total(df["Phone"]) / days,
+        "Expenses": total(df["Expenses"]),
+        "Net": total(df["Stocks"].to_numpy(dtype=float) + df["Crypto"].to_numpy(dtype=float)),
+        "Days": days,
+    })
+
+def correlations(df: pd.DataFrame) -> pd.DataFrame:
+    """Coefficients de Pearson habitude / XP et habitude / écran (NaN si la colonne ne varie pas)."""
+    values = df[HABIT_COLS + CORRELATION_TARGETS].to_numpy(dtype=float)
+    if len(values) < 2:
+        return pd.DataFrame(np.nan, index=HABIT_COLS, columns=CORRELATION_TARGETS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.corrcoef(values, rowvar=False)
+    k = len(HABIT_COLS)
+    return pd.DataFrame(corr[:k, k:], index=HABIT_COLS, columns=CORRELATION_TARGETS)
+
+def compute(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    with tracing.span("analytics", rows=len(df)):
+        return {
+            "streaks": streaks(df),
+            "weekly": trends(df, "weekly"),
+            "monthly": trends(df, "monthly"),
+            "correlations": correlations(df),
+        }
+
+class ResultCache:
+    """LRU des analyses, clé (version des données, début, fin de la fenêtre)."""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._results: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Any]):
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                tracing.count("analytics_cache.hit")
+                return self._results[key]
+        result = build()
+        tracing.count("analytics_cache.miss")
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+        return result
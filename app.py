@@ -4,13 +4,32 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
-import plotly.graph_objects as go
 import random
 from typing import Optional, Any, Tuple
-from io import StringIO
 from github import Github
 import os
 import logging
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
+import functools
+import glob
+import uuid
+import storage
+import snapshots
+import sync
+import tenants
+import tracing
+import charts
+import analytics
+import export
+import compact
+from charts import line_chart_with_arrow, bar_with_small_squares
+from storage import make_empty_df, ensure_columns, journal_record, replay_journal
+from store import JournalStore
+from summary import Summary, add_rolling, rolling_col
 
 # ---------------------------
 # Logging
@@ -23,229 +42,1083 @@ logger = logging.getLogger("blishko")
 # ---------------------------
 st.set_page_config(page_title="Blishko’s Mindset", page_icon="💪", layout="centered", initial_sidebar_state="collapsed")
 
+# ---------------------------
+# Tracing (une trace par rerun, écrite en JSONL à la fin du script)
+# ---------------------------
+TRACE_LOG = os.environ.get("BLISHKO_TRACE_LOG", "traces.jsonl")  # "" : pas de fichier, historique en mémoire seulement
+
+@st.cache_resource(show_spinner=False)
+def get_recorder() -> tracing.Recorder:
+    # historique des reruns partagé par les sessions (percentiles du panneau de profilage)
+    recorder = tracing.Recorder(TRACE_LOG or None)
+    tracing.add_sink(recorder)
+    return recorder
+
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex[:12])
+get_recorder()
+tracing.start("rerun", session_id)
+
 # ---------------------------
 # Sidebar settings
 # ---------------------------
 st.sidebar.header("Paramètres")
 INVEST_STOCKS = st.sidebar.number_input("Investi en bourse (initial)", value=50.0, step=1.0, format="%.2f")
 INVEST_CRYPTO = st.sidebar.number_input("Investi en crypto (initial)", value=96.0, step=1.0, format="%.2f")
-RETENTION_DAYS = int(st.sidebar.number_input("Durée de conservation (jours)", value=365, step=1))
 st.sidebar.caption("Ajoute GITHUB_TOKEN et REPO_NAME dans st.secrets pour sauvegarder sur GitHub (optionnel).")
 
+# ---------------------------
+# Utilisateur (BLISHKO_MULTI_USER=1 : un journal par utilisateur dans users/<clé>/)
+# ---------------------------
+MULTI_USER = tenants.enabled()
+
+def current_user() -> str:
+    """Clé de l'utilisateur : en-tête posé par le proxy d'authentification, sinon saisie dans la barre latérale."""
+    if not MULTI_USER:
+        return tenants.DEFAULT_USER
+    try:
+        from_header = tenants.user_from_headers(st.context.headers)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    if from_header:
+        st.sidebar.caption(f"Connecté : {from_header}")
+        return from_header
+    raw = st.sidebar.text_input("Utilisateur", key="user_key", placeholder="ex. blishko")
+    if not raw.strip():
+        st.info("Choisis ton nom d'utilisateur dans la barre latérale (▸ en haut à gauche) pour ouvrir ton journal.")
+        st.stop()
+    try:
+        return tenants.user_key(raw)
+    except ValueError as e:
+        st.sidebar.error(str(e))
+        st.stop()
+
+USER = current_user()
+
 # ---------------------------
 # Constants & helpers
 # ---------------------------
 tz = pytz.timezone("Europe/Paris")
 now = datetime.now(tz)
 today_str = now.strftime("%Y-%m-%d")
-DATA_FILENAME = "data_2026.csv"
-INIT_FLAG = "initialized.flag"  # marqueur local indiquant que la purge initiale a été faite
-MARKER_SIZE = 4  # taille des carrés sur les graphiques
-
-def cols_list():
-    return ["Date","XP","Phone","Weight","Stocks","Crypto","Expenses","Twitch","School","Finance","Prayer","Reading","Sport","Hygiene","Budget"]
-
-def make_empty_df():
-    return pd.DataFrame(columns=cols_list())
+STORAGE = storage.get_storage()  # backend choisi par BLISHKO_STORAGE_BACKEND : csv (défaut), parquet, sqlite
+TENANT = tenants.Tenant(USER, STORAGE)  # chemins de l'utilisateur (racine du dépôt en mono-utilisateur)
+TENANT.prepare()
+DATA_FILENAME = TENANT.data_filename
+INIT_FLAG = TENANT.init_flag  # marqueur local indiquant que la purge initiale a été faite
+BACKUP_PATTERN = TENANT.backup_pattern
+OUTBOX_FILENAME = TENANT.outbox_path
+JOURNAL_FILENAME = storage.journal_path(DATA_FILENAME)  # deltas (une ligne JSON par journée enregistrée) rejoués sur DATA_FILENAME
+STORAGE_MODE = os.environ.get("BLISHKO_STORAGE_MODE", "journal")  # "journal" (deltas + compaction) ou "full" (réécriture complète)
+COMPACT_MAX_ENTRIES = 60  # compaction du journal au-delà de ce nombre de deltas...
+COMPACT_MAX_BYTES = 64 * 1024  # ... ou de cette taille
+PARTITIONED = MULTI_USER or storage.layout() == "partitioned"  # BLISHKO_STORAGE_LAYOUT=partitioned : data/AAAA-MM + manifeste
+PARTS = TENANT.partitions()
+SNAPSHOT_EVERY_DAYS = int(os.environ.get("BLISHKO_SNAPSHOT_DAYS", "7"))  # snapshot automatique du journal ; 0 : désactivé
+RETENTION_DAYS = int(os.environ.get("BLISHKO_RETENTION_DAYS", "365"))  # horizon appliqué automatiquement (partitions) ; 0 : désactivé
+RETENTION_ACTION = os.environ.get("BLISHKO_RETENTION_ACTION", "archive")  # partitions expirées : "archive" (data/archive/) ou "prune"
+EXPORT_ENABLED = os.environ.get("BLISHKO_EXPORT", "1") == "1"  # export/ : statistiques en lecture seule (export.py serve) ; "0" : désactivé
+EXPORT_ROOT = TENANT.path(export.EXPORT_DIR)
+HABIT_LABELS = {
+    "School":"Travail/Étude fait",
+    "Finance":"Finance checkée",
+    "Prayer":"Prière",
+    "Reading":"Lecture",
+    "Sport":"Sport complet",
+    "Hygiene":"Hygiène & chambre",
+    "Budget":"Zéro dépense inutile"
+}
 
 # ---------------------------
 # GitHub helpers (optionnel)
 # ---------------------------
+@st.cache_resource(show_spinner=False)
+def _github_repo(token: str, repo_name: str):
+    # client partagé par toutes les sessions du process (les exceptions ne sont pas mises en cache)
+    g = Github(token)
+    repo = g.get_repo(repo_name)
+    logger.info("GitHub initialisé")
+    return repo
+
 def init_github() -> Optional[Any]:
+    with tracing.span("init_github"):
+        try:
+            token = st.secrets["GITHUB_TOKEN"]
+            repo_name = st.secrets["REPO_NAME"]
+            return _github_repo(token, repo_name)
+        except Exception:
+            logger.info("GitHub non configuré ou inaccessible")
+            return None
+
+def github_configured() -> bool:
+    # secrets présents : un repo None signifie alors GitHub injoignable (et non absent)
     try:
-        token = st.secrets["GITHUB_TOKEN"]
-        repo_name = st.secrets["REPO_NAME"]
-        g = Github(token)
-        repo = g.get_repo(repo_name)
-        logger.info("GitHub initialisé")
-        return repo
+        return "GITHUB_TOKEN" in st.secrets
     except Exception:
-        logger.info("GitHub non configuré ou inaccessible")
-        return None
+        return False
 
 def read_repo_file(repo, path):
-    try:
-        contents = repo.get_contents(path)
-        return contents
-    except Exception:
-        return None
+    with tracing.span("github.read", path=path) as attrs:
+        tracing.count("github.calls")
+        try:
+            contents = repo.get_contents(path)
+            attrs["bytes"] = getattr(contents, "size", None)
+            return contents
+        except Exception:
+            return None
+        finally:
+            tracing.github_rate_limit(repo)
 
 def create_repo_file(repo, path, content, message):
-    try:
-        repo.create_file(path, message, content)
-        return True
-    except Exception as e:
-        logger.warning("create_repo_file failed: %s", e)
-        return False
+    with tracing.span("github.write", path=path, bytes=len(content)):
+        tracing.count("github.calls")
+        try:
+            repo.create_file(path, message, content)
+            return True
+        except Exception as e:
+            logger.warning("create_repo_file failed: %s", e)
+            return False
+        finally:
+            tracing.github_rate_limit(repo)
 
 def update_repo_file(repo, path, content, message, sha):
+    with tracing.span("github.write", path=path, bytes=len(content)):
+        tracing.count("github.calls")
+        try:
+            repo.update_file(path, message, content, sha)
+            return True
+        except Exception as e:
+            logger.warning("update_repo_file failed: %s", e)
+            return False
+        finally:
+            tracing.github_rate_limit(repo)
+
+FETCH_WORKERS = 8  # lectures GitHub simultanées au plus (limites secondaires de l'API)
+
+def fetch_repo_files(repo, paths):
+    # lectures indépendantes lancées en parallèle (une requête par blob, FETCH_WORKERS à la fois)
+    if len(paths) <= 1:
+        return [read_repo_file(repo, p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(len(paths), FETCH_WORKERS)) as pool:
+        return list(pool.map(tracing.propagate(lambda p: read_repo_file(repo, p)), paths))
+
+def list_backups(tree) -> list:
+    return sorted(p for p in (tree or {}) if fnmatch.fnmatch(p, BACKUP_PATTERN))
+
+# ---------------------------
+# Cache de lecture (partagé par le process)
+# ---------------------------
+REVALIDATE_SECONDS = 30  # fenêtre pendant laquelle une entrée est servie sans revalidation
+
+@st.cache_resource(show_spinner=False)
+def get_data_cache() -> tenants.SharedCache:
+    # par utilisateur : clé -> {"version", "store", "contents", "checked"} ; version = sha GitHub ou (mtime, taille) locale
+    # LRU entre utilisateurs (BLISHKO_CACHE_USERS, BLISHKO_CACHE_MB), sauf écriture GitHub en cours
+    writer = get_writer()
+    busy = lambda user: bool(user) and writer.is_pending_under(tenants.Tenant(user, STORAGE).root + "/")
+    return tenants.SharedCache(**tenants.cache_limits(), busy=busy)
+
+def cache_get(key: str) -> Optional[dict]:
+    return get_data_cache().get(USER, key)
+
+def cache_put(key: str, version, data, contents=None, **extra):
+    # data : JournalStore, ou DataFrame converti en JournalStore
+    store = data if data is None or isinstance(data, JournalStore) else JournalStore.from_frame(data)
+    get_data_cache().put(USER, key, {"version": version, "store": store, "contents": contents, "checked": time.monotonic(), **extra})
+
+def cache_touch(key: str):
+    get_data_cache().touch(USER, key)
+
+def cache_invalidate(key: Optional[str] = None):
+    # key=None : toutes les entrées de l'utilisateur courant
+    get_data_cache().invalidate(USER, key)
+
+@st.cache_resource(show_spinner=False)
+def get_tree_cache() -> tenants.SharedTree:
+    # arbre git du dépôt, listé une fois pour tous les utilisateurs (les écritures y sont reportées)
+    return tenants.SharedTree()
+
+def user_lock() -> threading.RLock:
+    # sérialise les sauvegardes d'un même utilisateur (plusieurs onglets ou appareils sur le process)
+    return get_data_cache().user_lock(USER)
+
+@st.cache_resource(show_spinner=False)
+def get_writer() -> sync.WriteBehind:
+    # thread d'écriture GitHub partagé par toutes les sessions
+    return sync.WriteBehind()
+
+@st.cache_resource(show_spinner=False)
+def get_outbox(path: str) -> sync.Outbox:
+    # file d'attente locale d'un utilisateur, partagée par ses sessions (un seul verrou par process)
+    return sync.Outbox(path)
+
+def tracked(path: str, on_done):
+    # après un commit, le nouveau sha est reporté dans l'arbre partagé (pas de relisting)
+    tree = get_tree_cache()
+
+    def done(new_contents):
+        tree.update(path, new_contents.sha if new_contents is not None else None)
+        on_done(new_contents)
+    return done
+
+def acked(on_done, mark: Optional[int]):
+    # après un push réussi, les lignes de la file d'attente jusqu'à `mark` sont sur GitHub
+    if mark is None:
+        return on_done
+    outbox = get_outbox(OUTBOX_FILENAME)
+
+    def done(new_contents):
+        on_done(new_contents)
+        outbox.ack(mark)
+    return done
+
+def push_async(repo, path, content, message, sha=None, on_done=None, on_failed=None, merge=None, mark=None):
+    """
+    Met l'écriture GitHub en file et rend la main. Une fois le commit fait, le sha est
+    reporté dans le cache ; en cas d'échec, le journal en cache est écrit en local.
+    En cas de conflit, la version distante est fusionnée ligne à ligne (`merge`, par
+    défaut celle de DATA_FILENAME / JOURNAL_FILENAME). `mark` : marque de la file
+    d'attente acquittée une fois le commit fait.
+    `on_done` / `on_failed` remplacent ce comportement (partitions, manifeste).
+    """
+    if on_done or on_failed:
+        get_writer().submit(sync.WriteJob(repo, path, content, message, sha, on_done=acked(tracked(path, on_done or (lambda cf: None)), mark),
+                                          on_failed=on_failed, merge=merge))
+        return
+    cache, user = get_data_cache(), USER
+    key = f"github:{DATA_FILENAME}"
+    slot = 0 if path == DATA_FILENAME else 1
+    if merge is None:
+        merge = merge_data(key, content) if slot == 0 else merge_journal(key, content)
+
+    def on_done(new_contents):
+        with cache.lock:
+            entry = cache.entries(user, touch=False).get(key)
+            if entry:
+                version = list(entry["version"])
+                version[slot] = new_contents.sha
+                entry["version"] = tuple(version)
+                entry["contents" if slot == 0 else "journal"] = new_contents
+
+    def on_failed(exc):
+        with cache.lock:
+            entry = cache.entries(user, touch=False).get(key)
+        df = entry["store"].frame() if entry else None
+        if df is not None:
+            try:
+                STORAGE.write(DATA_FILENAME, df)
+                if os.path.exists(JOURNAL_FILENAME):
+                    os.remove(JOURNAL_FILENAME)
+            except Exception as e:
+                logger.error("Sauvegarde locale échouée: %s", e)
+        # le cache ne reflète plus GitHub : relu au prochain chargement (la file d'attente garde les lignes)
+        cache.invalidate(user, key)
+
+    get_writer().submit(sync.WriteJob(repo, path, content, message, sha, on_done=acked(tracked(path, on_done), mark), on_failed=on_failed, merge=merge))
+
+def merge_data(key: str, content):
+    """Conflit sur un fichier de données : la version distante est fusionnée par journée (UpdatedAt le plus récent)."""
+    def merge(remote_raw: bytes):
+        remote = STORAGE.decode(remote_raw)
+        entry = cache_get(key)
+        if entry and entry["store"] is not None:
+            # les journées saisies sur l'autre appareil apparaissent aussi à l'écran
+            entry["store"].import_rows(remote)
+        logger.info("Conflit sur %s : fusion de %s journée(s) distante(s)", key, len(remote))
+        return STORAGE.encode(storage.reconcile(STORAGE.decode(content), remote))
+    return merge
+
+def merge_journal(key: str, content: str):
+    """Conflit sur le journal de deltas : union des lignes, le rejeu retient la plus récente par journée."""
+    def merge(remote_raw: bytes):
+        remote_text = remote_raw.decode("utf-8")
+        merged = storage.merge_journal_text(remote_text, content)
+        entry = cache_get(key)
+        if entry and entry["store"] is not None:
+            entry["store"].import_rows(replay_journal(make_empty_df(), remote_text))
+            entry["journal_text"] = merged
+        return merged
+    return merge
+
+def repo_tree(repo) -> Optional[dict]:
+    """
+    Liste tous les fichiers du dépôt en une seule requête (git trees) : chemin -> sha.
+    Sert à la fois au flag d'initialisation, aux sha des données et à la liste des backups.
+    """
+    shared = get_tree_cache()
+    tree = shared.get(REVALIDATE_SECONDS)
+    if tree is not None:
+        return tree
     try:
-        repo.update_file(path, message, content, sha)
-        return True
+        with tracing.span("github.tree"):
+            tracing.count("github.calls")
+            tree = repo.get_git_tree(repo.default_branch, recursive=True)
+            shas = {e.path: e.sha for e in tree.tree if e.type == "blob"}
+            tracing.github_rate_limit(repo)
     except Exception as e:
-        logger.warning("update_repo_file failed: %s", e)
-        return False
+        logger.warning("Lecture de l'arbre GitHub échouée: %s", e)
+        return None
+    shared.put(shas)
+    return shas
+
+def local_version(path) -> Optional[Tuple[int, int]]:
+    try:
+        st_ = os.stat(path)
+        return (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return None
 
 # ---------------------------
 # Load / Save data (GitHub preferred, fallback local)
 # ---------------------------
-def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
-    for c in cols_list():
-        if c not in df.columns:
-            df[c] = 0
-    if "Date" in df.columns:
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    return df[cols_list()]
+def needs_compaction(journal_text: str) -> bool:
+    return journal_text.count("\n") >= COMPACT_MAX_ENTRIES or len(journal_text.encode("utf-8")) >= COMPACT_MAX_BYTES
 
-def load_data(repo) -> Tuple[pd.DataFrame, Optional[Any]]:
+def load_data(repo, timings: Optional[dict] = None) -> Tuple[pd.DataFrame, Optional[Any]]:
+    if PARTITIONED:
+        # l'onglet Journal n'a besoin que du jour courant et de la dernière journée antérieure
+        return load_window(repo, keys=PARTS.keys_for_day(load_manifest(repo), today_str)), None
+    return load_single(repo, timings)
+
+def load_single(repo, timings: Optional[dict] = None) -> Tuple[pd.DataFrame, Optional[Any]]:
     # Try GitHub first
-    if repo:
-        contents = read_repo_file(repo, DATA_FILENAME)
+    if repo and STORAGE.remote:
+        key = f"github:{DATA_FILENAME}"
+        entry = cache_get(key)
+        if entry and (time.monotonic() - entry["checked"] < REVALIDATE_SECONDS or get_writer().is_pending(DATA_FILENAME, JOURNAL_FILENAME)):
+            return entry["store"].frame(), entry["contents"]
+        t0 = time.perf_counter()
+        tree = repo_tree(repo)
+        paths = [DATA_FILENAME, JOURNAL_FILENAME]
+        if tree is not None:
+            if entry and tuple(tree.get(p) for p in paths) == entry["version"]:
+                cache_touch(key)
+                return entry["store"].frame(), entry["contents"]
+            # ne télécharge que les blobs présents dans l'arbre
+            paths = [p for p in paths if p in tree]
+        fetched = dict(zip(paths, fetch_repo_files(repo, paths)))
+        contents = fetched.get(DATA_FILENAME)
+        journal = fetched.get(JOURNAL_FILENAME)
+        if timings is not None:
+            timings["blobs"] = (time.perf_counter() - t0) * 1000
         if contents:
             try:
-                df = pd.read_csv(StringIO(contents.decoded_content.decode("utf-8")))
-                df = ensure_columns(df)
-                return df, contents
+                t0 = time.perf_counter()
+                df = STORAGE.decode(contents.decoded_content)
+                journal_text = journal.decoded_content.decode("utf-8") if journal else ""
+                df = replay_journal(df, journal_text)
+                store = JournalStore.from_frame(df)
+                cache_put(key, (contents.sha, journal.sha if journal else None), store, contents, journal=journal, journal_text=journal_text)
+                if timings is not None:
+                    timings["parse"] = (time.perf_counter() - t0) * 1000
+                return store.frame(), contents
             except Exception:
                 pass
     # Fallback local
-    if os.path.exists(DATA_FILENAME):
+    version = (local_version(DATA_FILENAME), local_version(JOURNAL_FILENAME))
+    if version[0]:
+        key = f"local:{DATA_FILENAME}"
+        entry = cache_get(key)
+        if entry and entry["version"] == version:
+            return entry["store"].frame(), None
         try:
-            df = pd.read_csv(DATA_FILENAME)
-            df = ensure_columns(df)
-            return df, None
+            df = STORAGE.read(DATA_FILENAME)
+            if version[1]:
+                with open(JOURNAL_FILENAME, "r", encoding="utf-8") as f:
+                    df = replay_journal(df, f.read())
+            store = JournalStore.from_frame(df)
+            cache_put(key, version, store)
+            return store.frame(), None
         except Exception:
             pass
     # default empty
     return ensure_columns(pd.DataFrame()), None
 
-def save_data(repo, df: pd.DataFrame, contents=None) -> bool:
-    csv_content = df.to_csv(index=False)
+def current_store(repo, df: pd.DataFrame) -> JournalStore:
+    # journal en mémoire de la source active (GitHub puis local), sinon construit depuis df
+    keys = ([f"github:{DATA_FILENAME}"] if repo and STORAGE.remote else []) + [f"local:{DATA_FILENAME}"]
+    for key in keys:
+        entry = cache_get(key)
+        if entry and entry["store"] is not None:
+            return entry["store"]
+    return JournalStore.from_frame(df)
+
+def append_journal(repo, store: JournalStore, contents, rows, mark: Optional[int] = None) -> bool:
+    """
+    Ajoute les lignes modifiées au journal (coût constant) ; déclenche une compaction
+    vers DATA_FILENAME quand le journal dépasse COMPACT_MAX_ENTRIES / COMPACT_MAX_BYTES.
+    """
+    payload = "".join(journal_record(r) for r in rows)
     # Try GitHub
-    if repo:
+    if repo and STORAGE.remote and contents:
+        key = f"github:{DATA_FILENAME}"
         try:
-            if contents:
-                repo.update_file(DATA_FILENAME, f"Update {datetime.utcnow().isoformat()}", csv_content, contents.sha)
-            else:
-                repo.create_file(DATA_FILENAME, "Initial commit - Blishko's Mindset", csv_content)
+            entry = cache_get(key) or {}
+            journal = entry.get("journal")
+            journal_text = entry.get("journal_text", "")
+            if "journal" not in entry:
+                journal = read_repo_file(repo, JOURNAL_FILENAME)
+                journal_text = journal.decoded_content.decode("utf-8") if journal else ""
+            journal_text += payload
+            if needs_compaction(journal_text):
+                return _save_data(repo, store.frame(), contents, mark=mark)
+            cache_put(key, entry.get("version", (contents.sha, None)), store, contents, journal=journal, journal_text=journal_text)
+            push_async(repo, JOURNAL_FILENAME, journal_text, f"Journal {datetime.utcnow().isoformat()}", journal.sha if journal else None, mark=mark)
+            return True
+        except Exception as e:
+            logger.warning("Ajout au journal GitHub échoué: %s", e)
+    elif repo and STORAGE.remote:
+        # pas encore de fichier de données sur GitHub : le snapshot complet le crée
+        return _save_data(repo, store.frame(), mark=mark)
+    # Fallback local
+    if not os.path.exists(DATA_FILENAME):
+        return _save_data(None, store.frame())
+    try:
+        with open(JOURNAL_FILENAME, "a", encoding="utf-8") as f:
+            f.write(payload)
+        version = local_version(JOURNAL_FILENAME)
+        if version[1] >= COMPACT_MAX_BYTES:
+            return _save_data(None, store.frame())
+        with open(JOURNAL_FILENAME, "r", encoding="utf-8") as f:
+            if f.read().count("\n") >= COMPACT_MAX_ENTRIES:
+                return _save_data(None, store.frame())
+        cache_put(f"local:{DATA_FILENAME}", (local_version(DATA_FILENAME), version), store)
+        return True
+    except Exception as e:
+        logger.error("Ajout au journal local échoué: %s", e)
+        return False
+
+def save_data(repo, df: pd.DataFrame, contents=None, changed=None, queued: bool = False) -> bool:
+    """
+    Sauvegarde le journal. En mode "journal", si `changed` (liste de lignes) est fourni,
+    seules ces lignes sont ajoutées au fichier de deltas ; sinon le snapshot complet est
+    réécrit et le journal vidé (compaction).
+    Les lignes `changed` sont d'abord upsertées dans le journal en mémoire (sans tri ni
+    copie) ; `df` ne sert alors qu'à l'amorcer s'il n'est pas encore en cache. Elles
+    restent dans la file d'attente locale jusqu'au commit GitHub (`queued` : elles en
+    viennent déjà). Une seule sauvegarde à la fois par utilisateur (`user_lock`) ; l'export
+    en lecture seule est régénéré après chaque sauvegarde réussie.
+    """
+    with user_lock():
+        saved = _save_data(repo, df, contents, changed, queued)
+    if saved:
+        publish_export(repo, df)
+    return saved
+
+def _save_data(repo, df: pd.DataFrame, contents=None, changed=None, queued: bool = False, mark: Optional[int] = None) -> bool:
+    # `mark` : marque de la file d'attente acquittée par le commit du snapshot (compaction)
+    if PARTITIONED:
+        return save_partitions(repo, rows=changed, queued=queued) if changed else save_partitions(repo, df=df)
+    if changed:
+        store = current_store(repo, df)
+        store.upsert_many(changed)
+        df = store.frame()
+        mark = queue_rows(repo, changed, queued)
+    if STORAGE.row_upsert and changed and os.path.exists(DATA_FILENAME):
+        # backend à upsert par ligne (SQLite) : pas besoin de journal ni de réécriture
+        try:
+            STORAGE.upsert(DATA_FILENAME, changed)
+            cache_put(f"local:{DATA_FILENAME}", (local_version(DATA_FILENAME), None), store)
+            return True
+        except Exception as e:
+            logger.error("Upsert local échoué: %s", e)
+            return False
+    if STORAGE_MODE == "journal" and changed:
+        return append_journal(repo, store, contents, changed, mark)
+    # Try GitHub
+    if repo and STORAGE.remote:
+        key = f"github:{DATA_FILENAME}"
+        try:
+            entry = cache_get(key) or {}
+            journal = entry.get("journal") if "journal" in entry else read_repo_file(repo, JOURNAL_FILENAME)
+            # met à jour le cache en place (pas de rechargement) ; les sha suivent quand le writer a poussé
+            cache_put(key, entry.get("version", (None, None)), df, contents, journal=journal, journal_text="")
+            message = f"Update {datetime.utcnow().isoformat()}" if contents else "Initial commit - Blishko's Mindset"
+            push_async(repo, DATA_FILENAME, STORAGE.encode(df), message, contents.sha if contents else None, mark=mark)
+            # le snapshot contient désormais tous les deltas : on vide le journal (poussé après le snapshot)
+            if journal or entry.get("journal_text"):
+                push_async(repo, JOURNAL_FILENAME, "", f"Compaction {datetime.utcnow().isoformat()}", journal.sha if journal else None)
             return True
         except Exception as e:
             logger.warning("Sauvegarde GitHub échouée: %s", e)
     # Fallback local
     try:
-        with open(DATA_FILENAME, "w", encoding="utf-8") as f:
-            f.write(csv_content)
+        STORAGE.write(DATA_FILENAME, df)
+        if os.path.exists(JOURNAL_FILENAME):
+            os.remove(JOURNAL_FILENAME)
+        cache_put(f"local:{DATA_FILENAME}", (local_version(DATA_FILENAME), None), df)
         return True
     except Exception as e:
         logger.error("Sauvegarde locale échouée: %s", e)
         return False
 
+def queue_rows(repo, rows, queued: bool = False) -> Optional[int]:
+    """
+    Garde les lignes dans la file d'attente locale tant que GitHub ne les a pas confirmées
+    (y compris quand GitHub est configuré mais injoignable) ; renvoie la marque à acquitter.
+    """
+    if not STORAGE.remote or not (repo or github_configured()):
+        return None
+    outbox = get_outbox(OUTBOX_FILENAME)
+    return outbox.mark() if queued else outbox.add([json.loads(journal_record(r)) for r in rows])
+
+def flush_outbox(repo, df: pd.DataFrame, contents=None) -> int:
+    """
+    Repousse les journées restées en file d'attente (saisies hors ligne, push échoué) dès
+    que GitHub est joignable. Une journée modifiée plus récemment ailleurs (UpdatedAt) n'est
+    pas repoussée. Au plus une tentative par REVALIDATE_SECONDS.
+    """
+    if not use_github(repo):
+        return 0
+    entry = cache_get("outbox")
+    if entry and time.monotonic() - entry["checked"] < REVALIDATE_SECONDS:
+        return 0
+    cache_put("outbox", None, None)
+    outbox = get_outbox(OUTBOX_FILENAME)
+    rows = outbox.pending()
+    paths = [PARTS.manifest_path] if PARTITIONED else [DATA_FILENAME, JOURNAL_FILENAME]
+    if not rows or get_writer().is_pending(*paths):
+        return 0
+    mark = outbox.mark()
+    queued = storage.latest_rows(ensure_columns(pd.DataFrame(rows)))
+    newer = storage.unsynced(queued, remote_window(repo, queued["Date"].min(), queued["Date"].max()))
+    if newer.empty:
+        outbox.ack(mark)  # déjà sur GitHub
+        return 0
+    logger.info("File d'attente : %s journée(s) repoussée(s) vers GitHub", len(newer))
+    save_data(repo, df, contents, changed=newer.to_dict("records"), queued=True)
+    return len(newer)
+
+def remote_window(repo, start, end) -> pd.DataFrame:
+    """Journées [start, end] telles que GitHub les connaît : jamais la copie locale (qui contient déjà la file d'attente)."""
+    if PARTITIONED:
+        return load_window(repo, start, end)
+    key = f"github:{DATA_FILENAME}"
+    if not cache_get(key):
+        load_single(repo)  # relit GitHub ; pas d'entrée si le dépôt n'a pas encore de fichier de données
+    entry = cache_get(key)
+    return entry["store"].frame(start, end) if entry else ensure_columns(make_empty_df())
+
+# ---------------------------
+# Partitions mensuelles (BLISHKO_STORAGE_LAYOUT=partitioned)
+# ---------------------------
+def use_github(repo) -> bool:
+    return bool(repo) and STORAGE.remote
+
+def _pushed(key: str):
+    # callback du writer : reporte le nouveau sha dans l'entrée de cache
+    cache, user = get_data_cache(), USER
+
+    def on_done(new_contents):
+        with cache.lock:
+            entry = cache.entries(user, touch=False).get(key)
+            if entry:
+                entry["version"] = new_contents.sha if new_contents is not None else None
+                entry["contents"] = new_contents
+    return on_done
+
+def load_manifest(repo) -> dict:
+    """Manifeste des partitions ; créé à partir de DATA_FILENAME au premier passage."""
+    if use_github(repo):
+        entry = cache_get("manifest")
+        if entry and (time.monotonic() - entry["checked"] < REVALIDATE_SECONDS or get_writer().is_pending(PARTS.manifest_path)):
+            return entry["manifest"]
+        tree = repo_tree(repo)
+        sha = tree.get(PARTS.manifest_path) if tree is not None else None
+        if entry and tree is not None and sha == entry["version"]:
+            cache_touch("manifest")
+            return entry["manifest"]
+        cf = read_repo_file(repo, PARTS.manifest_path) if (tree is None or sha) else None
+        if cf:
+            manifest = json.loads(cf.decoded_content.decode("utf-8"))
+            cache_put("manifest", cf.sha, None, cf, manifest=manifest)
+            return manifest
+    else:
+        version = local_version(PARTS.manifest_path)
+        entry = cache_get("manifest")
+        if entry and version and entry["version"] == version:
+            return entry["manifest"]
+        manifest = PARTS.load_manifest()
+        if manifest is not None:
+            cache_put("manifest", version, None, manifest=manifest)
+            return manifest
+    return partition_single_file(repo)
+
+def save_manifest(repo, manifest: dict):
+    if use_github(repo):
+        entry = cache_get("manifest") or {}
+        cache_put("manifest", entry.get("version"), None, entry.get("contents"), manifest=manifest)
+        content = json.dumps(manifest, indent=1, sort_keys=True)
+        cf = entry.get("contents")
+
+        def on_failed(exc):
+            PARTS.save_manifest(manifest)
+
+        def merge(remote_raw: bytes):
+            # conflit : partitions connues seulement de l'autre appareil conservées
+            remote = json.loads(remote_raw.decode("utf-8"))
+            merged = dict(manifest, partitions={**remote.get("partitions", {}), **manifest["partitions"]})
+            for key in manifest.get("archived", {}):
+                merged["partitions"].pop(key, None)
+            cache_put("manifest", entry.get("version"), None, cf, manifest=merged)
+            return json.dumps(merged, indent=1, sort_keys=True)
+        push_async(repo, PARTS.manifest_path, content, f"Manifest {datetime.utcnow().isoformat()}", cf.sha if cf else None,
+                   on_done=_pushed("manifest"), on_failed=on_failed, merge=merge)
+        return
+    PARTS.save_manifest(manifest)
+    cache_put("manifest", local_version(PARTS.manifest_path), None, manifest=manifest)
+
+def partition_single_file(repo) -> dict:
+    # migration automatique : découpe DATA_FILENAME (et son journal) en partitions
+    df, _ = load_single(repo)
+    manifest = PARTS.empty_manifest()
+    if df.empty:
+        return manifest
+    logger.info("Découpage de %s en partitions mensuelles", DATA_FILENAME)
+    stores = {k: JournalStore.from_frame(part) for k, part in PARTS.split(df).items()}
+    for key, store in stores.items():
+        write_partition(repo, key, store)
+        manifest["partitions"][key] = PARTS.describe(store.frame())
+    save_manifest(repo, manifest)
+    return manifest
+
+def load_partitions(repo, keys) -> dict:
+    """key -> JournalStore ; seules les partitions absentes du cache ou modifiées sont téléchargées."""
+    stores, missing = {}, []
+    tree = repo_tree(repo) if use_github(repo) else None
+    for key in keys:
+        path = PARTS.path(key)
+        entry = cache_get(f"part:{path}")
+        if use_github(repo):
+            if entry and (time.monotonic() - entry["checked"] < REVALIDATE_SECONDS or get_writer().is_pending(path)
+                          or (tree is not None and tree.get(path) == entry["version"])):
+                stores[key] = entry["store"]
+            elif tree is not None and path not in tree:
+                stores[key] = JournalStore()
+            else:
+                missing.append(key)
+        else:
+            version = local_version(path)
+            if entry and entry["version"] == version:
+                stores[key] = entry["store"]
+            elif version is None:
+                stores[key] = JournalStore()
+            else:
+                store = JournalStore.from_frame(STORAGE.read(path))
+                cache_put(f"part:{path}", version, store)
+                stores[key] = store
+    if missing:
+        paths = [PARTS.path(k) for k in missing]
+        for key, path, cf in zip(missing, paths, fetch_repo_files(repo, paths)):
+            store = JournalStore.from_frame(STORAGE.decode(cf.decoded_content)) if cf else JournalStore()
+            cache_put(f"part:{path}", cf.sha if cf else None, store, cf)
+            stores[key] = store
+    return stores
+
+def write_partition(repo, key: str, store: JournalStore, mark: Optional[int] = None):
+    path = PARTS.path(key)
+    if use_github(repo):
+        entry = cache_get(f"part:{path}") or {}
+        cf = entry.get("contents")
+        cache_put(f"part:{path}", entry.get("version"), store, cf)
+
+        def on_failed(exc):
+            os.makedirs(PARTS.root, exist_ok=True)
+            STORAGE.write(path, store.frame())
+            cache_invalidate(f"part:{path}")
+
+        def merge(remote_raw: bytes):
+            # conflit : journées de l'autre appareil fusionnées dans la partition (UpdatedAt le plus récent)
+            store.import_rows(STORAGE.decode(remote_raw))
+            return STORAGE.encode(store.frame())
+        push_async(repo, path, STORAGE.encode(store.frame()), f"Update {key} {datetime.utcnow().isoformat()}", cf.sha if cf else None,
+                   on_done=_pushed(f"part:{path}"), on_failed=on_failed, merge=merge, mark=mark)
+        return
+    os.makedirs(PARTS.root, exist_ok=True)
+    STORAGE.write(path, store.frame())
+    cache_put(f"part:{path}", local_version(path), store)
+
+def save_partitions(repo, rows=None, df: Optional[pd.DataFrame] = None, queued: bool = False) -> bool:
+    """
+    Upsert de `rows` (seules leurs partitions sont réécrites, ≤ 31 lignes chacune) ou
+    réécriture complète depuis `df`. Le manifeste est mis à jour dans la foulée.
+    """
+    try:
+        manifest = dict(load_manifest(repo))
+        manifest["partitions"] = dict(manifest["partitions"])
+        if rows:
+            by_key = {}
+            for row in rows:
+                by_key.setdefault(storage.partition_key(row["Date"]), []).append(row)
+            stores = load_partitions(repo, list(by_key))
+            for key, part_rows in by_key.items():
+                stores[key].upsert_many(part_rows)
+            mark = queue_rows(repo, rows, queued)
+        else:
+            stores = {k: JournalStore.from_frame(part) for k, part in PARTS.split(df).items()}
+            manifest["partitions"] = {}
+            mark = None
+        for key, store in stores.items():
+            write_partition(repo, key, store, mark)
+            manifest["partitions"][key] = PARTS.describe(store.frame())
+        save_manifest(repo, manifest)
+        return True
+    except Exception as e:
+        logger.error("Sauvegarde des partitions échouée: %s", e)
+        return False
+
+def load_window(repo, start=None, end=None, keys=None) -> pd.DataFrame:
+    """Journal restreint à [start, end] : seules les partitions qui recoupent la fenêtre sont chargées."""
+    if keys is None:
+        keys = PARTS.keys_in_window(load_manifest(repo), start, end)
+    frames = [s.frame(start, end) for s in load_partitions(repo, keys).values() if len(s)]
+    if not frames:
+        return ensure_columns(make_empty_df())
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+def window_version(repo, start=None, end=None) -> tuple:
+    # version des données d'une fenêtre : celle de chacune des partitions qui la recoupent
+    keys = PARTS.keys_in_window(load_manifest(repo), start, end)
+    return tuple((key, store.version) for key, store in load_partitions(repo, keys).items())
+
+def enforce_retention(repo, days: int):
+    """Archive (ou supprime) les partitions entièrement antérieures à l'horizon de conservation."""
+    marker = f"retention:{today_str}:{days}"
+    if days <= 0 or cache_get(marker):
+        return
+    cache_put(marker, True, None)
+    manifest = load_manifest(repo)
+    horizon = pd.Timestamp(today_str) - pd.Timedelta(days=days)
+    expired = PARTS.expired(manifest, horizon)
+    if not expired:
+        return
+    prune = RETENTION_ACTION == "prune"
+    logger.info("Rétention %s jours : %s %s", days, "suppression" if prune else "archivage", ", ".join(expired))
+    if not use_github(repo):
+        PARTS.archive(expired, prune=prune)
+        for key in expired:
+            cache_invalidate(f"part:{PARTS.path(key)}")
+        cache_invalidate("manifest")
+        return
+    manifest = dict(manifest, partitions=dict(manifest["partitions"]), archived=dict(manifest.get("archived", {})))
+    stores = load_partitions(repo, expired)
+    for key in expired:
+        path = PARTS.path(key)
+        if not prune:
+            # copie vers data/archive/ puis suppression : le writer conserve l'ordre des deux commits
+            push_async(repo, PARTS.archive_path(key), STORAGE.encode(stores[key].frame()), f"Archive {key}",
+                       on_done=lambda cf: None, on_failed=lambda exc: None)
+            manifest["archived"][key] = manifest["partitions"][key]
+        entry = cache_get(f"part:{path}") or {}
+        cf = entry.get("contents")
+        push_async(repo, path, None, f"Retention {key}", cf.sha if cf else None, on_done=_pushed(f"part:{path}"), on_failed=lambda exc: None)
+        manifest["partitions"].pop(key, None)
+        cache_invalidate(f"part:{path}")
+    save_manifest(repo, manifest)
+
+def retention_panel(repo):
+    """Durée de conservation plus courte que BLISHKO_RETENTION_DAYS : appliquée seulement après confirmation."""
+    with st.sidebar.expander("Conservation"):
+        if not PARTITIONED:
+            st.caption("La durée de conservation ne s'applique qu'aux données partitionnées (BLISHKO_STORAGE_LAYOUT=partitioned) : "
+                       "le fichier unique garde tout l'historique.")
+            return
+        st.caption(f"Appliquée automatiquement : {RETENTION_DAYS} jours (BLISHKO_RETENTION_DAYS)." if RETENTION_DAYS > 0
+                   else "Aucune conservation automatique (BLISHKO_RETENTION_DAYS=0).")
+        days = int(st.number_input("Durée de conservation (jours)", value=RETENTION_DAYS if RETENTION_DAYS > 0 else 365,
+                                   min_value=1, step=1, key="retention_days"))
+        expired = PARTS.expired(load_manifest(repo), pd.Timestamp(today_str) - pd.Timedelta(days=days))
+        if not expired:
+            st.caption("Aucun mois au-delà de cette durée.")
+            return
+        action = "supprimés définitivement" if RETENTION_ACTION == "prune" else "archivés (data/archive/)"
+        st.warning(f"{len(expired)} mois seront {action} : {', '.join(expired)}")
+        if st.button("Confirmer", key="retention_confirm"):
+            with user_lock():
+                enforce_retention(repo, days)
+            st.rerun()
+
+# ---------------------------
+# Snapshots (blocs mensuels dédupliqués, voir snapshots.py)
+# ---------------------------
+class GithubFiles:
+    """Fichiers des snapshots via l'API GitHub ; écritures confiées au writer sauf `background=False`."""
+
+    def __init__(self, repo, background: bool = True):
+        self.repo = repo
+        self.background = background
+
+    def read(self, path: str) -> Optional[bytes]:
+        tree = repo_tree(self.repo)
+        if tree is not None and path not in tree:
+            return None
+        cf = read_repo_file(self.repo, path)
+        return cf.decoded_content if cf else None
+
+    def write(self, path: str, data: bytes, message: str = "", on_done=None, on_failed=None):
+        # `on_done()` une fois le commit fait, `on_failed(exc)` si le writer abandonne
+        sha = (repo_tree(self.repo) or {}).get(path)
+        if self.background:
+            push_async(self.repo, path, data, message, sha, on_done=lambda cf: on_done and on_done(), on_failed=on_failed or (lambda exc: None))
+            return
+        result = self.repo.update_file(path, message, data, sha) if sha else self.repo.create_file(path, message, data)
+        get_tree_cache().update(path, result["content"].sha)
+        if on_done:
+            on_done()
+
+@st.cache_resource(show_spinner=False)
+def _snapshot_store(_repo, remote: bool, root: str) -> snapshots.Snapshots:
+    # index des snapshots (un par utilisateur) gardé en mémoire par le process
+    return snapshots.Snapshots(GithubFiles(_repo) if remote else snapshots.LocalFiles(), root=root)
+
+def get_snapshots(repo) -> snapshots.Snapshots:
+    return _snapshot_store(repo, use_github(repo), TENANT.snapshot_root)
+
+def auto_snapshot(repo, df: pd.DataFrame):
+    """Snapshot du journal complet, au plus une fois par jour, quand le dernier a plus de SNAPSHOT_EVERY_DAYS jours."""
+    marker = f"snapshot:{today_str}"
+    if SNAPSHOT_EVERY_DAYS <= 0 or cache_get(marker):
+        return
+    cache_put(marker, True, None)
+    snaps = get_snapshots(repo)
+    snaps.reload()  # un autre process (ou la CLI) a pu en créer
+    latest = snaps.latest()
+    taken_at = now.replace(tzinfo=None)
+    if latest and pd.Timestamp(latest["at"]) > pd.Timestamp(taken_at) - pd.Timedelta(days=SNAPSHOT_EVERY_DAYS):
+        return
+    try:
+        snaps.create(load_window(repo) if PARTITIONED else current_store(repo, df).frame(), label="auto", at=taken_at)
+    except Exception as e:
+        logger.warning("Snapshot automatique échoué: %s", e)
+
+def restore_snapshot(repo, snapshot: dict, start, end, df: pd.DataFrame, contents=None) -> Tuple[bool, str]:
+    """Réinjecte les journées d'un snapshot sur [start, end] : elles remplacent les journées actuelles."""
+    try:
+        rows = get_snapshots(repo).restore(snapshot, start, end)
+    except Exception as e:
+        return False, f"Restauration impossible : {e}"
+    if rows.empty:
+        return True, "Aucune journée du snapshot dans cette période."
+    # journées restaurées = modifications de maintenant (elles l'emportent lors d'une fusion)
+    rows["UpdatedAt"] = storage.stamp()
+    if not save_data(repo, df, contents, changed=rows.to_dict("records")):
+        return False, "Échec de la sauvegarde après restauration."
+    return True, f"{len(rows)} journée(s) restaurée(s) depuis le snapshot {snapshot['id']}."
+
 # ---------------------------
 # Backup + initial clear (one-time)
 # ---------------------------
 def backup_and_clear_initial(repo, contents, df, tz):
     """
-    Sauvegarde un backup (GitHub si possible, sinon local) puis remplace data_2026.csv par un fichier vide.
+    Sauvegarde un snapshot (GitHub si possible, sinon local) puis remplace DATA_FILENAME par un fichier vide.
     Crée le flag INIT_FLAG localement ou sur repo pour indiquer que l'initialisation a été faite.
     """
     timestamp = datetime.now(tz).strftime("%Y%m%d_%H%M%S")
-    backup_name = f"data_2026_backup_{timestamp}.csv"
-    csv_content = df.to_csv(index=False)
+    if PARTITIONED:
+        df = load_window(repo)  # tout l'historique, pas seulement la fenêtre du Journal
+    cache_invalidate()
+    taken_at = datetime.now(tz).replace(tzinfo=None)
 
     # Try GitHub backup
-    if repo:
+    if repo and STORAGE.remote:
         try:
-            # create backup file in repo
-            repo.create_file(backup_name, f"Backup before initial clear {timestamp}", csv_content)
-            # replace main data file with empty template
-            empty_csv = make_empty_df().to_csv(index=False)
-            if contents:
-                repo.update_file(DATA_FILENAME, f"Reset data after backup {timestamp}", empty_csv, contents.sha)
+            # snapshot écrit avant la remise à zéro (écritures synchrones)
+            snap = snapshots.Snapshots(GithubFiles(repo, background=False), root=TENANT.snapshot_root).create(df, label="initial", at=taken_at)
+            _snapshot_store.clear()
+            if PARTITIONED:
+                # disposition partitionnée : un manifeste vide suffit (pas de fichier unique)
+                save_manifest(repo, PARTS.empty_manifest())
             else:
-                repo.create_file(DATA_FILENAME, f"Reset data after backup {timestamp}", empty_csv)
+                # replace main data file with empty template
+                empty_content = STORAGE.encode(make_empty_df())
+                if contents:
+                    result = repo.update_file(DATA_FILENAME, f"Reset data after backup {timestamp}", empty_content, contents.sha)
+                else:
+                    result = repo.create_file(DATA_FILENAME, f"Reset data after backup {timestamp}", empty_content)
+                journal = read_repo_file(repo, JOURNAL_FILENAME)
+                if journal:
+                    repo.delete_file(JOURNAL_FILENAME, f"Reset journal after backup {timestamp}", journal.sha)
+                # le rechargement qui suit est servi depuis le cache
+                cache_put(f"github:{DATA_FILENAME}", (result["content"].sha, None), ensure_columns(make_empty_df()), result["content"], journal=None, journal_text="")
             # create flag file in repo
             repo.create_file(INIT_FLAG, f"Init flag {timestamp}", "initialized")
-            return True, f"Backup GitHub créé : {backup_name} ; données réinitialisées."
+            return True, f"Snapshot GitHub créé : {snap['id']} ; données réinitialisées."
         except Exception as e:
             logger.warning("Backup GitHub échoué: %s", e)
 
     # Local backup fallback
     try:
-        local_backup_path = backup_name
-        with open(local_backup_path, "w", encoding="utf-8") as f:
-            f.write(csv_content)
-        # overwrite local data file with empty template
-        make_empty_df().to_csv(DATA_FILENAME, index=False)
+        snap = snapshots.Snapshots(snapshots.LocalFiles(), root=TENANT.snapshot_root).create(df, label="initial", at=taken_at)
+        _snapshot_store.clear()
+        if PARTITIONED:
+            save_manifest(None, PARTS.empty_manifest())
+        else:
+            # overwrite local data file with empty template
+            STORAGE.write(DATA_FILENAME, make_empty_df())
+            if os.path.exists(JOURNAL_FILENAME):
+                os.remove(JOURNAL_FILENAME)
         # create local flag
         with open(INIT_FLAG, "w", encoding="utf-8") as f:
             f.write("initialized")
-        return True, f"Backup local créé : {local_backup_path} ; données locales réinitialisées."
+        return True, f"Snapshot local créé : {snap['id']} ; données locales réinitialisées."
     except Exception as e:
         logger.error("Échec backup local: %s", e)
         return False, f"Échec backup local : {e}"
 
+def merge_backups(repo, backups, df: pd.DataFrame, contents=None) -> Tuple[bool, str]:
+    """
+    Réintègre les backups dans le journal, du plus ancien au plus récent ; les données
+    actuelles restent prioritaires (last-write-wins par Date).
+    """
+    if PARTITIONED:
+        df = load_window(repo)
+    merged = JournalStore()
+    if repo and STORAGE.remote:
+        for path, cf in zip(backups, fetch_repo_files(repo, backups)):
+            if cf:
+                merged.import_rows(storage.storage_for_path(path).decode(cf.decoded_content))
+    else:
+        for path in backups:
+            merged.import_rows(storage.storage_for_path(path).read(path))
+    before = len(merged)
+    merged.import_rows(df)
+    if not save_data(repo, merged.frame(), contents):
+        return False, "Échec de la sauvegarde après fusion."
+    return True, f"{len(backups)} backup(s) fusionné(s) : {before} journée(s) lues, {len(merged)} au total."
+
 def check_initialized(repo) -> bool:
     # Check local flag first
     if os.path.exists(INIT_FLAG):
         return True
-    # If repo configured, check for flag file in repo
+    # déjà vu initialisé par ce process : le flag ne disparaît pas
+    if cache_get("initialized"):
+        return True
+    # If repo configured, check for flag file in repo (arbre déjà en cache au démarrage)
     if repo:
-        contents = read_repo_file(repo, INIT_FLAG)
-        if contents:
+        tree = repo_tree(repo)
+        if (INIT_FLAG in tree) if tree is not None else read_repo_file(repo, INIT_FLAG):
+            cache_put("initialized", True, None)
             return True
     return False
 
 # ---------------------------
 # Chart helpers
 # ---------------------------
-def line_chart_with_arrow(df: pd.DataFrame, x_col: str, y_col: str, title: str, color: str = "#0A84FF", target: Optional[float]=None):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df[x_col], y=df[y_col], mode='lines+markers', line=dict(color=color, width=3), marker=dict(size=MARKER_SIZE, symbol='square', color=color), name=title))
-    if len(df) >= 2:
-        x0 = df[x_col].iloc[-2]; y0 = df[y_col].iloc[-2]
-        x1 = df[x_col].iloc[-1]; y1 = df[y_col].iloc[-1]
-        fig.add_shape(type="line", x0=x0, y0=y0, x1=x1, y1=y1, line=dict(color="#FF453A", width=2))
-        fig.add_annotation(x=x1, y=y1, ax=x0, ay=y0, showarrow=True, arrowhead=3, arrowsize=1.2, arrowcolor="#FF453A", arrowwidth=2)
-    if target is not None:
-        fig.add_hline(y=target, line_dash="dash", line_color="#FF453A", annotation_text=f"Target: {target}", annotation_position="top right")
-    fig.update_layout(title=title, plot_bgcolor='#1C1C1E', paper_bgcolor='#000000', font=dict(color='#FFFFFF', family='-apple-system'), xaxis=dict(gridcolor='#2C2C2E'), yaxis=dict(gridcolor='#2C2C2E'), margin=dict(l=20,r=20,t=50,b=20))
-    return fig
-
-def bar_with_small_squares(df: pd.DataFrame, x_col: str, y_col: str, title: str, bar_color: str = "#FFD60A", square_color: str = "#FF453A"):
-    fig = go.Figure()
-    fig.add_trace(go.Bar(x=df[x_col], y=df[y_col], name=title, marker=dict(color=bar_color)))
-    fig.add_trace(go.Scatter(x=df[x_col], y=df[y_col], mode='markers', marker=dict(symbol='square', size=MARKER_SIZE, color=square_color), name='points'))
-    fig.update_layout(title=title, plot_bgcolor='#1C1C1E', paper_bgcolor='#000000', font=dict(color='#FFFFFF', family='-apple-system'), xaxis=dict(gridcolor='#2C2C2E'), yaxis=dict(gridcolor='#2C2C2E'), margin=dict(l=20,r=20,t=50,b=20))
-    return fig
+@st.cache_resource(show_spinner=False)
+def get_figure_cache() -> charts.FigureCache:
+    # figures déjà construites, partagées par les sessions : clé (version des données, série, plage)
+    return charts.FigureCache()
+
+@st.cache_resource(show_spinner=False)
+def get_analytics_cache() -> analytics.ResultCache:
+    # séries, tendances et corrélations déjà calculées : clé (version des données, plage)
+    return analytics.ResultCache()
+
+# ---------------------------
+# Export en lecture seule (export/ servi par `python export.py serve`)
+# ---------------------------
+@st.cache_resource(show_spinner=False)
+def get_publisher() -> export.Publisher:
+    # thread de régénération des exports, partagé par les sessions
+    return export.Publisher(labels=HABIT_LABELS)
+
+def publish_export(repo, df: pd.DataFrame):
+    """Confie l'export au thread de fond : historique complet, KPI, agrégats et JSON / HTML calculés hors du rerun."""
+    if not EXPORT_ENABLED:
+        return
+    lock = user_lock()
+
+    def load() -> Tuple[pd.DataFrame, Optional[Summary]]:
+        # dans le thread d'export, après la sauvegarde (le verrou l'empêche de lire un journal en cours d'écriture)
+        with lock:
+            if not PARTITIONED:
+                return current_store(repo, df).frame(derived=True), None
+            months = load_manifest(repo)["partitions"]
+            # le récapitulatif mensuel du manifeste évite de recalculer les KPI
+            summary = Summary.from_months(months) if all("XP" in m for m in months.values()) else None
+            return load_window(repo), summary
+    get_publisher().submit(EXPORT_ROOT, load, (INVEST_STOCKS, INVEST_CRYPTO))
 
 # ---------------------------
 # Main initialization logic
 # ---------------------------
+startup_timings = {}
+t_start = time.perf_counter()
 repo = init_github()
-df, contents = load_data(repo)
+startup_timings["github"] = (time.perf_counter() - t_start) * 1000
+if PARTITIONED:
+    with user_lock():
+        enforce_retention(repo, RETENTION_DAYS)
+with tracing.span("load_data"):
+    df, contents = load_data(repo, startup_timings)
+startup_timings["load"] = (time.perf_counter() - t_start) * 1000 - startup_timings["github"]
 
 # If not initialized yet, perform one-time backup+clear so app starts empty for you
+# (une seule session par utilisateur s'en charge : les autres attendent le verrou puis rechargent)
 if not check_initialized(repo):
-    # Only backup/clear if there is existing data to preserve
-    try:
-        if df is not None and not df.empty:
-            success, msg = backup_and_clear_initial(repo, contents, df, tz)
-            logger.info("Initial backup/clear: %s", msg)
-        else:
-            # ensure empty data file exists and create local flag
-            make_empty_df().to_csv(DATA_FILENAME, index=False)
-            with open(INIT_FLAG, "w", encoding="utf-8") as f:
-                f.write("initialized")
+    with user_lock():
+        if not check_initialized(repo):
+            # Only backup/clear if there is existing data to preserve
+            try:
+                if df is not None and not df.empty:
+                    success, msg = backup_and_clear_initial(repo, contents, df, tz)
+                    logger.info("Initial backup/clear: %s", msg)
+                else:
+                    # ensure empty data file exists (fichier unique ; les partitions naissent au premier enregistrement) and create local flag
+                    if not PARTITIONED:
+                        STORAGE.write(DATA_FILENAME, make_empty_df())
+                    with open(INIT_FLAG, "w", encoding="utf-8") as f:
+                        f.write("initialized")
+                cache_put("initialized", True, None)
+            except Exception as e:
+                logger.exception("Erreur lors de l'initialisation: %s", e)
+                # ensure we still create flag to avoid repeated attempts
+                try:
+                    with open(INIT_FLAG, "w", encoding="utf-8") as f:
+                        f.write("initialized")
+                except Exception:
+                    pass
         # reload after clear
         df, contents = load_data(repo)
-    except Exception as e:
-        logger.exception("Erreur lors de l'initialisation: %s", e)
-        # ensure we still create flag to avoid repeated attempts
-        try:
-            with open(INIT_FLAG, "w", encoding="utf-8") as f:
-                f.write("initialized")
-        except Exception:
-            pass
+startup_timings["total"] = (time.perf_counter() - t_start) * 1000
+if "blobs" in startup_timings:
+    # uniquement quand le réseau a été sollicité (démarrage à froid ou données changées)
+    logger.info("Démarrage : %s", " ".join(f"{k}={v:.0f}ms" for k, v in startup_timings.items()))
+backups = list_backups(repo_tree(repo)) if repo and STORAGE.remote else sorted(glob.glob(BACKUP_PATTERN))
+if backups:
+    st.sidebar.caption(f"Backups disponibles : {len(backups)}")
+    if st.sidebar.button("Fusionner les backups dans le journal"):
+        ok, msg = merge_backups(repo, backups, df, contents)
+        (st.sidebar.success if ok else st.sidebar.error)(msg)
+        df, contents = load_data(repo)
+auto_snapshot(repo, df)
+snapshot_list = get_snapshots(repo).list_snapshots()
+if snapshot_list:
+    with st.sidebar.expander(f"Snapshots ({len(snapshot_list)})"):
+        choices = {f"{s['id']} — {s['rows']} j. ({s['first']} → {s['last']})": s for s in reversed(snapshot_list)}
+        chosen = choices[st.selectbox("Snapshot", list(choices), key="snapshot_id")]
+        period = st.date_input("Période à restaurer", value=(pd.Timestamp(chosen["first"]).date(), pd.Timestamp(chosen["last"]).date()), key="snapshot_range")
+        if st.button("Restaurer la période", key="snapshot_restore") and period:
+            ok, msg = restore_snapshot(repo, chosen, period[0], period[-1], df, contents)
+            (st.success if ok else st.error)(msg)
+            df, contents = load_data(repo)
+
+retention_panel(repo)
+
+# état du writer GitHub (pending / synced / failed)
+SYNC_LABELS = {sync.PENDING: "⏳ en attente", sync.SYNCED: "✅ synchronisé", sync.FAILED: "⚠️ échec (copie locale)"}
+if flush_outbox(repo, df, contents):
+    df, contents = load_data(repo)
+sync_state = get_writer().overall(TENANT.path("")) if repo else None  # fichiers de l'utilisateur seulement
+if sync_state:
+    st.sidebar.caption(f"Synchronisation GitHub : {SYNC_LABELS[sync_state]}")
+# premier export (déploiement existant) : ensuite régénéré à chaque sauvegarde
+if EXPORT_ENABLED and not cache_get("export") and not os.path.exists(os.path.join(EXPORT_ROOT, export.JSON_NAME)):
+    cache_put("export", True, None)
+    publish_export(repo, df)
+queued_days = len(get_outbox(OUTBOX_FILENAME)) if STORAGE.remote and (repo or github_configured()) else 0
+if queued_days:
+    st.sidebar.caption(f"📤 {queued_days} journée(s) en attente d'envoi vers GitHub")
 
 # ---------------------------
 # UI header + progress bar (precision 0.01)
@@ -286,10 +1159,19 @@ st.markdown(f"<div style='background:linear-gradient(145deg,#1C1C1E,#2C2C2E); pa
 # ---------------------------
 # Tabs: Journal & Stats
 # ---------------------------
-tab_journal, tab_stats = st.tabs(["📝 JOURNAL", "📊 STATISTIQUES"])
+def traced_fragment(name: str):
+    # fragment Streamlit : ses widgets ne relancent que lui ; tracé comme un rerun à part entière
+    def wrap(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with tracing.scope(name, st.session_state.get("session_id")):
+                return fn(*args, **kwargs)
+        return st.fragment(run)
+    return wrap
 
 # JOURNAL
-with tab_journal:
+@traced_fragment("journal")
+def journal_form(repo, df: pd.DataFrame, contents):
     st.markdown("<div style='background:linear-gradient(145deg,#1C1C1E,#2C2C2E); padding:16px; border-radius:12px;'>", unsafe_allow_html=True)
     st.markdown("<h3 style='margin-top:0;'>Habitudes & Finances</h3>", unsafe_allow_html=True)
 
@@ -306,18 +1188,9 @@ with tab_journal:
         st.caption("Le score de discipline sera calculé à l'enregistrement.")
     st.markdown("<hr>", unsafe_allow_html=True)
 
-    habits = {
-        "School":"Travail/Étude fait",
-        "Finance":"Finance checkée",
-        "Prayer":"Prière",
-        "Reading":"Lecture",
-        "Sport":"Sport complet",
-        "Hygiene":"Hygiène & chambre",
-        "Budget":"Zéro dépense inutile"
-    }
     toggles = {}
     cols = st.columns(3)
-    for i, (k, label) in enumerate(habits.items()):
+    for i, (k, label) in enumerate(HABIT_LABELS.items()):
         toggles[k] = cols[i % 3].checkbox(label, key=f"chk_{k}")
 
     weight = st.number_input("Poids (kg) - entre quand tu veux", min_value=0.0, max_value=300.0, value=0.0, step=0.1, key="weight")
@@ -325,9 +1198,8 @@ with tab_journal:
 
     # Save action
     if st.button("💾 Enregistrer la journée", type="primary"):
-        toggles_list = [int(toggles[k]) for k in habits.keys()]
-        phone_goal_ok = 1 if phone <= 3.0 else 0
-        xp = int((sum(toggles_list) + phone_goal_ok) / (len(toggles_list) + 1) * 100)
+        # habitudes cochées + objectif d'écran (compact.PHONE_GOAL), même calcul que les imports en masse
+        xp = int(compact.xp_score(compact.habit_bits(toggles), phone))
         new_row = {
             "Date": today_str,
             "XP": xp,
@@ -337,36 +1209,24 @@ with tab_journal:
             "Crypto": float(crypto),
             "Expenses": float(expenses),
             "Twitch": int(twitch),
-            **{k: int(v) for k, v in toggles.items()}
+            **{k: int(v) for k, v in toggles.items()},
+            "UpdatedAt": storage.stamp(),  # last-write-wins entre appareils
         }
 
-        # upsert into df
-        if df is None or df.empty:
-            df = pd.DataFrame([new_row])
-        else:
-            if today_str in df["Date"].astype(str).values:
-                df.loc[df["Date"].astype(str) == today_str, list(new_row.keys())] = list(new_row.values())
-            else:
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-
-        # ensure date dtype and sort
-        df = ensure_columns(df)
-        df["Date"] = pd.to_datetime(df["Date"])
-        df = df.sort_values("Date").reset_index(drop=True)
-
-        # save persistently
-        saved = save_data(repo, df, contents)
+        # save persistently (upsert O(log n) dans le journal en mémoire, sans tri)
+        with tracing.span("save_data"):
+            saved = save_data(repo, df, contents, changed=[new_row])
         if saved:
             st.success(f"Journée enregistrée — Score {xp}%")
+            if repo and get_writer().is_pending(DATA_FILENAME, JOURNAL_FILENAME):
+                st.caption("Synchronisation GitHub en arrière-plan…")
             # show recap analysis
             st.markdown("<br>", unsafe_allow_html=True)
             st.markdown("<div style='background:linear-gradient(135deg,#111 0%, #222 100%); padding:16px; border-radius:12px;'>", unsafe_allow_html=True)
             st.markdown("<h3 style='margin-top:0;'>Récapitulatif</h3>", unsafe_allow_html=True)
 
             # compare to yesterday if exists
-            yesterday_row = None
-            if len(df) >= 2:
-                yesterday_row = df.iloc[-2]
+            yesterday_row = current_store(repo, df).previous(today_str)
 
             analysis_lines = []
             analysis_lines.append(f"Ton score de discipline aujourd'hui est **{xp}%**.")
@@ -410,73 +1270,132 @@ with tab_journal:
             for line in analysis_lines:
                 st.markdown(f"- {line}", unsafe_allow_html=True)
             st.markdown("</div>", unsafe_allow_html=True)
-            # reload df and contents
-            df, contents = load_data(repo)
         else:
             st.error("Erreur lors de la sauvegarde. Vérifie GITHUB_TOKEN / REPO_NAME ou permissions d'écriture locale.")
 
 # STATISTICS
-with tab_stats:
+@traced_fragment("stats")
+def stats_panel(repo, df: pd.DataFrame):
     st.markdown("<div style='background:linear-gradient(145deg,#1C1C1E,#2C2C2E); padding:16px; border-radius:12px;'>", unsafe_allow_html=True)
     st.markdown("<h3 style='margin-top:0;'>Statistiques financières & habitudes</h3>", unsafe_allow_html=True)
+    # fenêtre affichée : seules les partitions qui la recoupent sont chargées, seuls ses points sont envoyés
+    STATS_WINDOWS = {"Tout": None, "30 jours": 30, "90 jours": 90, "1 an": 365, "Personnalisée": "custom"}
+    window_days = STATS_WINDOWS[st.selectbox("Période", list(STATS_WINDOWS), key="stats_window")]
+    window_start = window_end = None
+    if window_days == "custom":
+        picked = st.date_input("Du … au", value=(now.date() - timedelta(days=89), now.date()), key="stats_range")
+        if picked:
+            window_start, window_end = pd.Timestamp(picked[0]), pd.Timestamp(picked[-1])
+    elif window_days:
+        window_start = pd.Timestamp(today_str) - pd.Timedelta(days=window_days - 1)
+    full_history = window_start is None and window_end is None
+    # agrégats : maintenus à chaque enregistrement pour tout l'historique, recalculés sur la fenêtre sinon
+    if PARTITIONED:
+        df = add_rolling(load_window(repo, window_start, window_end))
+        data_version = window_version(repo, window_start, window_end)
+        parts_meta = load_manifest(repo)["partitions"]
+        if full_history and all("XP" in m for m in parts_meta.values()):
+            summary = Summary.from_months(parts_meta)
+        else:
+            summary = Summary.from_frame(df)
+    else:
+        stats_store = current_store(repo, df)
+        df = stats_store.frame(window_start, window_end, derived=True)
+        data_version = stats_store.version
+        summary = stats_store.summary if full_history else Summary.from_frame(df)
+    figures = get_figure_cache()
+    fig_key = lambda series: (data_version, series, str(window_start), str(window_end))
+    period_label = "sur la période" if window_days else "depuis le début"
     if df is None or df.empty or len(df) < 1:
         st.info("Aucune donnée disponible. Commence à saisir une journée pour que les données persistent.")
     else:
-        df = df.copy()
-        df["Date"] = pd.to_datetime(df["Date"])
-        df = df.sort_values("Date")
-
+        # vue du journal en mémoire : déjà typée et triée par Date
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.markdown(f"<div style='text-align:center; padding:8px; border-radius:12px;'><div style='font-size:26px; font-weight:800;'>{df['XP'].mean():.0f}%</div><div style='color:#8E8E93;'>XP moyen</div></div>", unsafe_allow_html=True)
+            st.markdown(f"<div style='text-align:center; padding:8px; border-radius:12px;'><div style='font-size:26px; font-weight:800;'>{summary.mean('XP'):.0f}%</div><div style='color:#8E8E93;'>XP moyen</div></div>", unsafe_allow_html=True)
         with col2:
-            avg_phone = df["Phone"].mean()
+            avg_phone = summary.mean("Phone")
             color = "#32D74B" if avg_phone <= 3 else "#FF453A"
             st.markdown(f"<div style='text-align:center; padding:8px; border-radius:12px;'><div style='font-size:26px; font-weight:800; color:{color};'>{avg_phone:.1f}h</div><div style='color:#8E8E93;'>Écran moyen</div></div>", unsafe_allow_html=True)
         with col3:
-            net_gain = df["Stocks"].sum() + df["Crypto"].sum()
+            net_gain = summary.net_gain
             color_net = "#32D74B" if net_gain >= 0 else "#FF453A"
-            st.markdown(f"<div style='text-align:center; padding:8px; border-radius:12px;'><div style='font-size:26px; font-weight:800; color:{color_net};'>{net_gain:.2f}€</div><div style='color:#8E8E93;'>Gain net depuis le début</div></div>", unsafe_allow_html=True)
+            st.markdown(f"<div style='text-align:center; padding:8px; border-radius:12px;'><div style='font-size:26px; font-weight:800; color:{color_net};'>{net_gain:.2f}€</div><div style='color:#8E8E93;'>Gain net {period_label}</div></div>", unsafe_allow_html=True)
         with col4:
-            total_expenses = df["Expenses"].sum()
+            total_expenses = summary.total("Expenses")
             st.markdown(f"<div style='text-align:center; padding:8px; border-radius:12px;'><div style='font-size:26px; font-weight:800;'>{total_expenses:.2f}€</div><div style='color:#8E8E93;'>Dépenses totales</div></div>", unsafe_allow_html=True)
 
         st.markdown("<hr>", unsafe_allow_html=True)
 
         # Bourse
         st.markdown("### 💹 Bourse (gain/perte journalier)")
-        df_stock = df[["Date","Stocks"]].copy()
-        df_stock["MA7"] = df_stock["Stocks"].rolling(7, min_periods=1).mean()
-        st.plotly_chart(bar_with_small_squares(df_stock, "Date", "Stocks", "Bourse", bar_color="#0A84FF", square_color="#FF453A"), use_container_width=True)
+        st.plotly_chart(figures.get(fig_key("Stocks"), lambda: bar_with_small_squares(df, "Date", "Stocks", "Bourse", bar_color="#0A84FF", square_color="#FF453A", ma_col=rolling_col("Stocks"))), use_container_width=True)
 
         # Crypto
         st.markdown("### 🔥 Crypto (gain/perte journalier)")
-        df_crypto = df[["Date","Crypto"]].copy()
-        df_crypto["MA7"] = df_crypto["Crypto"].rolling(7, min_periods=1).mean()
-        st.plotly_chart(bar_with_small_squares(df_crypto, "Date", "Crypto", "Crypto", bar_color="#BF5AF2", square_color="#FF453A"), use_container_width=True)
+        st.plotly_chart(figures.get(fig_key("Crypto"), lambda: bar_with_small_squares(df, "Date", "Crypto", "Crypto", bar_color="#BF5AF2", square_color="#FF453A", ma_col=rolling_col("Crypto"))), use_container_width=True)
 
         # Dépenses
         st.markdown("### 🧾 Dépenses quotidiennes")
-        st.plotly_chart(bar_with_small_squares(df, "Date", "Expenses", "Dépenses", bar_color="#FF453A", square_color="#FFFFFF"), use_container_width=True)
+        st.plotly_chart(figures.get(fig_key("Expenses"), lambda: bar_with_small_squares(df, "Date", "Expenses", "Dépenses", bar_color="#FF453A", square_color="#FFFFFF", ma_col=rolling_col("Expenses"))), use_container_width=True)
 
         # Poids
         st.markdown("### ⚖️ Évolution du poids")
         df_w = df[df["Weight"] > 0]
         if not df_w.empty:
-            st.plotly_chart(line_chart_with_arrow(df_w, "Date", "Weight", "Poids (kg)", color="#32D74B"), use_container_width=True)
+            st.plotly_chart(figures.get(fig_key("Weight"), lambda: line_chart_with_arrow(df_w, "Date", "Weight", "Poids (kg)", color="#32D74B")), use_container_width=True)
         else:
             st.info("Aucune donnée de poids enregistrée pour l'instant.")
 
+        # Habitudes : séries, tendances, corrélations (calculées une fois par version des données et période)
+        st.markdown("<hr>", unsafe_allow_html=True)
+        results = get_analytics_cache().get(fig_key("analytics"), lambda: analytics.compute(df))
+        st.markdown("### 🔗 Séries d'habitudes")
+        streak_table = results["streaks"].rename(index=HABIT_LABELS, columns={"current": "En cours (j)", "longest": "Record (j)"})
+        st.dataframe(streak_table, use_container_width=True)
+        st.markdown("### 📈 Tendances")
+        period = st.radio("Regroupement", list(analytics.PERIODS), format_func=analytics.PERIODS.get, horizontal=True, key="trend_freq")
+        trend_title = f"Par {analytics.PERIODS[period].lower()}"
+        st.plotly_chart(figures.get(fig_key(f"trend:{period}"), lambda: charts.trend_chart(results[period], trend_title)), use_container_width=True)
+        st.plotly_chart(figures.get(fig_key("correlations"), lambda: charts.correlation_heatmap(results["correlations"], HABIT_LABELS, {"XP": "XP", "Phone": "Écran"})), use_container_width=True)
+        st.caption("Corrélation positive avec l'XP : l'habitude va de pair avec les bonnes journées ; négative avec l'écran : moins de temps d'écran les jours où elle est faite.")
+
         # ROI
         st.markdown("<hr>", unsafe_allow_html=True)
         invested_total = INVEST_STOCKS + INVEST_CRYPTO
         roi_text = "N/A"
-        if invested_total > 0:
-            roi = (net_gain / invested_total) * 100
+        roi = summary.roi(invested_total)
+        if roi is not None:
             roi_text = f"{roi:.2f}%"
         st.markdown(f"- Investi en bourse : **{INVEST_STOCKS:.2f}€**")
         st.markdown(f"- Investi en crypto : **{INVEST_CRYPTO:.2f}€**")
-        st.markdown(f"- Gain net depuis le début : **{net_gain:.2f}€**")
+        st.markdown(f"- Gain net {period_label} : **{net_gain:.2f}€**")
         st.markdown(f"- ROI simple : **{roi_text}**")
 
     st.markdown("</div>", unsafe_allow_html=True)
+
+# onglet Statistiques calculé seulement quand il est affiché (changer d'onglet relance le script)
+tab_journal, tab_stats = st.tabs(["📝 JOURNAL", "📊 STATISTIQUES"], key="tab", on_change="rerun")
+with tab_journal:
+    journal_form(repo, df, contents)
+with tab_stats:
+    if tab_stats.open:
+        stats_panel(repo, df)
+
+# ---------------------------
+# Profilage (panneau masqué : ?profil=1 ou BLISHKO_PROFILING=1)
+# ---------------------------
+trace_record = tracing.finish()
+if st.query_params.get("profil") == "1" or os.environ.get("BLISHKO_PROFILING") == "1":
+    if st.sidebar.toggle("Profilage", key="profiling") and trace_record:
+        st.sidebar.plotly_chart(charts.flame_chart(trace_record["spans"], trace_record["ms"]), use_container_width=True)
+        if trace_record["counters"]:
+            st.sidebar.caption(" · ".join(f"{k} = {v:g}" for k, v in sorted(trace_record["counters"].items())))
+        if MULTI_USER:
+            shared = get_data_cache()
+            st.sidebar.caption(f"Cache partagé : {len(shared)} utilisateur(s), {shared.nbytes() / 2**20:.1f} Mo, {shared.evictions} éviction(s)")
+        stats = get_recorder().percentiles()
+        if stats:
+            table = pd.DataFrame.from_dict(stats, orient="index").sort_values("p95", ascending=False)
+            st.sidebar.caption(f"Latence (ms) sur les {len(get_recorder().recent())} derniers reruns (script complet ou fragment)")
+            st.sidebar.dataframe(table, use_container_width=True)
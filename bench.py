@@ -0,0 +1,390 @@
+# bench.py - Blishko's Mindset : mesures de performance sur des journaux synthétiques
+# Usage : python bench.py [--years 1 5 20 100] [--users 1 4] [--latency 0] [--out bench.json]
+#
+# Génère des journaux de N années (une ligne par jour, colonnes de cols_list()), sert les
+# fichiers via un faux dépôt GitHub en mémoire et exécute app.py sans navigateur (AppTest).
+# Chaque phase rapporte temps écoulé, pic mémoire (tracemalloc) et octets transférés ;
+# la sortie JSON porte le commit courant pour comparer les résultats d'une version à l'autre.
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Optional, Callable, Any, List
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import compact
+import export
+import storage
+import tenants
+from storage import cols_list, ensure_columns
+from store import JournalStore
+from summary import rolling_col
+from charts import line_chart_with_arrow, bar_with_small_squares
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_YEARS = [1, 5, 20, 100]
+DEFAULT_USERS = [1, 4]
+SEED = 2026
+SYNC_TIMEOUT = 30.0
+TENANT_USERS = 300  # journaux servis par un même process (cache partagé multi-utilisateur)
+
+# ---------------------------
+# Journaux synthétiques
+# ---------------------------
+def make_journal(years: int, end: Optional[pd.Timestamp] = None, seed: int = SEED) -> pd.DataFrame:
+    """Une ligne par jour jusqu'à `end` (défaut : la veille), valeurs réalistes et reproductibles."""
+    end = end if end is not None else pd.Timestamp.now().normalize() - pd.Timedelta(days=1)
+    dates = pd.date_range(end=end, periods=int(years * 365), freq="D")
+    n = len(dates)
+    rng = np.random.default_rng(seed)
+    habits = rng.random((n, len(compact.HABIT_COLS))) < 0.6
+    df = pd.DataFrame({
+        "Date": dates,
+        "Phone": rng.uniform(0, 8, n).round(1),
+        "Weight": (80 + rng.normal(0, 0.2, n).cumsum() / 10).round(1),
+        "Stocks": rng.normal(0, 3, n).round(2),
+        "Crypto": rng.normal(0, 5, n).round(2),
+        "Expenses": rng.exponential(15, n).round(2),
+        "Twitch": rng.integers(0, 200, n),
+    })
+    for i, c in enumerate(compact.HABIT_COLS):
+        df[c] = habits[:, i].astype(int)
+    # même règle que l'app : 7 habitudes + objectif d'écran
+    df["XP"] = compact.xp_score(habits @ (1 << np.arange(len(compact.HABIT_COLS))), df["Phone"]).astype(int)
+    df["UpdatedAt"] = dates.as_unit("ms").asi8 + 20 * 3600 * 1000  # saisie le soir même
+    return df[cols_list()]
+
+# ---------------------------
+# Faux dépôt GitHub (API PyGithub utilisée par app.py)
+# ---------------------------
+class StandInError(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+class StandInFile:
+    type = "file"
+
+    def __init__(self, path: str, raw: bytes):
+        self.path = path
+        self.name = path.rsplit("/", 1)[-1]
+        self.decoded_content = raw
+        self.size = len(raw)
+        self.sha = hashlib.sha1(raw + path.encode()).hexdigest()
+
+class StandInTree:
+    def __init__(self, files):
+        self.tree = [type("TreeEntry", (), {"path": f.path, "sha": f.sha, "type": "blob"})() for f in files]
+
+class StandInRepo:
+    """Dépôt en mémoire : compte appels et octets lus / écrits, latence réseau simulée."""
+    default_branch = "main"
+
+    def __init__(self, files: dict, latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.files = {}
+        self.reset_counters()
+        for path, raw in files.items():
+            self._put(path, raw)
+
+    def reset_counters(self):
+        self.calls = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def _put(self, path: str, raw) -> StandInFile:
+        raw = raw.encode() if isinstance(raw, str) else raw
+        self.files[path] = StandInFile(path, raw)
+        return self.files[path]
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_contents(self, path: str, ref=None):
+        self._call()
+        if path in self.files:
+            f = self.files[path]
+            with self._lock:
+                self.bytes_read += f.size
+            return f
+        prefix = path.strip("/")
+        kids = [StandInFile(p, b"") for p in self.files if (p.startswith(prefix + "/") if prefix else "/" not in p)]
+        if kids:
+            return kids
+        raise StandInError(404)
+
+    def get_git_tree(self, ref, recursive=False):
+        self._call()
+        return StandInTree(list(self.files.values()))
+
+    def _write(self, path: str, content, sha: Optional[str]):
+        self._call()
+        with self._lock:
+            current = self.files.get(path)
+            if sha is None and current is not None:
+                raise StandInError(422)
+            if sha is not None and (current is None or current.sha != sha):
+                raise StandInError(409 if current else 404)
+            f = self._put(path, content)
+            self.writes += 1
+            self.bytes_written += f.size
+            return {"content": f, "commit": None}
+
+    def create_file(self, path, message, content, branch=None):
+        return self._write(path, content, None)
+
+    def update_file(self, path, message, content, sha, branch=None):
+        return self._write(path, content, sha)
+
+    def delete_file(self, path, message, sha, branch=None):
+        self._call()
+        with self._lock:
+            if path not in self.files or self.files[path].sha != sha:
+                raise StandInError(409)
+            del self.files[path]
+            self.writes += 1
+            return {"commit": None}
+
+class StandInGithub:
+    repo: Optional[StandInRepo] = None
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get_repo(self, name: str) -> StandInRepo:
+        return StandInGithub.repo
+
+# ---------------------------
+# Mesure
+# ---------------------------
+def measure(phase: str, fn: Callable[[], Any], payload: Optional[Callable[[Any], int]] = None, **extra) -> dict:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    wall_ms = (time.perf_counter() - t0) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"phase": phase, "wall_ms": round(wall_ms, 3), "peak_kb": round(peak / 1024, 1),
+            "payload_bytes": int(payload(result)) if payload else 0, **extra}
+
+def best_ms(fn: Callable[[], Any], repeat: int = 5) -> float:
+    # meilleur temps sur `repeat` appels, hors tracemalloc (qui ralentit les allocations)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return round(min(times), 3)
+
+def figure_bytes(fig) -> int:
+    return len(fig.to_json())
+
+def rendered_bytes(at) -> int:
+    # taille des figures Plotly envoyées au navigateur lors du run
+    return sum(len(chart.proto.spec) for chart in at.get("plotly_chart"))
+
+def bench_helpers(df: pd.DataFrame) -> List[dict]:
+    """Chemins sans Streamlit : normalisation, upsert + vue triée, construction des figures."""
+    backend = storage.get_storage("csv")
+    raw = backend.encode(df)
+    results = [measure("decode", lambda: backend.decode(raw), payload=lambda _: len(raw))]
+    decoded = pd.read_csv(io.BytesIO(raw))  # colonnes brutes, dates en texte
+    results.append(measure("ensure_columns", lambda: ensure_columns(decoded)))
+    packed = compact.encode(df)
+    results.append(measure("decode_compact", lambda: compact.decode(packed), payload=lambda _: len(packed)))
+    # payload : mémoire des colonnes du journal en mémoire
+    results.append(measure("store_build", lambda: JournalStore.from_frame(df), payload=lambda s: s.nbytes()))
+    store = JournalStore.from_frame(df)
+    row = {c: 1 for c in cols_list()}
+    row["Date"] = df["Date"].iloc[-1] + pd.Timedelta(days=1)
+
+    def upsert_sort():
+        store.upsert(row)
+        return store.frame()
+
+    results.append(measure("upsert_sort", upsert_sort))
+    results.append(measure("encode", lambda: backend.encode(store.frame()), payload=len))
+    derived = store.frame(derived=True)
+    results.append(measure("chart_bar", lambda: bar_with_small_squares(derived, "Date", "Stocks", "Bourse", ma_col=rolling_col("Stocks")), payload=figure_bytes))
+    results.append(measure("chart_line", lambda: line_chart_with_arrow(df, "Date", "Weight", "Poids (kg)"), payload=figure_bytes))
+    # analyses des habitudes : à froid (budget analytics.BUDGET_MS) puis servies par le cache
+    view = store.frame()
+    results.append(measure("analytics", lambda: analytics.compute(view), best_ms=best_ms(lambda: analytics.compute(view)), budget_ms=analytics.BUDGET_MS))
+    memo = analytics.ResultCache()
+    memo.get(store.version, lambda: analytics.compute(view))
+    results.append(measure("analytics_cached", lambda: memo.get(store.version, lambda: analytics.compute(view))))
+    # export en lecture seule (thread de fond de l'app) : payload = stats.json + index.html
+    results.append(measure("export_build", lambda: export.build(derived, (50.0, 96.0)), best_ms=best_ms(lambda: export.build(derived, (50.0, 96.0)), 3),
+                           payload=lambda p: len(json.dumps(p)) + len(export.render_html(p))))
+    results += bench_tenants(store)
+    return results
+
+def bench_tenants(store: JournalStore, users: int = TENANT_USERS) -> List[dict]:
+    """Cache partagé : `users` journaux de cette taille avec un budget pour la moitié (évictions LRU), puis lecture d'un journal chaud."""
+    budget = store.nbytes(views=True) * users // 2
+    cache = tenants.SharedCache(max_users=users, budget=budget)
+
+    def fill():
+        for i in range(users):
+            cache.put(f"user{i}", "local", {"version": None, "store": store, "contents": None, "checked": 0.0})
+        return cache
+
+    result = measure("tenant_cache_fill", fill, payload=lambda c: c.nbytes(), users=users, budget_bytes=budget)
+    result["evictions"] = cache.evictions
+    hot = f"user{users - 1}"
+    return [result, measure("tenant_cache_get", lambda: cache.get(hot, "local")["store"].frame(), best_ms=best_ms(lambda: cache.get(hot, "local")))]
+
+def wait_synced(repo: StandInRepo, writes_before: int) -> bool:
+    deadline = time.monotonic() + SYNC_TIMEOUT
+    while time.monotonic() < deadline:
+        if repo.writes > writes_before:
+            return True
+        time.sleep(0.02)
+    return False
+
+def bench_app(df: pd.DataFrame, users: int, latency: float, workdir: str) -> List[dict]:
+    """
+    app.py complet contre le faux dépôt : premier run (load_data à froid), rerun, enregistrement
+    (save_data, puis synchronisation en arrière-plan) et sessions supplémentaires.
+    """
+    import github
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    repo = StandInRepo({"data_2026.csv": storage.get_storage("csv").encode(df), "initialized.flag": "initialized"}, latency)
+    StandInGithub.repo = repo
+    real_github, github.Github = github.Github, StandInGithub
+    st.cache_resource.clear()  # caches process (données, writer, figures) : départ à froid
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        def session():
+            at = AppTest.from_file(os.path.join(workdir, "app.py"), default_timeout=600)
+            at.secrets["GITHUB_TOKEN"] = "bench"
+            at.secrets["REPO_NAME"] = "bench/journal"
+            at.session_state["tab"] = "📊 STATISTIQUES"  # onglet rendu à la demande : on mesure les graphiques
+            return at
+
+        def run(at):
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception)
+            return at
+
+        results = []
+        at = session()
+        results.append(measure("load_data", lambda: run(at), payload=lambda _: repo.bytes_read))
+        results[-1].update(network_calls=repo.calls, render_bytes=rendered_bytes(at))
+        repo.reset_counters()
+        results.append(measure("rerun", lambda: run(at), payload=rendered_bytes))
+        results[-1]["network_calls"] = repo.calls
+
+        repo.reset_counters()
+        save = next(b for b in at.button if "Enregistrer" in b.label)
+        save.click()
+        results.append(measure("save_data", lambda: run(at)))
+        t0 = time.perf_counter()
+        synced = wait_synced(repo, 0)
+        results.append({"phase": "sync", "wall_ms": round((time.perf_counter() - t0) * 1000, 3), "peak_kb": 0.0,
+                        "payload_bytes": repo.bytes_written, "synced": synced})
+
+        for i in range(1, users):
+            repo.reset_counters()
+            results.append(measure("session", lambda: run(session()), payload=rendered_bytes, user=i + 1))
+            results[-1]["network_calls"] = repo.calls
+        return results
+    finally:
+        os.chdir(cwd)
+        github.Github = real_github
+
+def clean_workdir(workdir: str):
+    # fichiers locaux laissés par un run (flag, backups...) : chaque scénario repart du même état
+    for name in os.listdir(workdir):
+        if not name.endswith(".py") and name != "__pycache__":
+            path = os.path.join(workdir, name)
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmarks(years: List[int], users: List[int], latency: float = 0.0, app: bool = True) -> dict:
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "latency_ms": latency * 1000,
+        "results": [],
+    }
+    workdir = tempfile.mkdtemp(prefix="blishko-bench-")
+    try:
+        # copie des modules : l'application écrit ses fichiers locaux dans le dossier de travail
+        for name in os.listdir(APP_DIR):
+            if name.endswith(".py"):
+                shutil.copy(os.path.join(APP_DIR, name), workdir)
+        # tour de chauffe non mesuré (imports Plotly / Streamlit) pour que la première taille ne le paie pas
+        warmup = make_journal(1)
+        bench_helpers(warmup)
+        if app:
+            bench_app(warmup, 1, 0.0, workdir)
+            clean_workdir(workdir)
+        for y in years:
+            df = make_journal(y)
+            base = {"years": y, "rows": len(df)}
+            for r in bench_helpers(df):
+                report["results"].append({**base, "users": 1, **r})
+            if not app:
+                continue
+            for u in users:
+                for r in bench_app(df, u, latency, workdir):
+                    report["results"].append({**base, "users": u, **r})
+                clean_workdir(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks Blishko's Mindset (chargement, sauvegarde, graphiques)")
+    parser.add_argument("--years", type=int, nargs="+", default=DEFAULT_YEARS, help="tailles de journal, en années")
+    parser.add_argument("--users", type=int, nargs="+", default=DEFAULT_USERS, help="nombre de sessions simultanées")
+    parser.add_argument("--latency", type=float, default=0.0, help="latence simulée par appel GitHub (ms)")
+    parser.add_argument("--no-app", action="store_true", help="ne mesure que les fonctions, sans exécuter app.py")
+    parser.add_argument("--out", help="fichier JSON de sortie (défaut : stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run_benchmarks(args.years, args.users, args.latency / 1000, app=not args.no_app)
+    for r in report["results"]:
+        if "budget_ms" in r and r["best_ms"] > r["budget_ms"]:
+            print(f"⚠️ {r['phase']} ({r.get('years')} an(s)) : {r['best_ms']:.1f} ms, budget {r['budget_ms']} ms", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"{len(report['results'])} mesure(s) écrite(s) dans {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# charts.py - Blishko's Mindset : construction des graphiques
+#
+# Au-delà de quelques centaines de points, le navigateur ne peut de toute façon pas tous
+# les afficher : les séries sont réduites côté serveur (LTTB pour les courbes, min/max
+# par tranche pour les barres) et les figures construites sont gardées en cache.
+# Sans dépendance à Streamlit (utilisable par bench.py).
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+import threading
+
+import tracing
+
+MAX_POINTS = 600  # points envoyés au navigateur par série, au plus
+WEBGL_THRESHOLD = 1000  # au-delà (série source), les traces passent en Scattergl
+FIGURE_CACHE_SIZE = 32
+MARKER_SIZE = 4  # taille des carrés sur les graphiques
+
+def _x_values(x) -> np.ndarray:
+    # dates -> jours (float) pour le calcul des aires
+    x = pd.Series(x)
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return x.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 86400e9
+    return x.to_numpy(dtype=float)
+
+def lttb_indices(x, y, n: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets : indices des n points qui préservent le mieux la forme de la courbe."""
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = _x_values(x)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)  # n-2 tranches entre le premier et le dernier point
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for b in range(n - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nlo, nhi = hi, (edges[b + 2] if b + 2 < n - 1 else size)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        out[b + 1] = a
+    return out
+
+def minmax_indices(y, n: int) -> np.ndarray:
+    """Minimum et maximum de chaque tranche : les pics (grosses dépenses, pertes) restent visibles."""
+    size = len(y)
+    if n >= size or n < 4:
+        return np.arange(size)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(0, size, (n - 2) // 2 + 1).astype(np.int64)
+    picks = [0, size - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            chunk = y[lo:hi]
+            picks += [lo + int(chunk.argmin()), lo + int(chunk.argmax())]
+    return np.unique(picks)
+
+def downsample(df: pd.DataFrame, x_col: str, y_col: str, method: str = "lttb", max_points: int = MAX_POINTS) -> pd.DataFrame:
+    # lignes retenues (toutes colonnes conservées, ex. moyenne mobile associée)
+    if len(df) <= max_points:
+        return df
+    if method == "minmax":
+        idx = minmax_indices(df[y_col], max_points)
+    else:
+        idx = lttb_indices(df[x_col], df[y_col], max_points)
+    return df.iloc[idx]
+
+def use_webgl(n: int) -> bool:
+    return n > WEBGL_THRESHOLD
+
+class FigureCache:
+    """LRU des figures construites, clé (version des données, série, plage de dates)."""
+
+    def __init__(self, size: int = FIGURE_CACHE_SIZE):
+        self.size = size
+        self._figures: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], Any]):
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                tracing.count("figure_cache.hit")
+                return self._figures[key]
+        fig = build()
+        tracing.count("figure_cache.miss")
+        with self._lock:
+            self.misses += 1
+            self._figures[key] = fig
+            while len(self._figures) > self.size:
+                self._figures.popitem(last=False)
+        return fig
+
+# ---------------------------
+# Figures
+# ---------------------------
+def line_chart_with_arrow(df: pd.DataFrame, x_col: str, y_col: str, title: str, color: str = "#0A84FF", target: Optional[float]=None):
+    # longues séries : réduites par LTTB et tracées en WebGL ; la flèche part des deux derniers points réels
+    with tracing.span("chart.line", series=y_col, rows=len(df)) as attrs:
+        fig = _line_chart_with_arrow(df, x_col, y_col, title, color, target)
+        attrs["points"] = len(fig.data[0].x)
+    return fig
+
+def _line_chart_with_arrow(df, x_col, y_col, title, color, target):
+    scatter = go.Scattergl if use_webgl(len(df)) else go.Scatter
+    points = downsample(df, x_col, y_col, "lttb")
+    fig = go.Figure()
+    fig.add_trace(scatter(x=points[x_col], y=points[y_col], mode='lines+markers', line=dict(color=color, width=3), marker=dict(size=MARKER_SIZE, symbol='square', color=color), name=title))
+    if len(df) >= 2:
+        x0 = df[x_col].iloc[-2]; y0 = df[y_col].iloc[-2]
+        x1 = df[x_col].iloc[-1]; y1 = df[y_col].iloc[-1]
+        fig.add_shape(type="line", x0=x0, y0=y0, x1=x1, y1=y1, line=dict(color="#FF453A", width=2))
+        fig.add_annotation(x=x1, y=y1, ax=x0, ay=y0, showarrow=True, arrowhead=3, arrowsize=1.2, arrowcolor="#FF453A", arrowwidth=2)
+    if target is not None:
+        fig.add_hline(y=target, line_dash="dash", line_color="#FF453A", annotation_text=f"Target: {target}", annotation_position="top right")
+    fig.update_layout(title=title, plot_bgcolor='#1C1C1E', paper_bgcolor='#000000', font=dict(color='#FFFFFF', family='-apple-system'), xaxis=dict(gridcolor='#2C2C2E'), yaxis=dict(gridcolor='#2C2C2E'), margin=dict(l=20,r=20,t=50,b=20))
+    return fig
+
+def bar_with_small_squares(df: pd.DataFrame, x_col: str, y_col: str, title: str, bar_color: str = "#FFD60A", square_color: str = "#FF453A", ma_col: Optional[str] = None):
+    # longues séries : min/max par tranche (les pics restent visibles), marqueurs et moyenne en WebGL
+    with tracing.span("chart.bar", series=y_col, rows=len(df)) as attrs:
+        fig = _bar_with_small_squares(df, x_col, y_col, title, bar_color, square_color, ma_col)
+        attrs["points"] = len(fig.data[0].x)
+    return fig
+
+def _bar_with_small_squares(df, x_col, y_col, title, bar_color, square_color, ma_col):
+    scatter = go.Scattergl if use_webgl(len(df)) else go.Scatter
+    points = downsample(df, x_col, y_col, "minmax")
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=points[x_col], y=points[y_col], name=title, marker=dict(color=bar_color)))
+    fig.add_trace(scatter(x=points[x_col], y=points[y_col], mode='markers', marker=dict(symbol='square', size=MARKER_SIZE, color=square_color), name='points'))
+    if ma_col is not None and ma_col in df.columns:
+        fig.add_trace(scatter(x=points[x_col], y=points[ma_col], mode='lines', line=dict(color='#FFFFFF', width=2, dash='dot'), name='Moyenne 7 j'))
+    fig.update_layout(title=title, plot_bgcolor='#1C1C1E', paper_bgcolor='#000000', font=dict(color='#FFFFFF', family='-apple-system'), xaxis=dict(gridcolor='#2C2C2E'), yaxis=dict(gridcolor='#2C2C2E'), margin=dict(l=20,r=20,t=50,b=20))
+    return fig
+
+def trend_chart(trend: pd.DataFrame, title: str):
+    # une barre par période (dépenses, gain net) et les moyennes XP / écran sur un second axe
+    with tracing.span("chart.trend", rows=len(trend)) as attrs:
+        fig = _trend_chart(trend, title)
+        attrs["points"] = len(trend)
+    return fig
+
+def _trend_chart(trend, title):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=trend["Date"], y=trend["Expenses"], name="Dépenses (€)", marker=dict(color="#FF453A")))
+    fig.add_trace(go.Bar(x=trend["Date"], y=trend["Net"], name="Gain net (€)", marker=dict(color="#0A84FF")))
+    fig.add_trace(go.Scatter(x=trend["Date"], y=trend["XP"], mode='lines+markers', name="XP moyen (%)", yaxis="y2", line=dict(color="#32D74B", width=3), marker=dict(size=MARKER_SIZE, symbol='square')))
+    fig.add_trace(go.Scatter(x=trend["Date"], y=trend["Phone"], mode='lines', name="Écran moyen (h)", yaxis="y2", line=dict(color="#FFD60A", width=2, dash='dot')))
+    fig.update_layout(title=title, barmode='group', plot_bgcolor='#1C1C1E', paper_bgcolor='#000000', font=dict(color='#FFFFFF', family='-apple-system'),
+                      xaxis=dict(gridcolor='#2C2C2E'), yaxis=dict(gridcolor='#2C2C2E', title="€"), yaxis2=dict(overlaying='y', side='right', showgrid=False),
+                      legend=dict(orientation='h', y=-0.15), margin=dict(l=20,r=20,t=50,b=20))
+    return fig
+
+def correlation_heatmap(corr: pd.DataFrame, labels: dict, columns: dict):
+    """Corrélations habitude / XP et habitude / écran : de -1 (rouge) à +1 (bleu)."""
+    with tracing.span("chart.correlations", rows=len(corr)):
+        fig = go.Figure(go.Heatmap(
+            z=corr.to_numpy(), x=[columns.get(c, c) for c in corr.columns], y=[labels.get(h, h) for h in corr.index],
+            zmin=-1, zmax=1, zmid=0, colorscale='RdBu', text=corr.round(2).to_numpy(), texttemplate="%{text}",
+            hovertemplate="%{y} / %{x} : %{z:.2f}<extra></extra>",
+        ))
+        fig.update_layout(title="Corrélations", plot_bgcolor='#1C1C1E', paper_bgcolor='#000000', font=dict(color='#FFFFFF', family='-apple-system'),
+                          yaxis=dict(autorange='reversed'), height=360, margin=dict(l=20,r=20,t=50,b=20))
+    return fig
+
+def flame_chart(spans: list, total_ms: float):
+    """Spans d'un rerun en barres horizontales : une ligne par profondeur, position = début, largeur = durée."""
+    spans = [s for s in spans if s.get("ms") is not None]
+    palette = ["#0A84FF", "#32D74B", "#FFD60A", "#FF9F0A", "#BF5AF2", "#FF453A", "#64D2FF"]
+    names = sorted({s["name"] for s in spans})
+    colors = {n: palette[i % len(palette)] for i, n in enumerate(names)}
+    fig = go.Figure(go.Bar(
+        orientation='h',
+        base=[s["start_ms"] for s in spans],
+        x=[max(s["ms"], 0.01) for s in spans],
+        y=[s["depth"] for s in spans],
+        text=[s["name"] for s in spans],
+        textposition='inside',
+        insidetextanchor='start',
+        marker=dict(color=[colors[s["name"]] for s in spans]),
+        hovertemplate="%{text}<br>%{x:.1f} ms<extra></extra>",
+    ))
+    depth = max((s["depth"] for s in spans), default=0)
+    fig.update_layout(title=f"Rerun : {total_ms:.0f} ms", plot_bgcolor='#1C1C1E', paper_bgcolor='#000000', font=dict(color='#FFFFFF', family='-apple-system', size=10),
+                      xaxis=dict(title="ms", gridcolor='#2C2C2E'), yaxis=dict(autorange='reversed', dtick=1, showticklabels=False),
+                      bargap=0.05, height=120 + 28 * (depth + 1), margin=dict(l=10, r=10, t=40, b=20), showlegend=False)
+    return fig
@@ -0,0 +1,150 @@
+# compact.py - Blishko's Mindset : représentation compacte du journal
+#
+# Une journée tient en 38 octets au lieu de ~130 (colonnes int64 / float64 / datetime64) :
+#   Day                                     int32   jours depuis le 1970-01-01
+#   Habits                                  uint8   les 7 habitudes, un bit chacune (School = bit 0)
+#   XP                                      uint8   score 0-100
+#   Phone, Weight, Stocks, Crypto, Expenses int32   centièmes (virgule fixe : pas d'erreur d'arrondi float)
+#   Twitch                                  uint32
+#   UpdatedAt                               int64   horodatage ms (fusion last-write-wins)
+# `pack` / `unpack` convertissent depuis / vers les colonnes habituelles (cols_list), que
+# les graphiques et le récapitulatif continuent d'utiliser. Le même encodage sert de format
+# de fichier (backend "compact" de storage.py).
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+import json
+import struct
+import zlib
+
+from storage import cols_list, ensure_columns
+
+HABIT_COLS = ["School", "Finance", "Prayer", "Reading", "Sport", "Hygiene", "Budget"]
+FIXED_COLS = ["Phone", "Weight", "Stocks", "Crypto", "Expenses"]
+SCALE = 100  # virgule fixe : centièmes
+PHONE_GOAL = 3.0  # heures d'écran au plus : compte comme une habitude dans le score XP
+
+COMPACT_SCHEMA = {
+    "Day": "int32",
+    "Habits": "uint8",
+    "XP": "uint8",
+    **{c: "int32" for c in FIXED_COLS},
+    "Twitch": "uint32",
+    "UpdatedAt": "int64",
+}
+BYTES_PER_ROW = sum(np.dtype(t).itemsize for t in COMPACT_SCHEMA.values())
+
+MAGIC = b"BLSK1\n"
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_EPOCH = pd.Timestamp("1970-01-01")
+
+# ---------------------------
+# Score
+# ---------------------------
+def popcount(bits) -> np.ndarray:
+    return _POPCOUNT[np.asarray(bits, dtype=np.uint8)]
+
+def xp_score(habits, phone) -> np.ndarray:
+    """Score XP (%) vectorisé depuis le bitmask des habitudes et les heures d'écran."""
+    done = popcount(habits).astype(np.int64) + (np.asarray(phone, dtype=float) <= PHONE_GOAL)
+    return done * 100 // (len(HABIT_COLS) + 1)
+
+def habit_bits(values: Dict[str, object]) -> int:
+    # habitudes cochées (valeurs non nulles) -> bitmask
+    bits = 0
+    for k, c in enumerate(HABIT_COLS):
+        if values.get(c):
+            bits |= 1 << k
+    return bits
+
+# ---------------------------
+# Colonnes
+# ---------------------------
+def _numbers(s: pd.Series) -> np.ndarray:
+    return pd.to_numeric(s, errors="coerce").fillna(0).to_numpy(dtype=float)
+
+def pack(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Colonnes habituelles -> colonnes compactes (COMPACT_SCHEMA). Les lignes sans date valide sont écartées."""
+    df = ensure_columns(df.copy()).dropna(subset=["Date"])
+    cols = {"Day": df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int32)}
+    bits = np.zeros(len(df), dtype=np.int64)
+    for k, c in enumerate(HABIT_COLS):
+        bits |= (_numbers(df[c]) != 0).astype(np.int64) << k
+    cols["Habits"] = bits.astype(np.uint8)
+    cols["XP"] = np.clip(_numbers(df["XP"]), 0, 255).astype(np.uint8)
+    for c in FIXED_COLS:
+        cols[c] = np.round(_numbers(df[c]) * SCALE).astype(np.int32)
+    cols["Twitch"] = np.clip(_numbers(df["Twitch"]), 0, None).astype(np.uint32)
+    cols["UpdatedAt"] = pd.to_numeric(df["UpdatedAt"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    return cols
+
+def column(cols: Dict[str, np.ndarray], name: str) -> np.ndarray:
+    """Une colonne habituelle (nom et type de storage.SCHEMA) calculée depuis les colonnes compactes."""
+    if name == "Date":
+        return cols["Day"].astype("datetime64[D]").astype("datetime64[ns]")
+    if name in HABIT_COLS:
+        return ((cols["Habits"] >> HABIT_COLS.index(name)) & 1).astype(np.int64)
+    if name in FIXED_COLS:
+        return cols[name] / SCALE
+    return cols[name].astype(np.int64)
+
+def unpack(cols: Dict[str, np.ndarray], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    return pd.DataFrame({c: column(cols, c) for c in columns or cols_list()}, copy=False)
+
+def day_number(date) -> int:
+    return (pd.Timestamp(date).normalize() - _EPOCH).days
+
+def pack_row(row: dict) -> dict:
+    # version scalaire de `pack` (upsert d'une journée) ; `row` contient déjà des nombres
+    values = {"Day": day_number(row["Date"]), "Habits": habit_bits(row), "XP": min(max(int(row.get("XP", 0)), 0), 255),
+              "Twitch": max(int(row.get("Twitch", 0)), 0), "UpdatedAt": int(row.get("UpdatedAt", 0))}
+    values.update({c: int(round(float(row.get(c, 0)) * SCALE)) for c in FIXED_COLS})
+    return values
+
+def unpack_row(cols: Dict[str, np.ndarray], i: int) -> dict:
+    bits = int(cols["Habits"][i])
+    row = {"Date": _EPOCH + pd.Timedelta(days=int(cols["Day"][i]))}
+    for c in cols_list()[1:]:
+        if c in HABIT_COLS:
+            row[c] = (bits >> HABIT_COLS.index(c)) & 1
+        elif c in FIXED_COLS:
+            row[c] = int(cols[c][i]) / SCALE
+        else:
+            row[c] = int(cols[c][i])
+    return row
+
+def nbytes(cols: Dict[str, np.ndarray]) -> int:
+    return sum(arr.nbytes for arr in cols.values())
+
+# ---------------------------
+# Format de fichier
+# ---------------------------
+def encode(df: pd.DataFrame) -> bytes:
+    """
+    MAGIC, longueur (uint32) et en-tête JSON (lignes, colonnes et types), puis les colonnes
+    compactes bout à bout en little-endian, compressées par zlib.
+    """
+    cols = pack(df)
+    header = json.dumps({"rows": len(cols["Day"]), "columns": [[c, t] for c, t in COMPACT_SCHEMA.items()]}).encode("utf-8")
+    body = b"".join(cols[c].astype(np.dtype(t).newbyteorder("<")).tobytes() for c, t in COMPACT_SCHEMA.items())
+    return MAGIC + struct.pack("<I", len(header)) + header + zlib.compress(body)
+
+def decode_columns(raw: bytes) -> Dict[str, np.ndarray]:
+    if not raw.startswith(MAGIC):
+        raise ValueError("fichier compact invalide (en-tête)")
+    offset = len(MAGIC)
+    (size,) = struct.unpack_from("<I", raw, offset)
+    header = json.loads(raw[offset + 4:offset + 4 + size].decode("utf-8"))
+    body = zlib.decompress(raw[offset + 4 + size:])
+    n, pos, cols = header["rows"], 0, {}
+    for c, t in header["columns"]:
+        dtype = np.dtype(t).newbyteorder("<")
+        cols[c] = np.frombuffer(body, dtype=dtype, count=n, offset=pos).astype(t)
+        pos += n * dtype.itemsize
+    for c, t in COMPACT_SCHEMA.items():
+        if c not in cols:  # colonne ajoutée depuis l'écriture du fichier
+            cols[c] = np.zeros(n, dtype=t)
+    return cols
+
+def decode(raw: bytes) -> pd.DataFrame:
+    return unpack(decode_columns(raw))
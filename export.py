@@ -0,0 +1,381 @@
+# export.py - Blishko's Mindset : export en lecture seule des statistiques
+# Usage : python export.py build [--user CLÉ] | python export.py serve [--port 8502] [--host 127.0.0.1] [--users]
+#
+# Les KPI de l'onglet Statistiques, les agrégats (séries d'habitudes, tendances, corrélations)
+# et les données des graphiques (mêmes réductions que l'app) sont publiés dans `export/` :
+# stats.json (versionné : "schema" et "version" = empreinte du contenu) et index.html
+# (instantané statique, graphiques SVG, sans JavaScript). L'app les régénère après chaque
+# enregistrement, en arrière-plan ; un contenu identique n'est pas réécrit.
+# `serve` les sert avec un ETag : un lecteur dont la copie est à jour (If-None-Match)
+# reçoit un 304 sans corps. Aucune session Streamlit n'est ouverte par les lecteurs.
+# Les exports d'utilisateurs (users/<clé>/export/) ne sont servis qu'avec `serve --users`,
+# derrière le proxy d'authentification : chacun ne lit que le sien (en-tête BLISHKO_USER_HEADER).
+import numpy as np
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import threading
+import time
+
+import analytics
+import storage
+import tracing
+from charts import downsample
+from summary import Summary, add_rolling, rolling_col
+
+logger = logging.getLogger("blishko")
+
+EXPORT_DIR = "export"
+JSON_NAME = "stats.json"
+HTML_NAME = "index.html"
+SCHEMA = 1  # incrémenté quand la forme de stats.json change
+BAR_SERIES = {"Stocks": "Bourse", "Crypto": "Crypto", "Expenses": "Dépenses"}
+CONTENT_TYPES = {JSON_NAME: "application/json; charset=utf-8", HTML_NAME: "text/html; charset=utf-8"}
+
+# ---------------------------
+# Contenu
+# ---------------------------
+def _number(v, digits: int = 2):
+    # JSON : NaN / inf -> null, types NumPy -> types Python
+    v = float(v)
+    return round(v, digits) if np.isfinite(v) else None
+
+def _numbers(values, digits: int = 2) -> list:
+    # version colonne de `_number`
+    arr = np.round(np.asarray(values, dtype=float), digits)
+    out = arr.astype(object)
+    out[~np.isfinite(arr)] = None
+    return out.tolist()
+
+def _column(s: pd.Series) -> list:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.dt.strftime("%Y-%m-%d").tolist()
+    if pd.api.types.is_integer_dtype(s):
+        return s.astype("int64").tolist()
+    return _numbers(s)
+
+def _records(df: pd.DataFrame) -> List[dict]:
+    cols = {c: _column(df[c]) for c in df.columns}
+    return [dict(zip(cols, values)) for values in zip(*cols.values())]
+
+def _series(df: pd.DataFrame, col: str, method: str) -> dict:
+    points = downsample(df, "Date", col, method)
+    series = {"x": _column(points["Date"]), "y": _numbers(points[col])}
+    if rolling_col(col) in points.columns:
+        series["ma7"] = _numbers(points[rolling_col(col)])
+    return series
+
+def build(df: pd.DataFrame, invested: Tuple[float, float] = (0.0, 0.0), summary: Optional[Summary] = None) -> dict:
+    """Contenu de stats.json pour tout l'historique `df` (trié par Date). `version` ne dépend que du contenu."""
+    with tracing.span("export.build", rows=len(df)):
+        df = df if rolling_col("Stocks") in df.columns else add_rolling(df)
+        summary = summary or Summary.from_frame(df)
+        results = analytics.compute(df)
+        roi = summary.roi(sum(invested))
+        weights = df[df["Weight"] > 0]
+        payload = {
+            "schema": SCHEMA,
+            "range": {"first": df["Date"].min().strftime("%Y-%m-%d") if len(df) else None,
+                      "last": df["Date"].max().strftime("%Y-%m-%d") if len(df) else None, "days": int(len(df))},
+            "kpis": {"xp_mean": _number(summary.mean("XP")), "phone_mean": _number(summary.mean("Phone")),
+                     "net_gain": _number(summary.net_gain), "expenses_total": _number(summary.total("Expenses")),
+                     "invested_stocks": _number(invested[0]), "invested_crypto": _number(invested[1]),
+                     "roi_pct": _number(roi) if roi is not None else None},
+            "streaks": {h: {k: int(v) for k, v in row.items()} for h, row in results["streaks"].to_dict("index").items()},
+            "correlations": {h: {k: _number(v) for k, v in row.items()} for h, row in results["correlations"].to_dict("index").items()},
+            "weekly": _records(results["weekly"]),
+            "monthly": _records(results["monthly"]),
+            "series": {col: _series(df, col, "minmax") for col in BAR_SERIES},
+        }
+        payload["series"]["Weight"] = _series(weights, "Weight", "lttb")
+        payload["version"] = content_version(payload)
+        return payload
+
+def content_version(payload: dict) -> str:
+    body = {k: v for k, v in payload.items() if k not in ("version", "generated_at")}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+# ---------------------------
+# Instantané HTML
+# ---------------------------
+SVG_W, SVG_H = 640, 160
+
+def _scale(values: List[Optional[float]]) -> Tuple[np.ndarray, float, float]:
+    y = np.array([np.nan if v is None else v for v in values], dtype=float)
+    lo, hi = (np.nanmin(y), np.nanmax(y)) if np.isfinite(y).any() else (0.0, 1.0)
+    lo, hi = min(lo, 0.0), max(hi, 0.0)
+    return y, lo, (hi - lo) or 1.0
+
+def svg_bars(values: List[Optional[float]], color: str) -> str:
+    y, lo, span = _scale(values)
+    width = SVG_W / max(len(y), 1)
+    zero = SVG_H - (0 - lo) / span * SVG_H
+    bars = []
+    for i, v in enumerate(np.nan_to_num(y)):
+        top = SVG_H - (v - lo) / span * SVG_H
+        bars.append(f"<rect x='{i * width:.1f}' y='{min(top, zero):.1f}' width='{max(width - 0.5, 0.5):.1f}' height='{abs(zero - top):.1f}' fill='{color}'/>")
+    return f"<svg viewBox='0 0 {SVG_W} {SVG_H}' preserveAspectRatio='none'>{''.join(bars)}</svg>"
+
+def svg_line(values: List[Optional[float]], color: str) -> str:
+    y = np.array([np.nan if v is None else v for v in values], dtype=float)
+    if not np.isfinite(y).any():
+        return ""
+    lo, hi = np.nanmin(y), np.nanmax(y)
+    span = (hi - lo) or 1.0
+    step = SVG_W / max(len(y) - 1, 1)
+    points = " ".join(f"{i * step:.1f},{SVG_H - (v - lo) / span * (SVG_H - 8) - 4:.1f}" for i, v in enumerate(y) if np.isfinite(v))
+    return f"<svg viewBox='0 0 {SVG_W} {SVG_H}' preserveAspectRatio='none'><polyline points='{points}' fill='none' stroke='{color}' stroke-width='2'/></svg>"
+
+def render_html(payload: dict, labels: Optional[Dict[str, str]] = None) -> str:
+    labels = labels or {}
+    k = payload["kpis"]
+    fmt = lambda v, unit="": "—" if v is None else f"{v:.2f}{unit}"
+    cards = [(f"{k['xp_mean']:.0f}%" if k["xp_mean"] is not None else "—", "XP moyen"), (fmt(k["phone_mean"], "h"), "Écran moyen"),
+             (fmt(k["net_gain"], "€"), "Gain net depuis le début"), (fmt(k["expenses_total"], "€"), "Dépenses totales"), (fmt(k["roi_pct"], "%"), "ROI simple")]
+    parts = ["<div class='cards'>" + "".join(f"<div class='card'><b>{html.escape(v)}</b><span>{html.escape(t)}</span></div>" for v, t in cards) + "</div>"]
+    colors = {"Stocks": "#0A84FF", "Crypto": "#BF5AF2", "Expenses": "#FF453A"}
+    for col, title in BAR_SERIES.items():
+        parts.append(f"<h2>{html.escape(title)}</h2>" + svg_bars(payload["series"][col]["y"], colors[col]))
+    if payload["series"]["Weight"]["y"]:
+        parts.append("<h2>Poids (kg)</h2>" + svg_line(payload["series"]["Weight"]["y"], "#32D74B"))
+    rows = "".join(f"<tr><td>{html.escape(labels.get(h, h))}</td><td>{s['current']}</td><td>{s['longest']}</td></tr>" for h, s in payload["streaks"].items())
+    parts.append(f"<h2>Séries d'habitudes</h2><table><tr><th></th><th>En cours (j)</th><th>Record (j)</th></tr>{rows}</table>")
+    months = "".join(f"<tr><td>{m['Date'][:7]}</td><td>{fmt(m['XP'], '%')}</td><td>{fmt(m['Phone'], 'h')}</td><td>{fmt(m['Expenses'], '€')}</td><td>{fmt(m['Net'], '€')}</td></tr>"
+                     for m in reversed(payload["monthly"][-12:]))
+    parts.append(f"<h2>12 derniers mois</h2><table><tr><th></th><th>XP</th><th>Écran</th><th>Dépenses</th><th>Gain net</th></tr>{months}</table>")
+    span = payload["range"]
+    return f"""<!doctype html>
+<html lang="fr"><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Blishko’s Mindset — Statistiques</title>
+<style>
+body {{ background:#000; color:#fff; font-family:-apple-system, sans-serif; max-width:720px; margin:auto; padding:16px; }}
+.cards {{ display:flex; flex-wrap:wrap; gap:8px; }} .card {{ flex:1; min-width:120px; background:#1C1C1E; border-radius:12px; padding:8px; text-align:center; }}
+.card b {{ display:block; font-size:24px; }} .card span, small {{ color:#8E8E93; }}
+svg {{ width:100%; height:{SVG_H}px; background:#1C1C1E; border-radius:8px; }}
+table {{ width:100%; border-collapse:collapse; }} td, th {{ padding:4px; border-bottom:1px solid #2C2C2E; text-align:right; }} td:first-child {{ text-align:left; }}
+</style></head><body>
+<h1>Blishko’s Mindset</h1>
+<small>{span['days']} journée(s), {span['first'] or '—'} → {span['last'] or '—'} · version {payload['version']} · générée le {html.escape(payload.get('generated_at', ''))}</small>
+{''.join(parts)}
+</body></html>
+"""
+
+# ---------------------------
+# Publication
+# ---------------------------
+def _write(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def published_version(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, JSON_NAME), "r", encoding="utf-8") as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+def publish(root: str, payload: dict, labels: Optional[Dict[str, str]] = None) -> bool:
+    """Écrit stats.json et index.html dans `root` ; False (rien d'écrit) si la version publiée est déjà celle-ci."""
+    if published_version(root) == payload["version"]:
+        return False
+    payload = dict(payload, generated_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    os.makedirs(root, exist_ok=True)
+    # HTML d'abord : un lecteur qui voit la nouvelle version JSON trouve déjà l'instantané à jour
+    _write(os.path.join(root, HTML_NAME), render_html(payload, labels).encode("utf-8"))
+    _write(os.path.join(root, JSON_NAME), json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    logger.info("Export %s : version %s", root, payload["version"])
+    return True
+
+class Publisher:
+    """
+    Thread de fond qui régénère l'export : `submit` rend la main immédiatement ; seule la
+    dernière demande par dossier est traitée (plusieurs enregistrements rapprochés -> un export).
+    `load()` -> (historique complet, Summary ou None) s'exécute dans ce thread : le
+    chargement de tout l'historique ne pèse pas sur l'enregistrement.
+    """
+
+    def __init__(self, labels: Optional[Dict[str, str]] = None):
+        self.labels = labels
+        self._pending: Dict[str, tuple] = {}
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="blishko-export", daemon=True)
+        self._thread.start()
+
+    def submit(self, root: str, load: Callable[[], Tuple[pd.DataFrame, Optional[Summary]]], invested: Tuple[float, float]):
+        with self._cond:
+            self._pending[root] = (load, invested)
+            self._cond.notify()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                root = next(iter(self._pending))
+                load, invested = self._pending.pop(root)
+                self._busy = True
+            try:
+                with tracing.run("export"):
+                    with tracing.span("export.load"):
+                        df, summary = load()
+                    publish(root, build(df, invested, summary), self.labels)
+            except Exception as e:
+                logger.warning("Export %s échoué: %s", root, e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+# ---------------------------
+# Serveur (ETag / If-None-Match)
+# ---------------------------
+class ExportFiles:
+    """Fichiers publiés gardés en mémoire avec leur ETag ; relus seulement quand ils changent sur disque."""
+
+    def __init__(self, base: str = "."):
+        self.base = base
+        self._files: Dict[str, tuple] = {}  # chemin -> ((mtime, taille), octets, etag)
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[Tuple[bytes, str]]:
+        full = os.path.join(self.base, path)
+        try:
+            st_ = os.stat(full)
+        except OSError:
+            return None
+        version = (st_.st_mtime_ns, st_.st_size)
+        with self._lock:
+            cached = self._files.get(path)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+        with open(full, "rb") as f:
+            data = f.read()
+        etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+        with self._lock:
+            self._files[path] = (version, data, etag)
+        return data, etag
+
+def resolve(url_path: str, user: Optional[str] = None) -> Optional[str]:
+    """
+    URL -> fichier publié : `/` et `/stats.json` (mono-utilisateur), `/<clé>/` et
+    `/<clé>/stats.json` (users/<clé>/export/) pour le seul utilisateur authentifié `user`.
+    Tout le reste : None (404, y compris l'export d'un autre utilisateur).
+    """
+    import tenants  # validation des clés d'utilisateur
+    parts = [p for p in url_path.split("?", 1)[0].split("/") if p]
+    name = HTML_NAME
+    if parts and parts[-1] in CONTENT_TYPES:
+        name = parts.pop()
+    if len(parts) > 1:
+        return None
+    if not parts:
+        return tenants.Tenant().path(f"{EXPORT_DIR}/{name}")
+    try:
+        key = tenants.user_key(parts[0])
+    except ValueError:
+        return None
+    if user is None or key != user:
+        return None
+    return tenants.Tenant(key).path(f"{EXPORT_DIR}/{name}")
+
+def request_user(headers, users: bool) -> Optional[str]:
+    # utilisateur authentifié par le proxy (en-tête BLISHKO_USER_HEADER) ; None sans `--users`
+    import tenants
+    if not users:
+        return None
+    try:
+        return tenants.user_from_headers(headers)
+    except ValueError:
+        return None
+
+def make_handler(files: ExportFiles, users: bool = False):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._serve(body=True)
+
+        def do_HEAD(self):
+            self._serve(body=False)
+
+        def _serve(self, body: bool):
+            path = resolve(self.path, request_user(self.headers, users))
+            found = files.get(path) if path else None
+            if found is None:
+                self.send_error(404, "Export introuvable")
+                return
+            data, etag = found
+            tags = [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+            if etag in tags or "*" in tags:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPES[os.path.basename(path)])
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")  # toujours revalider : 304 tant que rien n'a changé
+            self.end_headers()
+            if body:
+                self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            logger.debug("export %s", fmt % args)
+    return Handler
+
+def serve(host: str = "127.0.0.1", port: int = 8502, base: str = ".", users: bool = False):
+    server = ThreadingHTTPServer((host, port), make_handler(ExportFiles(base), users))
+    print(f"Export servi sur http://{host}:{port}/")
+    server.serve_forever()
+
+def build_local(user: Optional[str] = None) -> Tuple[str, bool]:
+    # export régénéré depuis les fichiers locaux (après un import en masse, sans lancer l'app)
+    import tenants
+    tenant = tenants.Tenant(tenants.user_key(user) if user else tenants.DEFAULT_USER)
+    if user or storage.layout() == "partitioned":
+        df = tenant.partitions().read()
+    else:
+        df = storage.read_with_journal(tenant.backend, tenant.data_filename)
+    df = storage.latest_rows(storage.typed(df))
+    root = tenant.path(EXPORT_DIR)
+    return root, publish(root, build(df))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export en lecture seule des statistiques Blishko's Mindset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="régénère export/ depuis les données locales")
+    p_build.add_argument("--user", help="utilisateur du mode multi-utilisateur (users/<clé>/)")
+    p_serve = sub.add_parser("serve", help="sert les exports (ETag, 304 si inchangés)")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8502)
+    p_serve.add_argument("--users", action="store_true",
+                         help="sert aussi users/<clé>/export/, à l'utilisateur nommé par l'en-tête du proxy d'authentification")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "build":
+        root, written = build_local(args.user)
+        print(f"Export {'écrit' if written else 'déjà à jour'} dans {root}")
+    else:
+        serve(args.host, args.port, users=args.users)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# ingest.py - Blishko's Mindset : import en masse de journées, sans navigateur
+# Usage : python ingest.py journees.csv [export.jsonl ...] [--keep-xp] [--sync] [--user CLÉ] [--dry-run]
+#
+# Lit des journées en CSV ou JSONL (rattrapage, export d'une autre application), calcule le
+# score XP de toutes les lignes en une passe vectorisée (même règle que le formulaire :
+# habitudes cochées + écran ≤ 3 h) puis les fusionne dans les fichiers de données locaux
+# par le même chemin que l'app (backend BLISHKO_STORAGE_BACKEND, disposition
+# BLISHKO_STORAGE_LAYOUT). `--sync` les met aussi dans la file d'attente GitHub, poussée
+# au prochain lancement de l'app. `--user` vise le journal d'un utilisateur du mode
+# multi-utilisateur (users/<clé>/, disposition partitionnée).
+# N'importe que pandas et la couche de stockage (ni Streamlit, ni Plotly, ni PyGithub).
+import pandas as pd
+from typing import List, Optional
+import argparse
+import json
+import logging
+import os
+import time
+
+import compact
+import storage
+from storage import typed, latest_rows, reconcile, read_with_journal, journal_path, journal_record
+
+logger = logging.getLogger("blishko")
+
+TRUE_WORDS = {"1", "true", "vrai", "yes", "oui", "x", "y", "o"}
+JSONL_EXTS = (".jsonl", ".ndjson", ".json")
+
+def read_days(path: str) -> pd.DataFrame:
+    """Journées brutes d'un fichier CSV ou JSONL (une journée par ligne)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return pd.read_csv(path)
+    if ext in JSONL_EXTS:
+        return pd.read_json(path, lines=True, convert_dates=False)
+    raise ValueError(f"Format non reconnu : {path} (CSV ou JSONL)")
+
+def _flags(s: pd.Series) -> pd.Series:
+    # habitude cochée : nombre non nul, booléen ou mot (« oui », « x », « true »...)
+    numbers = pd.to_numeric(s, errors="coerce").fillna(0) != 0
+    words = s.astype(str).str.strip().str.lower().isin(TRUE_WORDS)
+    return (numbers | words).astype("int64")
+
+def prepare(raw: pd.DataFrame, keep_xp: bool = False, at: Optional[int] = None) -> pd.DataFrame:
+    """
+    Journées typées prêtes à fusionner : une ligne par Date (la dernière du fichier),
+    XP recalculé pour toutes les lignes (ou conservé là où il est fourni avec `keep_xp`),
+    UpdatedAt = maintenant (l'import l'emporte sur les versions existantes).
+    """
+    raw = raw.copy()
+    if "Date" in raw.columns:
+        # lignes sans date valide écartées avant `typed` (qui renumérote) : XP fourni et lignes restent alignés
+        raw = raw[pd.to_datetime(raw["Date"], errors="coerce").notna()].reset_index(drop=True)
+    for c in compact.HABIT_COLS:
+        if c in raw.columns:
+            raw[c] = _flags(raw[c])
+    df = typed(raw)
+    xp = pd.Series(compact.xp_score(compact.pack(df)["Habits"], df["Phone"].to_numpy()), index=df.index)
+    if keep_xp and "XP" in raw.columns:
+        xp = pd.to_numeric(raw["XP"], errors="coerce").fillna(xp)
+    df["XP"] = xp.astype("int64")
+    df["UpdatedAt"] = at if at is not None else storage.stamp()
+    return latest_rows(df)
+
+def ingest(df: pd.DataFrame, backend: Optional[storage.Storage] = None, layout: Optional[str] = None, queue: bool = False,
+           user: Optional[str] = None) -> str:
+    """Fusionne les journées dans les données locales (celles de `user` en multi-utilisateur) ; renvoie le chemin écrit."""
+    backend = backend or storage.get_storage()
+    layout = layout or storage.layout()
+    rows = df.to_dict("records")
+    tenant = None
+    if user is not None:
+        import tenants  # mêmes chemins que l'app en mode multi-utilisateur
+        tenant = tenants.Tenant(tenants.user_key(user), backend)
+        tenant.prepare()
+        layout = "partitioned"
+    if queue:
+        import sync  # file d'attente GitHub de l'app, chargée seulement avec --sync
+        sync.Outbox(tenant.outbox_path if tenant else sync.OUTBOX_FILENAME).add([json.loads(journal_record(r)) for r in rows])
+    if layout == "partitioned":
+        parts = tenant.partitions() if tenant else storage.Partitions(backend)
+        parts.upsert(rows)
+        return parts.manifest_path
+    path = backend.path_for(storage.DATA_STEM)
+    if backend.row_upsert:
+        backend.upsert(path, rows)
+        return path
+    # réécriture complète (compaction) : le journal de deltas est intégré puis supprimé
+    backend.write(path, reconcile(read_with_journal(backend, path), df))
+    if os.path.exists(journal_path(path)):
+        os.remove(journal_path(path))
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import en masse de journées (CSV / JSONL) dans le journal Blishko's Mindset")
+    parser.add_argument("paths", nargs="+", help="fichiers CSV ou JSONL (une journée par ligne, colonnes de cols_list())")
+    parser.add_argument("--keep-xp", action="store_true", help="conserve la colonne XP quand elle est fournie")
+    parser.add_argument("--sync", action="store_true", help="ajoute aussi les journées à la file d'attente GitHub (pending_sync.jsonl)")
+    parser.add_argument("--user", help="journal d'un utilisateur du mode multi-utilisateur (users/<clé>/)")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), help="format des données (défaut : BLISHKO_STORAGE_BACKEND)")
+    parser.add_argument("--dry-run", action="store_true", help="affiche les journées préparées sans rien écrire")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    t0 = time.perf_counter()
+    frames: List[pd.DataFrame] = [read_days(p) for p in args.paths]
+    df = prepare(pd.concat(frames, ignore_index=True), keep_xp=args.keep_xp)
+    if df.empty:
+        print("Aucune journée valide à importer.")
+        return
+    span = f"{df['Date'].min():%Y-%m-%d} → {df['Date'].max():%Y-%m-%d}"
+    if args.dry_run:
+        print(df.to_csv(index=False, date_format="%Y-%m-%d"), end="")
+        print(f"{len(df)} journée(s) préparée(s) ({span}), rien n'a été écrit.")
+        return
+    target = ingest(df, storage.get_storage(args.backend), queue=args.sync, user=args.user)
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(f"{len(df)} journée(s) importée(s) ({span}) dans {target} en {elapsed:.0f} ms"
+          + (" ; en attente d'envoi vers GitHub" if args.sync else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# snapshots.py - Blishko's Mindset : snapshots dédupliqués du journal
+# Usage : python snapshots.py list
+#         python snapshots.py import [data_2026_backup_*.csv]
+#         python snapshots.py restore <id> [--from AAAA-MM-JJ] [--to AAAA-MM-JJ] [--out fichier.csv]
+#
+# Un snapshot = une liste de blocs mensuels compressés (gzip), chacun stocké sous le hash
+# de son contenu : un mois inchangé depuis le snapshot précédent n'est jamais réécrit.
+# `snapshots/index.json` décrit chaque snapshot (date, lignes, première / dernière journée,
+# blocs par mois) ; une restauration ne lit que les blocs de la période demandée.
+import pandas as pd
+from typing import Optional, List, Union
+from datetime import datetime
+from io import BytesIO
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+
+from storage import typed, storage_for_path, ensure_columns, make_empty_df
+
+logger = logging.getLogger("blishko")
+
+SNAPSHOT_ROOT = "snapshots"
+HASH_LENGTH = 24  # caractères hexadécimaux (sha256 tronqué) dans le nom des blocs
+LEGACY_PATTERN = "data_2026_backup_*.csv"
+LEGACY_TIMESTAMP = re.compile(r"(\d{8}_\d{6})")
+
+class LocalFiles:
+    """Accès fichiers pour les snapshots : disque local (écriture atomique)."""
+
+    def __init__(self, base: str = "."):
+        self.base = base
+
+    def read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.base, path), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def write(self, path: str, data: bytes, message: str = "", on_done=None, on_failed=None):
+        # écriture synchrone : une erreur est levée (pas d'`on_failed`), `on_done()` appelé une fois le fichier en place
+        full = os.path.join(self.base, path)
+        os.makedirs(os.path.dirname(full) or ".", exist_ok=True)
+        tmp = full + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, full)
+        if on_done:
+            on_done()
+
+def encode_chunk(df: pd.DataFrame) -> bytes:
+    # forme canonique (typée, triée, dates AAAA-MM-JJ) : même contenu -> mêmes octets -> même hash
+    df = typed(df).sort_values("Date", kind="stable")
+    return df.to_csv(index=False, date_format="%Y-%m-%d").encode("utf-8")
+
+def decode_chunk(data: bytes) -> pd.DataFrame:
+    return typed(pd.read_csv(BytesIO(gzip.decompress(data))))
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()[:HASH_LENGTH]
+
+class Snapshots:
+    """
+    Snapshots du journal, blocs mensuels adressés par contenu.
+
+    - `create(df, label)` : n'écrit que les blocs absents de l'index ; l'index n'est écrit
+      (et le snapshot listé) qu'une fois tous ces blocs confirmés.
+    - `list_snapshots()` : du plus ancien au plus récent, sans lire les blocs.
+    - `restore(snapshot, start, end)` : reconstruit la période demandée à partir des seuls
+      blocs qui la recoupent.
+    `files` fournit `read(path)` / `write(path, data, message, on_done, on_failed)` (LocalFiles,
+    GitHub côté app.py, où les écritures peuvent être différées).
+    """
+
+    def __init__(self, files=None, root: str = SNAPSHOT_ROOT):
+        self.files = files or LocalFiles()
+        self.root = root
+        self.index_path = f"{root}/index.json"
+        self._index: Optional[dict] = None
+
+    def chunk_path(self, digest: str) -> str:
+        return f"{self.root}/chunks/{digest}.csv.gz"
+
+    @staticmethod
+    def empty_index() -> dict:
+        return {"snapshots": [], "chunks": {}}
+
+    def index(self) -> dict:
+        if self._index is None:
+            raw = self.files.read(self.index_path)
+            self._index = json.loads(raw.decode("utf-8")) if raw else self.empty_index()
+        return self._index
+
+    def reload(self):
+        self._index = None
+
+    def list_snapshots(self) -> List[dict]:
+        return [{k: v for k, v in s.items() if k != "months"} for s in self.index()["snapshots"]]
+
+    def get(self, snapshot: Union[str, dict]) -> dict:
+        snapshot_id = snapshot["id"] if isinstance(snapshot, dict) else snapshot
+        for s in self.index()["snapshots"]:
+            if s["id"] == snapshot_id:
+                return s
+        raise KeyError(f"snapshot inconnu : {snapshot_id}")
+
+    def latest(self) -> Optional[dict]:
+        snaps = self.index()["snapshots"]
+        return snaps[-1] if snaps else None
+
+    def create(self, df: pd.DataFrame, label: str = "", at: Optional[datetime] = None) -> Optional[dict]:
+        df = typed(df).drop_duplicates("Date", keep="last")
+        if df.empty:
+            return None
+        at = at or datetime.now()
+        index = self.index()
+        months, chunks, blobs = {}, {}, {}
+        for key, part in df.groupby(df["Date"].dt.strftime("%Y-%m")):
+            raw = encode_chunk(part)
+            digest = content_hash(raw)
+            if digest not in index["chunks"] and digest not in chunks:
+                blobs[digest] = (key, gzip.compress(raw, mtime=0))
+                chunks[digest] = {"bytes": len(blobs[digest][1]), "raw_bytes": len(raw)}
+            months[key] = {"hash": digest, "rows": int(len(part)),
+                           "first": part["Date"].min().strftime("%Y-%m-%d"), "last": part["Date"].max().strftime("%Y-%m-%d")}
+        snapshot_id = at.strftime("%Y%m%d_%H%M%S")
+        taken = {s["id"] for s in index["snapshots"]}
+        suffix = 1
+        while snapshot_id in taken:
+            suffix += 1
+            snapshot_id = f"{at.strftime('%Y%m%d_%H%M%S')}_{suffix}"
+        snap = {"id": snapshot_id, "at": at.isoformat(timespec="seconds"), "label": label, "rows": int(len(df)),
+                "first": df["Date"].min().strftime("%Y-%m-%d"), "last": df["Date"].max().strftime("%Y-%m-%d"),
+                "new_chunks": len(chunks), "new_bytes": sum(c["bytes"] for c in chunks.values()), "months": months}
+        # l'index ne référence jamais un bloc dont l'écriture n'a pas été confirmée
+        remaining, failed = [len(blobs)], []
+
+        def chunk_done():
+            remaining[0] -= 1
+            if remaining[0] == 0 and not failed:
+                self._commit(snap, chunks)
+
+        def chunk_failed(exc):
+            failed.append(exc)
+            logger.warning("Snapshot %s abandonné : bloc non écrit (%s)", snapshot_id, exc)
+        for digest, (key, data) in blobs.items():
+            self.files.write(self.chunk_path(digest), data, f"Snapshot chunk {key}", on_done=chunk_done, on_failed=chunk_failed)
+        if not blobs:
+            self._commit(snap, chunks)
+        logger.info("Snapshot %s : %s journée(s), %s bloc(s) écrit(s) sur %s", snapshot_id, len(df), len(blobs), len(months))
+        return {k: v for k, v in snap.items() if k != "months"}
+
+    def _commit(self, snap: dict, chunks: dict):
+        # nouvelles listes plutôt que modification en place : peut s'exécuter dans le thread
+        # d'écriture pendant qu'une session lit l'index
+        index = self.index()
+        index["chunks"] = {**index["chunks"], **chunks}
+        index["snapshots"] = sorted(index["snapshots"] + [snap], key=lambda s: s["at"])
+        self.files.write(self.index_path, json.dumps(index, indent=1, sort_keys=True).encode("utf-8"), f"Snapshot {snap['id']}")
+
+    def restore(self, snapshot: Union[str, dict], start=None, end=None) -> pd.DataFrame:
+        """Journées du snapshot entre start et end inclus (toute la période si non précisé)."""
+        snap = self.get(snapshot)
+        lo = pd.Timestamp(start).normalize() if start is not None else None
+        hi = pd.Timestamp(end).normalize() if end is not None else None
+        frames = []
+        for key, meta in sorted(snap["months"].items()):
+            if lo is not None and pd.Timestamp(meta["last"]) < lo:
+                continue
+            if hi is not None and pd.Timestamp(meta["first"]) > hi:
+                continue
+            data = self.files.read(self.chunk_path(meta["hash"]))
+            if data is None:
+                raise FileNotFoundError(f"bloc manquant pour {key} : {meta['hash']}")
+            frames.append(decode_chunk(data))
+        if not frames:
+            return typed(ensure_columns(make_empty_df()))
+        df = pd.concat(frames, ignore_index=True)
+        if lo is not None:
+            df = df[df["Date"] >= lo]
+        if hi is not None:
+            df = df[df["Date"] <= hi]
+        return df.reset_index(drop=True)
+
+    def storage_bytes(self) -> int:
+        return sum(c["bytes"] for c in self.index()["chunks"].values())
+
+def import_backups(snaps: Snapshots, paths: List[str]) -> List[dict]:
+    """Convertit d'anciens backups complets (data_2026_backup_<horodatage>.csv) en snapshots."""
+    created = []
+    for path in sorted(paths):
+        m = LEGACY_TIMESTAMP.search(os.path.basename(path))
+        at = datetime.strptime(m.group(1), "%Y%m%d_%H%M%S") if m else datetime.fromtimestamp(os.path.getmtime(path))
+        snap = snaps.create(storage_for_path(path).read(path), label=os.path.basename(path), at=at)
+        if snap:
+            created.append(snap)
+    return created
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshots du journal Blishko's Mindset")
+    parser.add_argument("--root", default=SNAPSHOT_ROOT, help="dossier des snapshots")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="liste les snapshots")
+    p_imp = sub.add_parser("import", help="convertit les anciens backups en snapshots")
+    p_imp.add_argument("paths", nargs="*", help=f"backups à importer (défaut : {LEGACY_PATTERN})")
+    p_res = sub.add_parser("restore", help="reconstruit une période d'un snapshot")
+    p_res.add_argument("id", help="identifiant du snapshot (voir list)")
+    p_res.add_argument("--from", dest="start", help="première journée (AAAA-MM-JJ)")
+    p_res.add_argument("--to", dest="end", help="dernière journée (AAAA-MM-JJ)")
+    p_res.add_argument("--out", help="fichier de sortie (défaut : stdout, CSV)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    snaps = Snapshots(LocalFiles(), args.root)
+    if args.cmd == "list":
+        for s in snaps.list_snapshots():
+            print(f"{s['id']}  {s['rows']:>6} journée(s)  {s['first']} → {s['last']}  {s['label']}")
+        print(f"{len(snaps.index()['chunks'])} bloc(s), {snaps.storage_bytes()} octets")
+    elif args.cmd == "import":
+        created = import_backups(snaps, args.paths or glob.glob(LEGACY_PATTERN))
+        print(f"{len(created)} snapshot(s) créé(s), {snaps.storage_bytes()} octets stockés")
+    elif args.cmd == "restore":
+        df = snaps.restore(args.id, args.start, args.end)
+        if args.out:
+            storage_for_path(args.out).write(args.out, df)
+            print(f"{len(df)} journée(s) écrite(s) dans {args.out}")
+        else:
+            print(df.to_csv(index=False, date_format="%Y-%m-%d"), end="")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+# storage.py - Blishko's Mindset : schéma du journal et backends de persistance
+# Usage (migration) : python storage.py migrate --to parquet [fichiers...]
+#                     python storage.py partition [data_2026.csv]
+#
+# N'importe que pandas + stdlib (pyarrow est chargé à la demande par le backend Parquet),
+# pour pouvoir être utilisé hors de Streamlit.
+import pandas as pd
+from typing import Optional, Any, List, Dict
+from io import BytesIO, StringIO
+import argparse
+import glob
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import tracing
+from summary import SUM_COLS
+
+logger = logging.getLogger("blishko")
+
+DATA_STEM = "data_2026"  # fichier de données principal (extension selon le backend)
+
+def layout() -> str:
+    # BLISHKO_STORAGE_LAYOUT : "single" (un fichier + journal de deltas) ou "partitioned" (data/AAAA-MM + manifeste)
+    return os.environ.get("BLISHKO_STORAGE_LAYOUT", "single")
+
+# ---------------------------
+# Schéma
+# ---------------------------
+def cols_list():
+    return ["Date","XP","Phone","Weight","Stocks","Crypto","Expenses","Twitch","School","Finance","Prayer","Reading","Sport","Hygiene","Budget","UpdatedAt"]
+
+# types fixes utilisés par les backends typés (Parquet, SQLite)
+SCHEMA = {
+    "Date": "datetime64[ns]",
+    "XP": "int64",
+    "Phone": "float64",
+    "Weight": "float64",
+    "Stocks": "float64",
+    "Crypto": "float64",
+    "Expenses": "float64",
+    "Twitch": "int64",
+    "School": "int64",
+    "Finance": "int64",
+    "Prayer": "int64",
+    "Reading": "int64",
+    "Sport": "int64",
+    "Hygiene": "int64",
+    "Budget": "int64",
+    "UpdatedAt": "int64",  # horodatage (ms) de la dernière modification de la journée ; 0 = inconnu
+}
+
+def stamp() -> int:
+    return int(time.time() * 1000)
+
+def make_empty_df():
+    return pd.DataFrame(columns=cols_list())
+
+def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
+    with tracing.span("ensure_columns", rows=len(df)):
+        for c in cols_list():
+            if c not in df.columns:
+                # colonne absente (ancien fichier) : zéros déjà au bon type
+                df[c] = 0 if c == "Date" else pd.Series(0, index=df.index, dtype=SCHEMA[c])
+        if "Date" in df.columns:
+            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+        return df[cols_list()]
+
+def typed(df: pd.DataFrame) -> pd.DataFrame:
+    # applique SCHEMA (valeurs manquantes -> 0) ; les lignes sans date valide sont écartées
+    df = ensure_columns(df.copy())
+    df = df.dropna(subset=["Date"])
+    for c, dtype in SCHEMA.items():
+        if c != "Date":
+            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(dtype)
+    df["Date"] = df["Date"].astype(SCHEMA["Date"])
+    return df.reset_index(drop=True)
+
+# ---------------------------
+# Journal de deltas (JSONL, indépendant du backend)
+# ---------------------------
+def journal_record(row: dict) -> str:
+    rec = {k: row.get(k, 0) for k in cols_list()}
+    rec["Date"] = pd.Timestamp(rec["Date"]).strftime("%Y-%m-%d")
+    return json.dumps(rec, ensure_ascii=False, default=float) + "\n"
+
+def latest_rows(df: pd.DataFrame) -> pd.DataFrame:
+    # une ligne par Date : la plus récente selon UpdatedAt ; à égalité, la dernière rencontrée
+    stamps = pd.to_numeric(df["UpdatedAt"], errors="coerce").fillna(0)
+    order = pd.DataFrame({"Date": df["Date"], "UpdatedAt": stamps}).sort_values(["Date", "UpdatedAt"], kind="stable").index
+    return df.loc[order].drop_duplicates("Date", keep="last").reset_index(drop=True)
+
+def reconcile(local: pd.DataFrame, remote: pd.DataFrame) -> pd.DataFrame:
+    """Fusion ligne à ligne de deux versions du journal (last-write-wins par Date selon UpdatedAt)."""
+    if remote.empty:
+        return local
+    if local.empty:
+        return remote
+    return latest_rows(pd.concat([ensure_columns(remote), ensure_columns(local)], ignore_index=True))
+
+def merge_journal_text(remote_text: str, local_text: str) -> str:
+    """Conflit sur le journal de deltas : lignes distantes puis lignes locales absentes du distant (le rejeu départage)."""
+    if remote_text and not remote_text.endswith("\n"):
+        remote_text += "\n"
+    known = set(remote_text.splitlines())
+    return remote_text + "".join(line + "\n" for line in local_text.splitlines() if line.strip() and line not in known)
+
+def unsynced(queued: pd.DataFrame, remote: pd.DataFrame) -> pd.DataFrame:
+    # journées en file d'attente plus récentes (UpdatedAt) que leur version distante, ou absentes de celle-ci
+    known = queued["Date"].map(remote.set_index("Date")["UpdatedAt"]).fillna(-1)
+    return queued[queued["UpdatedAt"] > known]
+
+def replay_journal(df: pd.DataFrame, journal_text: str) -> pd.DataFrame:
+    # applique les deltas sur le snapshot : pour une Date, la ligne la plus récente (UpdatedAt) l'emporte
+    records = []
+    for line in journal_text.splitlines():
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning("Ligne de journal ignorée: %s", line[:80])
+    if not records:
+        return df
+    deltas = ensure_columns(pd.DataFrame(records))
+    merged = deltas if df.empty else pd.concat([ensure_columns(df), deltas], ignore_index=True)
+    return latest_rows(merged)
+
+def journal_path(path: str) -> str:
+    # fichier de deltas associé à un fichier de données (data_2026.csv -> data_2026.journal.jsonl)
+    return os.path.splitext(path)[0] + ".journal.jsonl"
+
+def read_with_journal(backend: "Storage", path: str) -> pd.DataFrame:
+    """Fichier de données local avec ses deltas rejoués (vide si absent)."""
+    df = backend.read(path) if os.path.exists(path) else ensure_columns(make_empty_df())
+    journal = journal_path(path)
+    if os.path.exists(journal):
+        with open(journal, "r", encoding="utf-8") as f:
+            df = replay_journal(df, f.read())
+    return df
+
+def merge_rows(df: pd.DataFrame, rows: List[dict]) -> pd.DataFrame:
+    # upsert en mémoire de quelques lignes (last-write-wins par Date / UpdatedAt)
+    return replay_journal(df, "".join(journal_record(r) for r in rows))
+
+# ---------------------------
+# Backends
+# ---------------------------
+class Storage:
+    """
+    Interface commune : `read`/`write` sur un chemin local, `decode`/`encode` pour
+    transporter le fichier tel quel (ex. via l'API GitHub), `upsert` pour quelques lignes.
+    """
+    name = ""
+    ext = ""
+    remote = True  # le fichier peut être poussé tel quel sur GitHub
+    row_upsert = False  # `upsert` ne touche que les lignes concernées
+
+    def path_for(self, stem: str) -> str:
+        return stem + self.ext
+
+    def decode(self, raw: bytes) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def encode(self, df: pd.DataFrame) -> bytes:
+        raise NotImplementedError
+
+    def read(self, path: str) -> pd.DataFrame:
+        with open(path, "rb") as f:
+            return self.decode(f.read())
+
+    def write(self, path: str, df: pd.DataFrame):
+        raw = self.encode(df)
+        with open(path, "wb") as f:
+            f.write(raw)
+
+    def upsert(self, path: str, rows: List[dict]) -> pd.DataFrame:
+        df = self.read(path) if os.path.exists(path) else ensure_columns(make_empty_df())
+        df = merge_rows(df, rows)
+        self.write(path, df)
+        return df
+
+class CsvStorage(Storage):
+    name = "csv"
+    ext = ".csv"
+
+    def decode(self, raw: bytes) -> pd.DataFrame:
+        with tracing.span("decode", backend=self.name, bytes=len(raw)):
+            return ensure_columns(pd.read_csv(StringIO(raw.decode("utf-8"))))
+
+    def encode(self, df: pd.DataFrame) -> bytes:
+        return df.to_csv(index=False).encode("utf-8")
+
+class ParquetStorage(Storage):
+    """Fichier colonnaire typé (SCHEMA) : pas de parsing texte ni de conversion de dates au chargement."""
+    name = "parquet"
+    ext = ".parquet"
+
+    def decode(self, raw: bytes) -> pd.DataFrame:
+        with tracing.span("decode", backend=self.name, bytes=len(raw)):
+            df = pd.read_parquet(BytesIO(raw))
+            if list(df.columns) != cols_list():
+                df = typed(df)
+            return df
+
+    def encode(self, df: pd.DataFrame) -> bytes:
+        buf = BytesIO()
+        typed(df).to_parquet(buf, index=False)
+        return buf.getvalue()
+
+class CompactStorage(Storage):
+    """Colonnes étroites de compact.py (habitudes en bitmask, montants en centièmes), compressées : ~4x plus petit que le CSV."""
+    name = "compact"
+    ext = ".blk"
+
+    def decode(self, raw: bytes) -> pd.DataFrame:
+        import compact  # compact.py dépend du schéma défini ici
+        with tracing.span("decode", backend=self.name, bytes=len(raw)):
+            return compact.decode(raw)
+
+    def encode(self, df: pd.DataFrame) -> bytes:
+        import compact
+        return compact.encode(df)
+
+class SqliteStorage(Storage):
+    """Table SQLite (clé primaire Date) : l'enregistrement d'une journée ne réécrit qu'une ligne. Local uniquement."""
+    name = "sqlite"
+    ext = ".sqlite"
+    remote = False
+    row_upsert = True
+    TABLE = "journal"
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path)
+        defs = {c: f'"{c}" {"REAL" if SCHEMA[c] == "float64" else "INTEGER"} NOT NULL DEFAULT 0' for c in cols_list()[1:]}
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {self.TABLE} ("Date" TEXT PRIMARY KEY, {", ".join(defs.values())})')
+        # tables créées avant l'ajout d'une colonne (ex. UpdatedAt)
+        existing = {r[1] for r in conn.execute(f"PRAGMA table_info({self.TABLE})")}
+        for c, definition in defs.items():
+            if c not in existing:
+                conn.execute(f"ALTER TABLE {self.TABLE} ADD COLUMN {definition}")
+        return conn
+
+    @staticmethod
+    def _params(df: pd.DataFrame) -> List[tuple]:
+        df = typed(df).drop_duplicates("Date", keep="last")
+        df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
+        return list(df.itertuples(index=False, name=None))
+
+    def read(self, path: str) -> pd.DataFrame:
+        with self._connect(path) as conn:
+            df = pd.read_sql_query(f"SELECT * FROM {self.TABLE} ORDER BY Date", conn)
+        conn.close()
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d").astype(SCHEMA["Date"])
+        return df[cols_list()]
+
+    def write(self, path: str, df: pd.DataFrame):
+        placeholders = ", ".join("?" for _ in cols_list())
+        with self._connect(path) as conn:
+            conn.execute(f"DELETE FROM {self.TABLE}")
+            conn.executemany(f"INSERT INTO {self.TABLE} VALUES ({placeholders})", self._params(df))
+        conn.close()
+
+    def upsert(self, path: str, rows: List[dict]) -> Optional[pd.DataFrame]:
+        placeholders = ", ".join("?" for _ in cols_list())
+        updates = ", ".join(f'"{c}"=excluded."{c}"' for c in cols_list()[1:])
+        with self._connect(path) as conn:
+            conn.executemany(
+                f"INSERT INTO {self.TABLE} VALUES ({placeholders}) ON CONFLICT(Date) DO UPDATE SET {updates}",
+                self._params(pd.DataFrame(rows)),
+            )
+        conn.close()
+        return None
+
+    def decode(self, raw: bytes) -> pd.DataFrame:
+        raise NotImplementedError("Le backend SQLite est local uniquement")
+
+    def encode(self, df: pd.DataFrame) -> bytes:
+        raise NotImplementedError("Le backend SQLite est local uniquement")
+
+BACKENDS: Dict[str, Any] = {b.name: b for b in (CsvStorage, ParquetStorage, CompactStorage, SqliteStorage)}
+
+def get_storage(name: Optional[str] = None) -> Storage:
+    name = name or os.environ.get("BLISHKO_STORAGE_BACKEND", "csv")
+    if name not in BACKENDS:
+        raise ValueError(f"Backend inconnu: {name} (choix: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+def storage_for_path(path: str) -> Storage:
+    ext = os.path.splitext(path)[1]
+    for b in BACKENDS.values():
+        if b.ext == ext:
+            return b()
+    raise ValueError(f"Format non reconnu: {path}")
+
+# ---------------------------
+# Partitions mensuelles
+# ---------------------------
+PARTITION_ROOT = "data"
+
+def partition_key(date) -> str:
+    return pd.Timestamp(date).strftime("%Y-%m")
+
+class Partitions:
+    """
+    Journal découpé par mois : `data/AAAA-MM<ext>` + `data/manifest.json`, qui décrit
+    chaque partition (nombre de lignes, première et dernière date, sommes par colonne). Le manifeste suffit
+    pour choisir les partitions d'une fenêtre de dates ou celles qui ont expiré.
+    Les méthodes `load_*`/`read`/`upsert`/`write_all`/`archive` travaillent sur disque ;
+    les autres sont pures et servent aussi au transport GitHub de app.py.
+    """
+
+    def __init__(self, backend: Storage, root: str = PARTITION_ROOT):
+        self.backend = backend
+        self.root = root
+        self.manifest_path = f"{root}/manifest.json"
+
+    def path(self, key: str) -> str:
+        return self.backend.path_for(f"{self.root}/{key}")
+
+    def archive_path(self, key: str) -> str:
+        return self.backend.path_for(f"{self.root}/archive/{key}")
+
+    @staticmethod
+    def empty_manifest() -> dict:
+        return {"partitions": {}, "archived": {}}
+
+    @staticmethod
+    def split(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        df = ensure_columns(df.copy()).dropna(subset=["Date"])
+        if df.empty:
+            return {}
+        keys = df["Date"].dt.strftime("%Y-%m")
+        return {k: part.sort_values("Date").reset_index(drop=True) for k, part in df.groupby(keys)}
+
+    @staticmethod
+    def describe(df: pd.DataFrame) -> dict:
+        # métadonnées + sommes de la partition (rollup mensuel lu par les KPI sans charger les données)
+        dates = pd.to_datetime(df["Date"])
+        meta = {"rows": int(len(df)), "first": dates.min().strftime("%Y-%m-%d"), "last": dates.max().strftime("%Y-%m-%d")}
+        meta.update({c: float(df[c].sum()) for c in SUM_COLS})
+        return meta
+
+    @staticmethod
+    def keys_in_window(manifest: dict, start=None, end=None) -> List[str]:
+        # partitions dont l'intervalle [first, last] recoupe la fenêtre
+        keys = []
+        for key, meta in sorted(manifest["partitions"].items()):
+            if start is not None and pd.Timestamp(meta["last"]) < pd.Timestamp(start).normalize():
+                continue
+            if end is not None and pd.Timestamp(meta["first"]) > pd.Timestamp(end):
+                continue
+            keys.append(key)
+        return keys
+
+    @staticmethod
+    def keys_for_day(manifest: dict, day) -> List[str]:
+        # partition du jour + celle qui contient la dernière journée antérieure (comparaison « veille »)
+        day = pd.Timestamp(day).normalize()
+        keys = {partition_key(day)} & set(manifest["partitions"])
+        earlier = [k for k, m in manifest["partitions"].items() if pd.Timestamp(m["first"]) < day]
+        if earlier:
+            keys.add(max(earlier))
+        return sorted(keys)
+
+    @staticmethod
+    def expired(manifest: dict, horizon) -> List[str]:
+        horizon = pd.Timestamp(horizon).normalize()
+        return sorted(k for k, m in manifest["partitions"].items() if pd.Timestamp(m["last"]) < horizon)
+
+    # ---------------------------
+    # Disque local
+    # ---------------------------
+    def load_manifest(self) -> Optional[dict]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest: dict):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def read(self, start=None, end=None) -> pd.DataFrame:
+        manifest = self.load_manifest() or self.empty_manifest()
+        frames = [self.backend.read(self.path(k)) for k in self.keys_in_window(manifest, start, end)]
+        if not frames:
+            return ensure_columns(make_empty_df())
+        df = pd.concat(frames, ignore_index=True)
+        if start is not None:
+            df = df[df["Date"] >= pd.Timestamp(start).normalize()]
+        if end is not None:
+            df = df[df["Date"] <= pd.Timestamp(end)]
+        return df.reset_index(drop=True)
+
+    def write_all(self, df: pd.DataFrame) -> dict:
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self.load_manifest() or self.empty_manifest()
+        manifest["partitions"] = {}
+        for key, part in self.split(df).items():
+            self.backend.write(self.path(key), part)
+            manifest["partitions"][key] = self.describe(part)
+        self.save_manifest(manifest)
+        return manifest
+
+    def upsert(self, rows: List[dict]) -> dict:
+        # ne réécrit que les partitions des journées concernées
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self.load_manifest() or self.empty_manifest()
+        by_key: Dict[str, List[dict]] = {}
+        for row in rows:
+            by_key.setdefault(partition_key(row["Date"]), []).append(row)
+        for key, part_rows in by_key.items():
+            part = self.backend.upsert(self.path(key), part_rows)
+            if part is None:
+                part = self.backend.read(self.path(key))
+            manifest["partitions"][key] = self.describe(part)
+        self.save_manifest(manifest)
+        return manifest
+
+    def archive(self, keys: List[str], prune: bool = False) -> dict:
+        manifest = self.load_manifest() or self.empty_manifest()
+        for key in keys:
+            meta = manifest["partitions"].pop(key, None)
+            if meta is None or not os.path.exists(self.path(key)):
+                continue
+            if prune:
+                os.remove(self.path(key))
+            else:
+                os.makedirs(os.path.dirname(self.archive_path(key)), exist_ok=True)
+                os.replace(self.path(key), self.archive_path(key))
+                manifest["archived"][key] = meta
+        self.save_manifest(manifest)
+        return manifest
+
+# ---------------------------
+# Migration
+# ---------------------------
+def migrate(paths: List[str], target: str, remove: bool = False) -> List[str]:
+    """Convertit chaque fichier (data_2026*.csv par défaut) vers le backend `target`."""
+    dest = get_storage(target)
+    written = []
+    for path in paths:
+        src = storage_for_path(path)
+        if src.name == dest.name:
+            continue
+        out = dest.path_for(os.path.splitext(path)[0])
+        dest.write(out, src.read(path))
+        written.append(out)
+        logger.info("Migré %s -> %s", path, out)
+        if remove:
+            os.remove(path)
+    return written
+
+def partition(path: str, backend: Optional[str] = None, root: str = PARTITION_ROOT) -> dict:
+    """Découpe un fichier de données (et son journal de deltas éventuel) en partitions mensuelles."""
+    df = read_with_journal(storage_for_path(path), path)
+    return Partitions(get_storage(backend), root).write_all(df)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Outils de stockage Blishko's Mindset")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_mig = sub.add_parser("migrate", help="convertit les fichiers de données et les backups")
+    p_mig.add_argument("--to", required=True, choices=sorted(BACKENDS), help="backend cible")
+    p_mig.add_argument("--remove", action="store_true", help="supprime les fichiers source après conversion")
+    p_mig.add_argument("paths", nargs="*", help="fichiers à convertir (défaut : data_2026*.csv)")
+    p_part = sub.add_parser("partition", help="découpe le fichier de données en partitions mensuelles")
+    p_part.add_argument("path", nargs="?", default="data_2026.csv", help="fichier source (défaut : data_2026.csv)")
+    p_part.add_argument("--backend", choices=sorted(BACKENDS), help="format des partitions (défaut : BLISHKO_STORAGE_BACKEND)")
+    p_part.add_argument("--root", default=PARTITION_ROOT, help="dossier des partitions")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "migrate":
+        paths = args.paths or sorted(glob.glob("data_2026*.csv"))
+        written = migrate(paths, args.to, remove=args.remove)
+        print(f"{len(written)} fichier(s) converti(s) vers {args.to}")
+    elif args.cmd == "partition":
+        manifest = partition(args.path, args.backend, args.root)
+        print(f"{len(manifest['partitions'])} partition(s) écrite(s) dans {args.root}/")
+
+if __name__ == "__main__":
+    main()
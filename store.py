@@ -0,0 +1,222 @@
+# store.py - Blishko's Mindset : journal en mémoire indexé par date
+#
+# Colonnes numpy compactes triées par jour (compact.COMPACT_SCHEMA, 38 octets par journée,
+# plus 12 pour les moyennes mobiles) : recherche d'une journée par dichotomie, ajout en fin
+# de journal en O(1) amorti (marge de GROWTH_FACTOR, pas de doublement). Les vues DataFrame
+# sont reconstruites à la demande avec les colonnes habituelles (cols_list) ; seule la
+# dernière demandée est gardée.
+import numpy as np
+import pandas as pd
+from typing import Optional, Iterator, List, Union
+import threading
+import itertools
+
+import compact
+import tracing
+from storage import cols_list, typed, latest_rows
+from summary import Summary, ROLLING_COLS, ROLLING_WINDOW, rolling_col, rolling_update
+
+INITIAL_CAPACITY = 64
+GROWTH_FACTOR = 1.125  # croissance géométrique à l'ajout : ≤ 12,5 % de lignes réservées
+DERIVED_COLS = [rolling_col(c) for c in ROLLING_COLS]  # moyennes mobiles, non persistées
+_VERSIONS = itertools.count(1)  # numéros de version uniques dans le process (clés de cache des graphiques)
+DERIVED_DTYPE = "float32"  # moyennes mobiles en centièmes, pour l'affichage seulement
+VIEW_ITEMSIZE = 8  # colonnes des vues décodées : datetime64 / int64 / float64
+
+class JournalStore:
+    """
+    Journal trié par Date (une ligne par jour, last-write-wins).
+
+    - `upsert(row)` : recherche O(log n) ; ajout en fin sans déplacement, insertion
+      au milieu (saisie rétroactive) par décalage mémoire.
+    - `range(start, end)` / `frame(start, end)` : vues sur une plage, sans tri.
+    - `import_rows(rows)` : fusion en masse (backups, imports) en une passe vectorisée.
+    - `column(name, start, end)` : une seule colonne habituelle, sans construire de DataFrame.
+    Les vues rendues par `frame` sont décodées depuis les colonnes compactes (jamais
+    partagées avec elles) ; seule la dernière est gardée en cache. `summary` (sommes
+    globales et mensuelles) et les moyennes mobiles sont tenues à jour à chaque upsert,
+    sans repasser sur l'historique.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self._lock = threading.RLock()
+        self._n = 0
+        self._cols = {c: np.zeros(capacity, dtype=t) for c, t in compact.COMPACT_SCHEMA.items()}
+        self._cols.update({c: np.zeros(capacity, dtype=DERIVED_DTYPE) for c in DERIVED_COLS})
+        self._view = None  # ((lo, hi, derived), DataFrame) : dernière vue construite
+        self.summary = Summary()
+        self.version = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "JournalStore":
+        store = cls()
+        store.import_rows(df)
+        return store
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ---------------------------
+    # Lecture
+    # ---------------------------
+    @property
+    def _dates(self) -> np.ndarray:
+        return self._cols["Day"][:self._n]
+
+    @staticmethod
+    def _key(date) -> int:
+        return compact.day_number(date)
+
+    def _row(self, i: int) -> dict:
+        return compact.unpack_row(self._cols, i)
+
+    def nbytes(self, views: bool = False) -> int:
+        # mémoire occupée par les colonnes (capacité comprise) ; `views` : plus la vue DataFrame en cache
+        with self._lock:
+            size = compact.nbytes(self._cols)
+            if views and self._view is not None:
+                size += self._view[1].size * VIEW_ITEMSIZE
+            return size
+
+    def get(self, date) -> Optional[dict]:
+        with self._lock:
+            key = self._key(date)
+            i = int(np.searchsorted(self._dates, key))
+            if i < self._n and self._dates[i] == key:
+                return self._row(i)
+            return None
+
+    def previous(self, date) -> Optional[dict]:
+        # dernière journée strictement antérieure à `date`
+        with self._lock:
+            i = int(np.searchsorted(self._dates, self._key(date)))
+            return self._row(i - 1) if i > 0 else None
+
+    def last(self) -> Optional[dict]:
+        with self._lock:
+            return self._row(self._n - 1) if self._n else None
+
+    def _bounds(self, start=None, end=None):
+        lo = 0 if start is None else int(np.searchsorted(self._dates, self._key(start), side="left"))
+        hi = self._n if end is None else int(np.searchsorted(self._dates, self._key(end), side="right"))
+        return lo, max(lo, hi)
+
+    def range(self, start=None, end=None) -> Iterator[dict]:
+        # journées entre start et end inclus, dans l'ordre chronologique
+        with self._lock:
+            lo, hi = self._bounds(start, end)
+            rows = [self._row(i) for i in range(lo, hi)]
+        return iter(rows)
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.range()
+
+    def frame(self, start=None, end=None, derived: bool = False) -> pd.DataFrame:
+        """
+        Vue DataFrame (triée, typée) sur la plage demandée. La dernière vue construite est
+        rendue telle quelle si la même plage est redemandée avant une modification.
+        `derived=True` ajoute les moyennes mobiles (Stocks_MA7, ...).
+        """
+        with self._lock:
+            key = (*self._bounds(start, end), derived)
+            if self._view is not None and self._view[0] == key:
+                return self._view[1]
+            lo, hi = key[:2]
+            df = compact.unpack(self._slice(lo, hi))
+            if derived:
+                for c in DERIVED_COLS:
+                    df[c] = self._cols[c][lo:hi].astype("float64") / compact.SCALE
+            self._view = (key, df)
+            return df
+
+    def column(self, name: str, start=None, end=None) -> np.ndarray:
+        """Valeurs d'une colonne habituelle (ex. "Phone", "Sport") sur la plage demandée."""
+        with self._lock:
+            lo, hi = self._bounds(start, end)
+            if name in DERIVED_COLS:
+                return self._cols[name][lo:hi].astype("float64") / compact.SCALE
+            return compact.column(self._slice(lo, hi), name)
+
+    def _slice(self, lo: int, hi: int) -> dict:
+        return {c: self._cols[c][lo:hi] for c in compact.COMPACT_SCHEMA}
+
+    # ---------------------------
+    # Écriture
+    # ---------------------------
+    def _touch(self):
+        self._view = None
+        self.version = next(_VERSIONS)
+
+    def _grow(self, capacity: int):
+        cols = {}
+        for c, arr in self._cols.items():
+            cols[c] = np.zeros(capacity, dtype=arr.dtype)
+            cols[c][:self._n] = arr[:self._n]
+        self._cols = cols
+
+    def _coerce(self, row: dict) -> dict:
+        # conversion scalaire : bien plus rapide que de passer par un DataFrame d'une ligne
+        values = {"Date": pd.Timestamp(row["Date"]).normalize()}
+        for c in cols_list()[1:]:
+            v = pd.to_numeric(row.get(c, 0), errors="coerce")
+            values[c] = 0 if pd.isna(v) else v
+        return values
+
+    def upsert(self, row: dict):
+        with tracing.span("store.upsert"):
+            self._upsert(row)
+
+    def _upsert(self, row: dict):
+        values = self._coerce(row)
+        packed = compact.pack_row(values)
+        with self._lock:
+            key = packed["Day"]
+            i = int(np.searchsorted(self._dates, key))
+            exists = i < self._n and self._dates[i] == key
+            old = self._row(i) if exists else None
+            if not exists:
+                if self._n == len(self._cols["Day"]):
+                    self._grow(max(int(self._n * GROWTH_FACTOR), self._n + INITIAL_CAPACITY))
+                if i < self._n:
+                    for arr in self._cols.values():
+                        arr[i + 1:self._n + 1] = arr[i:self._n]
+                self._n += 1
+            for c, v in packed.items():
+                self._cols[c][i] = v
+            values = self._row(i)  # valeurs telles que stockées (centièmes)
+            for c in ROLLING_COLS:
+                rolling_update(self._cols[c], self._cols[rolling_col(c)], i, self._n)
+            self.summary.replace(old, values)
+            self._touch()
+
+    def upsert_many(self, rows: List[dict]):
+        for row in rows:
+            self.upsert(row)
+
+    def import_rows(self, rows: Union[pd.DataFrame, List[dict]]):
+        """Fusion en masse : pour chaque journée, la ligne la plus récente (UpdatedAt) l'emporte ; à égalité, l'importée."""
+        with tracing.span("store.import_rows", rows=len(rows)):
+            self._import_rows(rows)
+
+    def _import_rows(self, rows: Union[pd.DataFrame, List[dict]]):
+        incoming = typed(rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows))
+        if incoming.empty:
+            return
+        with self._lock:
+            current = compact.unpack(self._slice(0, self._n))
+            merged = incoming if current.empty else pd.concat([current, incoming], ignore_index=True)
+            merged = latest_rows(merged)
+            packed = compact.pack(merged)
+            n = len(merged)
+            capacity = n  # import en masse : pas de réserve, l'ajout suivant agrandit
+            self._cols = {}
+            for c, arr in packed.items():
+                self._cols[c] = np.zeros(capacity, dtype=arr.dtype)
+                self._cols[c][:n] = arr
+            for c in ROLLING_COLS:
+                arr = np.zeros(capacity, dtype=DERIVED_DTYPE)
+                arr[:n] = pd.Series(packed[c]).rolling(ROLLING_WINDOW, min_periods=1).mean().to_numpy()
+                self._cols[rolling_col(c)] = arr
+            self.summary = Summary.from_frame(compact.unpack(packed))
+            self._n = n
+            self._touch()
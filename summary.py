@@ -0,0 +1,94 @@
+# summary.py - Blishko's Mindset : agrégats maintenus au fil des enregistrements
+#
+# Sommes et nombre de journées (global et par mois) mis à jour en O(1) à chaque upsert,
+# pour que les cartes KPI et le ROI ne relisent pas tout l'historique.
+import numpy as np
+import pandas as pd
+from typing import Optional, Dict
+
+SUM_COLS = ["XP", "Phone", "Weight", "Stocks", "Crypto", "Expenses"]
+ROLLING_COLS = ["Stocks", "Crypto", "Expenses"]  # moyennes mobiles affichées sur les graphiques
+ROLLING_WINDOW = 7
+
+def rolling_col(col: str) -> str:
+    return f"{col}_MA{ROLLING_WINDOW}"
+
+def add_rolling(df: pd.DataFrame) -> pd.DataFrame:
+    # calcul vectorisé des moyennes mobiles (fenêtres chargées par partitions)
+    df = df.copy()
+    for c in ROLLING_COLS:
+        df[rolling_col(c)] = df[c].rolling(ROLLING_WINDOW, min_periods=1).mean()
+    return df
+
+class Summary:
+    """Nombre de journées et sommes par colonne, au global et par mois (AAAA-MM)."""
+
+    def __init__(self):
+        self.count = 0
+        self.sums = {c: 0.0 for c in SUM_COLS}
+        self.months: Dict[str, dict] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "Summary":
+        summary = cls()
+        if df.empty:
+            return summary
+        summary.count = int(len(df))
+        summary.sums = {c: float(df[c].sum()) for c in SUM_COLS}
+        # regroupement sur datetime64[M] : pas de formatage texte ligne à ligne
+        grouped = df[SUM_COLS].groupby(pd.to_datetime(df["Date"]).to_numpy(dtype="datetime64[M]"))
+        counts = grouped.size().to_dict()
+        for month, sums in grouped.sum().to_dict("index").items():
+            key = pd.Timestamp(month).strftime("%Y-%m")
+            summary.months[key] = {"rows": int(counts[month]), **{c: float(sums[c]) for c in SUM_COLS}}
+        return summary
+
+    @classmethod
+    def from_months(cls, months: Dict[str, dict]) -> "Summary":
+        # reconstitution depuis des rollups mensuels (ex. manifeste des partitions)
+        summary = cls()
+        for key, m in months.items():
+            summary.months[key] = {"rows": int(m["rows"]), **{c: float(m.get(c, 0.0)) for c in SUM_COLS}}
+            summary.count += int(m["rows"])
+            for c in SUM_COLS:
+                summary.sums[c] += float(m.get(c, 0.0))
+        return summary
+
+    def add(self, row: dict, sign: int = 1):
+        key = pd.Timestamp(row["Date"]).strftime("%Y-%m")
+        month = self.months.setdefault(key, {"rows": 0, **{c: 0.0 for c in SUM_COLS}})
+        self.count += sign
+        month["rows"] += sign
+        for c in SUM_COLS:
+            v = float(row.get(c, 0) or 0)
+            self.sums[c] += sign * v
+            month[c] += sign * v
+        if month["rows"] <= 0:
+            del self.months[key]
+
+    def replace(self, old: Optional[dict], new: dict):
+        if old is not None:
+            self.add(old, -1)
+        self.add(new)
+
+    def month(self, key: str) -> Optional[dict]:
+        return self.months.get(key)
+
+    def total(self, col: str) -> float:
+        return self.sums[col]
+
+    def mean(self, col: str) -> float:
+        return self.sums[col] / self.count if self.count else float("nan")
+
+    @property
+    def net_gain(self) -> float:
+        return self.sums["Stocks"] + self.sums["Crypto"]
+
+    def roi(self, invested_total: float) -> Optional[float]:
+        return self.net_gain / invested_total * 100 if invested_total > 0 else None
+
+def rolling_update(values: np.ndarray, out: np.ndarray, start: int, n: int):
+    # recalcule la moyenne mobile des seules lignes dont la fenêtre contient `start`
+    for j in range(start, min(n, start + ROLLING_WINDOW)):
+        lo = max(0, j - ROLLING_WINDOW + 1)
+        out[j] = values[lo:j + 1].mean()
@@ -0,0 +1,269 @@
+# sync.py - Blishko's Mindset : écriture différée (write-behind) vers GitHub
+#
+# Un thread unique par process pousse les fichiers en arrière-plan : plusieurs écritures
+# en attente sur un même fichier sont fusionnées en un seul commit. Quand GitHub signale
+# un conflit (un autre appareil a écrit entre-temps), la version distante est relue et
+# fusionnée ligne à ligne avant de rejouer l'écriture (backoff exponentiel).
+# `Outbox` garde sur disque les lignes pas encore confirmées par GitHub.
+from typing import Optional, Any, Callable, Dict, List
+from collections import OrderedDict
+import json
+import logging
+import os
+import threading
+import time
+
+import tracing
+
+logger = logging.getLogger("blishko")
+
+PENDING = "pending"
+SYNCED = "synced"
+FAILED = "failed"
+
+COALESCE_SECONDS = 1.5  # délai d'attente pour regrouper des enregistrements rapprochés
+MAX_ATTEMPTS = 4
+RETRY_DELAY = 1.0  # délai de base entre deux tentatives (doublé à chaque échec)
+STALE_STATUSES = (404, 409, 422)  # fichier absent / sha périmé / fichier déjà existant
+STATUS_TTL = 600  # secondes pendant lesquelles un état final (synced / failed) reste affiché
+OUTBOX_FILENAME = "pending_sync.jsonl"  # journées pas encore confirmées par GitHub (app.py, ingest.py)
+
+class WriteJob:
+    # content=None : suppression du fichier
+    # merge(contenu distant en octets) -> contenu à écrire, appelé en cas de conflit de sha
+    def __init__(self, repo, path: str, content, message: str, sha: Optional[str] = None,
+                 on_done: Optional[Callable[[Any], None]] = None, on_failed: Optional[Callable[[Exception], None]] = None,
+                 merge: Optional[Callable[[bytes], Any]] = None):
+        self.repo = repo
+        self.path = path
+        self.content = content
+        self.message = message
+        self.sha = sha
+        self.on_done = on_done
+        self.on_failed = on_failed
+        self.merge = merge
+        self.submitted = time.monotonic()
+
+class WriteBehind:
+    """
+    File d'écritures GitHub traitée par un thread de fond. `submit` rend la main
+    immédiatement ; `status` expose l'état pending / synced / failed de chaque fichier.
+    """
+
+    def __init__(self, coalesce_seconds: float = COALESCE_SECONDS):
+        self.coalesce_seconds = coalesce_seconds
+        self._pending: "OrderedDict[str, WriteJob]" = OrderedDict()
+        self._shas: Dict[str, str] = {}  # dernier sha connu après un push réussi
+        self._status: Dict[str, dict] = {}
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="blishko-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: WriteJob):
+        with self._cond:
+            # une écriture plus récente remplace celle en attente (contenu complet du fichier)
+            # et passe en fin de file pour conserver l'ordre entre fichiers (snapshot puis journal)
+            self._pending.pop(job.path, None)
+            self._pending[job.path] = job
+            self._status[job.path] = {"state": PENDING, "error": None, "at": time.time()}
+            self._cond.notify()
+
+    def is_pending(self, *paths: str) -> bool:
+        with self._cond:
+            return any(p in self._pending or self._status.get(p, {}).get("state") == "writing" for p in paths)
+
+    def is_pending_under(self, prefix: str) -> bool:
+        # écriture en attente ou en cours sous un dossier (journal d'un utilisateur)
+        with self._cond:
+            return any(p.startswith(prefix) for p in self._pending) or any(
+                p.startswith(prefix) and s["state"] == "writing" for p, s in self._status.items())
+
+    def status(self) -> Dict[str, dict]:
+        with self._cond:
+            self._prune()
+            return {p: dict(s) for p, s in self._status.items()}
+
+    def _prune(self):
+        # états finaux expirés (sous `_cond`) : un échec sur un fichier jamais réécrit
+        # (bloc de snapshot, partition archivée) ne reste pas affiché indéfiniment
+        horizon = time.time() - STATUS_TTL
+        for path in [p for p, s in self._status.items() if s["state"] in (SYNCED, FAILED) and s["at"] < horizon]:
+            del self._status[path]
+
+    def overall(self, prefix: str = "") -> Optional[str]:
+        # état agrégé des fichiers sous `prefix` (dossier d'un utilisateur ; "" : tous)
+        states = {s["state"] for p, s in self.status().items() if p.startswith(prefix)}
+        if not states:
+            return None
+        if FAILED in states:
+            return FAILED
+        if states - {SYNCED}:
+            return PENDING
+        return SYNCED
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        # attend que la file soit vide (tests, arrêt propre)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.is_pending(*self.status().keys()):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # regroupe les écritures arrivées pendant la fenêtre de coalescence
+                oldest = min(j.submitted for j in self._pending.values())
+                delay = self.coalesce_seconds - (time.monotonic() - oldest)
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                path, job = self._pending.popitem(last=False)
+                self._status[path] = {"state": "writing", "error": None, "at": time.time()}
+            self._process(job)
+
+    def _process(self, job: WriteJob):
+        # une trace par écriture (kind "writer") : durée du push, tentatives, quota GitHub
+        with tracing.run("writer"):
+            with tracing.span("github.write", path=job.path, bytes=len(job.content or "")):
+                self._process_job(job)
+            tracing.github_rate_limit(job.repo)
+
+    def _process_job(self, job: WriteJob):
+        try:
+            new_contents = self._push(job) if job.content is not None else self._delete(job)
+        except Exception as e:
+            logger.warning("Écriture GitHub %s échouée: %s", job.path, e)
+            with self._cond:
+                if job.path not in self._pending:
+                    self._status[job.path] = {"state": FAILED, "error": str(e), "at": time.time()}
+            if job.on_failed:
+                job.on_failed(e)
+            return
+        with self._cond:
+            if new_contents is not None:
+                self._shas[job.path] = new_contents.sha
+            else:
+                self._shas.pop(job.path, None)
+            if job.path not in self._pending:
+                self._status[job.path] = {"state": SYNCED, "error": None, "at": time.time()}
+        if job.on_done:
+            job.on_done(new_contents)
+
+    def _push(self, job: WriteJob):
+        sha = self._shas.get(job.path, job.sha)
+        content = job.content
+        delay = RETRY_DELAY
+        conflicts = 0
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            tracing.count("github.calls")
+            try:
+                if sha:
+                    result = job.repo.update_file(job.path, job.message, content, sha)
+                else:
+                    result = job.repo.create_file(job.path, job.message, content)
+                return result["content"]
+            except Exception as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                if getattr(e, "status", None) in STALE_STATUSES:
+                    # sha périmé : on relit la version distante et on fusionne avant de rejouer ;
+                    # premier conflit rejoué immédiatement, les suivants après backoff
+                    conflicts += 1
+                    tracing.count("sync.conflicts")
+                    remote = fetch_contents(job.repo, job.path)
+                    sha = remote.sha if remote is not None else None
+                    if remote is not None and job.merge is not None:
+                        content = job.merge(remote.decoded_content)
+                    if conflicts == 1:
+                        continue
+                time.sleep(delay)
+                delay *= 2
+
+    def _delete(self, job: WriteJob):
+        sha = self._shas.get(job.path, job.sha) or current_sha(job.repo, job.path)
+        if sha is None:
+            return None  # déjà absent
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                job.repo.delete_file(job.path, job.message, sha)
+                return None
+            except Exception:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                sha = current_sha(job.repo, job.path)
+                if sha is None:
+                    return None
+                time.sleep(RETRY_DELAY * attempt)
+
+def fetch_contents(repo, path: str):
+    try:
+        return repo.get_contents(path)
+    except Exception:
+        return None
+
+def current_sha(repo, path: str) -> Optional[str]:
+    remote = fetch_contents(repo, path)
+    return remote.sha if remote is not None else None
+
+class Outbox:
+    """
+    Lignes enregistrées mais pas encore confirmées par GitHub, une par ligne JSON
+    (`{"seq": n, "row": {...}}`) dans un fichier local : elles survivent à un redémarrage
+    et sont repoussées quand GitHub redevient joignable.
+    `add` renvoie une marque ; `ack(marque)` retire toutes les lignes jusqu'à elle.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._seq = max((e["seq"] for e in self._read()), default=0)
+
+    def _read(self) -> List[dict]:
+        entries = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        logger.warning("Ligne de file d'attente ignorée: %s", line[:80])
+        except OSError:
+            pass
+        return entries
+
+    def add(self, rows: List[dict]) -> int:
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    self._seq += 1
+                    f.write(json.dumps({"seq": self._seq, "row": row}, ensure_ascii=False) + "\n")
+            return self._seq
+
+    def mark(self) -> int:
+        with self._lock:
+            return self._seq
+
+    def ack(self, mark: int):
+        with self._lock:
+            entries = self._read()
+            keep = [e for e in entries if e["seq"] > mark]
+            if len(keep) == len(entries):
+                return
+            if not keep:
+                os.remove(self.path)
+                return
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in keep)
+            os.replace(tmp, self.path)
+
+    def pending(self) -> List[dict]:
+        with self._lock:
+            return [e["row"] for e in self._read()]
+
+    def __len__(self) -> int:
+        return len(self.pending())
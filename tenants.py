@@ -0,0 +1,223 @@
+# tenants.py - Blishko's Mindset : plusieurs journaux dans un même process
+#
+# BLISHKO_MULTI_USER=1 : la clé d'utilisateur vient d'un en-tête d'authentification
+# (BLISHKO_USER_HEADER, posé par le proxy) ou, à défaut, de la barre latérale. Chaque
+# utilisateur a son dossier `users/<clé>/` (données partitionnées, flag d'initialisation,
+# backups, snapshots, file d'attente), en local comme sur GitHub. Sans ce mode, les chemins
+# restent ceux d'un déploiement mono-utilisateur (racine du dépôt).
+#
+# `SharedCache` est le cache de lecture du process, partagé par tous les utilisateurs :
+# les utilisateurs les moins récemment servis sont évincés (toutes leurs entrées d'un coup)
+# au-delà de BLISHKO_CACHE_USERS utilisateurs ou de BLISHKO_CACHE_MB Mo de journaux en
+# mémoire. Un verrou par utilisateur sérialise ses sauvegardes. L'arbre du dépôt
+# (`SharedTree`), lui, est listé une fois pour tous les utilisateurs.
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+import logging
+import os
+import re
+import threading
+import time
+
+import storage
+import sync
+import tracing
+from snapshots import SNAPSHOT_ROOT
+
+logger = logging.getLogger("blishko")
+
+USERS_ROOT = "users"
+DEFAULT_USER = ""  # mode mono-utilisateur : fichiers à la racine
+USER_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_.-]{0,63}$")
+INIT_FLAG = "initialized.flag"
+CACHE_USERS = 500
+CACHE_MB = 256
+
+def enabled() -> bool:
+    # lu à chaque appel (comme storage.layout) : changeable entre deux runs de l'app
+    return os.environ.get("BLISHKO_MULTI_USER") == "1"
+
+def user_header() -> str:
+    return os.environ.get("BLISHKO_USER_HEADER", "X-Forwarded-User")
+
+def user_key(raw: str) -> str:
+    """Clé d'utilisateur normalisée (minuscules ; lettres, chiffres, « _ . - »), sûre comme nom de dossier."""
+    key = (raw or "").strip().lower()
+    if "@" in key:  # e-mail transmis par le proxy d'authentification
+        key = key.replace("@", "_at_")
+    if not USER_PATTERN.match(key) or ".." in key:
+        raise ValueError(f"Clé d'utilisateur invalide : {raw!r}")
+    return key
+
+def user_from_headers(headers: Optional[Mapping[str, str]]) -> Optional[str]:
+    value = (headers or {}).get(user_header())
+    return user_key(value) if value else None
+
+class Tenant:
+    """Chemins d'un utilisateur (relatifs au dossier de l'app et à la racine du dépôt GitHub)."""
+
+    def __init__(self, user: str = DEFAULT_USER, backend: Optional[storage.Storage] = None):
+        self.user = user
+        self.root = f"{USERS_ROOT}/{user}" if user else ""
+        self.backend = backend or storage.get_storage()
+
+    def path(self, name: str) -> str:
+        return f"{self.root}/{name}" if self.root else name
+
+    @property
+    def data_filename(self) -> str:
+        return self.backend.path_for(self.path(storage.DATA_STEM))
+
+    @property
+    def backup_pattern(self) -> str:
+        return self.backend.path_for(self.path(f"{storage.DATA_STEM}_backup_*"))
+
+    @property
+    def init_flag(self) -> str:
+        return self.path(INIT_FLAG)
+
+    @property
+    def outbox_path(self) -> str:
+        return self.path(sync.OUTBOX_FILENAME)
+
+    @property
+    def snapshot_root(self) -> str:
+        return self.path(SNAPSHOT_ROOT)
+
+    def partitions(self) -> storage.Partitions:
+        return storage.Partitions(self.backend, self.path(storage.PARTITION_ROOT))
+
+    def prepare(self):
+        # dossier local de l'utilisateur (les écritures de fichiers n'en créent pas)
+        if self.root:
+            os.makedirs(self.root, exist_ok=True)
+
+def store_bytes(entry: dict) -> int:
+    store = entry.get("store")
+    return store.nbytes(views=True) if store is not None else 0
+
+class SharedCache:
+    """
+    Entrées de cache ({"version", "store", "contents", "checked", ...}) rangées par
+    utilisateur. `put` évince les utilisateurs les moins récemment servis tant que le
+    nombre d'utilisateurs dépasse `max_users` ou que leurs journaux (colonnes et vues
+    DataFrame) dépassent `budget` octets. Ne sont jamais évincés : l'utilisateur qui
+    écrit et ceux pour qui `busy(user)` est vrai (écriture GitHub en cours).
+    """
+
+    def __init__(self, max_users: int = CACHE_USERS, budget: int = CACHE_MB * 1024 * 1024,
+                 busy: Optional[Callable[[str], bool]] = None):
+        self.max_users = max_users
+        self.budget = budget
+        self.busy = busy or (lambda user: False)
+        self.lock = threading.Lock()
+        self._users: "OrderedDict[str, Dict[Hashable, dict]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}  # octets par utilisateur, recalculés à chacun de ses `put`
+        self._locks: Dict[str, threading.RLock] = {}
+        self.evictions = 0
+
+    def entries(self, user: str, touch: bool = True) -> Dict[Hashable, dict]:
+        # entrées d'un utilisateur (à manipuler sous `lock`) ; `touch` : le marque comme
+        # récemment servi (les callbacks du writer lisent sans toucher à l'ordre LRU)
+        if not touch:
+            return self._users.get(user, {})
+        if user not in self._users:
+            self._users[user] = {}
+        self._users.move_to_end(user)
+        return self._users[user]
+
+    def get(self, user: str, key: Hashable) -> Optional[dict]:
+        with self.lock:
+            if user not in self._users:
+                return None
+            entry = self.entries(user).get(key)
+        tracing.count("data_cache.hit" if entry else "data_cache.miss")
+        return entry
+
+    def put(self, user: str, key: Hashable, entry: dict):
+        with self.lock:
+            self.entries(user)[key] = entry
+        self.evict(keep=user)
+
+    def touch(self, user: str, key: Hashable):
+        with self.lock:
+            entry = self.entries(user).get(key)
+            if entry:
+                entry["checked"] = time.monotonic()
+
+    def invalidate(self, user: str, key: Optional[Hashable] = None):
+        with self.lock:
+            if user not in self._users:
+                return
+            if key is None:
+                del self._users[user]
+                self._sizes.pop(user, None)
+            else:
+                self._users[user].pop(key, None)
+
+    def nbytes(self, user: Optional[str] = None) -> int:
+        with self.lock:
+            users = [user] if user is not None else list(self._users)
+            return sum(store_bytes(e) for u in users for e in self._users.get(u, {}).values())
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def evict(self, keep: Optional[str] = None):
+        with self.lock:
+            if keep in self._users:
+                self._sizes[keep] = sum(store_bytes(e) for e in self._users[keep].values())
+            total = sum(self._sizes.get(u, 0) for u in self._users)
+            for user in list(self._users):  # du moins au plus récemment servi
+                if len(self._users) <= self.max_users and total <= self.budget:
+                    break
+                if user == keep or self.busy(user):
+                    continue
+                del self._users[user]
+                size = self._sizes.pop(user, 0)
+                total -= size
+                self.evictions += 1
+                tracing.count("data_cache.evictions")
+                logger.info("Cache : journal de %s évincé (%s Ko)", user or "(défaut)", size // 1024)
+
+    def user_lock(self, user: str) -> threading.RLock:
+        # un verrou par utilisateur, jamais évincé (quelques octets)
+        with self.lock:
+            return self._locks.setdefault(user, threading.RLock())
+
+class SharedTree:
+    """
+    Arbre git du dépôt (chemin -> sha) : une seule copie pour le process, tous les
+    utilisateurs partageant le même dépôt. Les commits du writer y sont reportés
+    (copie à l'écriture : les lecteurs itèrent sans verrou).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tree: Optional[Dict[str, str]] = None
+        self.checked = 0.0
+
+    def get(self, max_age: float) -> Optional[Dict[str, str]]:
+        with self.lock:
+            fresh = self.tree is not None and time.monotonic() - self.checked < max_age
+            return self.tree if fresh else None
+
+    def put(self, tree: Dict[str, str]):
+        with self.lock:
+            self.tree, self.checked = tree, time.monotonic()
+
+    def update(self, path: str, sha: Optional[str]):
+        # sha None : fichier supprimé
+        with self.lock:
+            if self.tree is None:
+                return
+            tree = dict(self.tree)
+            if sha is None:
+                tree.pop(path, None)
+            else:
+                tree[path] = sha
+            self.tree = tree
+
+def cache_limits() -> Dict[str, Any]:
+    return {"max_users": int(os.environ.get("BLISHKO_CACHE_USERS", CACHE_USERS)),
+            "budget": int(float(os.environ.get("BLISHKO_CACHE_MB", CACHE_MB)) * 1024 * 1024)}
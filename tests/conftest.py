@@ -0,0 +1,5 @@
+# modules de l'app à la racine du dépôt (disposition à plat)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
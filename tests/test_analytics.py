@@ -0,0 +1,83 @@
+# Séries, tendances et corrélations des habitudes (analytics.py)
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+from compact import HABIT_COLS
+from storage import typed
+
+def journal(dates, **columns) -> pd.DataFrame:
+    return typed(pd.DataFrame({"Date": pd.to_datetime(dates), **columns}))
+
+# ---------------------------
+# Séries
+# ---------------------------
+def test_streaks_current_and_longest():
+    dates = pd.date_range("2026-01-01", periods=10, freq="D")
+    df = journal(dates, Sport=[1, 1, 1, 0, 1, 1, 1, 1, 0, 1], Reading=[1] * 10, School=[0] * 10)
+    s = analytics.streaks(df)
+    assert (s.loc["Sport", "current"], s.loc["Sport", "longest"]) == (1, 4)
+    assert (s.loc["Reading", "current"], s.loc["Reading", "longest"]) == (10, 10)
+    assert (s.loc["School", "current"], s.loc["School", "longest"]) == (0, 0)
+
+def test_missing_day_breaks_the_streak():
+    df = journal(["2026-01-01", "2026-01-02", "2026-01-04", "2026-01-05"], Prayer=[1, 1, 1, 1])
+    s = analytics.streaks(df)
+    assert (s.loc["Prayer", "current"], s.loc["Prayer", "longest"]) == (2, 2)
+
+def test_streaks_empty_journal():
+    s = analytics.streaks(journal([]))
+    assert list(s.index) == HABIT_COLS and s.to_numpy().sum() == 0
+
+# ---------------------------
+# Tendances
+# ---------------------------
+def test_weekly_trends_start_on_monday():
+    dates = pd.date_range("2026-01-01", "2026-01-14", freq="D")  # jeudi 1er -> mercredi 14
+    df = journal(dates, XP=np.arange(len(dates)) * 10, Phone=2.0, Expenses=1.5, Stocks=1.0, Crypto=-0.25)
+    t = analytics.trends(df, "weekly")
+    assert t["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2025-12-29", "2026-01-05", "2026-01-12"]
+    assert t["Days"].tolist() == [4, 7, 3]
+    assert t["XP"].tolist() == pytest.approx([15.0, 70.0, 120.0])
+    assert t["Expenses"].tolist() == pytest.approx([6.0, 10.5, 4.5])
+    assert t["Net"].tolist() == pytest.approx([3.0, 5.25, 2.25])
+
+def test_monthly_trends_skip_empty_months():
+    df = journal(["2026-01-10", "2026-01-20", "2026-03-05"], XP=[20, 40, 90], Phone=[1.0, 3.0, 2.0])
+    t = analytics.trends(df, "monthly")
+    assert t["Date"].dt.strftime("%Y-%m").tolist() == ["2026-01", "2026-03"]
+    assert t["Days"].tolist() == [2, 1]
+    assert t["XP"].tolist() == pytest.approx([30.0, 90.0])
+    assert t["Phone"].tolist() == pytest.approx([2.0, 2.0])
+
+def test_trends_match_pandas_resample():
+    rng = np.random.default_rng(5)
+    dates = pd.date_range("2020-01-01", periods=900, freq="D")
+    df = journal(dates, XP=rng.integers(0, 101, 900), Expenses=rng.integers(0, 5000, 900) / 100)
+    t = analytics.trends(df, "monthly")
+    expected = df.set_index("Date").resample("MS").agg({"XP": "mean", "Expenses": "sum"})
+    np.testing.assert_allclose(t["XP"], expected["XP"])
+    np.testing.assert_allclose(t["Expenses"], expected["Expenses"])
+
+# ---------------------------
+# Corrélations / cache
+# ---------------------------
+def test_correlations():
+    dates = pd.date_range("2026-01-01", periods=6, freq="D")
+    sport = [1, 0, 1, 0, 1, 0]
+    df = journal(dates, Sport=sport, XP=[80, 20, 80, 20, 80, 20], Phone=[1.0, 5.0, 1.0, 5.0, 1.0, 5.0])
+    corr = analytics.correlations(df)
+    assert corr.loc["Sport", "XP"] == pytest.approx(1.0)
+    assert corr.loc["Sport", "Phone"] == pytest.approx(-1.0)
+    assert np.isnan(corr.loc["School", "XP"])  # habitude jamais cochée : pas de variance
+
+def test_result_cache_memoizes():
+    cache = analytics.ResultCache(size=1)
+    calls = []
+    build = lambda: calls.append(1) or analytics.compute(journal(["2026-01-01"], XP=[10]))
+    first = cache.get((1, None, None), build)
+    assert cache.get((1, None, None), build) is first
+    cache.get((2, None, None), build)
+    cache.get((1, None, None), build)
+    assert len(calls) == 3
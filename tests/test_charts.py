@@ -0,0 +1,71 @@
+# Réduction des longues séries et cache des figures (charts.py)
+import numpy as np
+import pandas as pd
+
+import charts
+
+def series(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"Date": pd.date_range("2010-01-01", periods=n, freq="D"), "Stocks": rng.normal(0, 10, n).cumsum()})
+
+# ---------------------------
+# LTTB
+# ---------------------------
+def test_lttb_keeps_endpoints_and_returns_n_points():
+    df = series(5000)
+    idx = charts.lttb_indices(df["Date"], df["Stocks"], 300)
+    assert len(idx) == 300
+    assert idx[0] == 0 and idx[-1] == len(df) - 1
+    assert np.all(np.diff(idx) > 0)  # ordre chronologique, pas de doublon
+
+def test_lttb_keeps_an_isolated_spike():
+    y = np.zeros(2000)
+    y[1234] = 500.0
+    idx = charts.lttb_indices(np.arange(2000), y, 100)
+    assert 1234 in idx
+
+def test_lttb_short_series_untouched():
+    assert charts.lttb_indices([0, 1, 2], [1, 2, 3], 10).tolist() == [0, 1, 2]
+    assert charts.lttb_indices(np.arange(10), np.arange(10), 2).tolist() == list(range(10))
+
+# ---------------------------
+# Min/max par tranche
+# ---------------------------
+def test_minmax_keeps_global_extremes_and_bounds():
+    df = series(4000, seed=1)
+    y = df["Stocks"].to_numpy()
+    idx = charts.minmax_indices(y, 200)
+    assert len(idx) <= 200
+    assert {0, len(y) - 1, int(y.argmin()), int(y.argmax())} <= set(idx.tolist())
+    assert np.all(np.diff(idx) > 0)
+
+# ---------------------------
+# downsample / WebGL / cache
+# ---------------------------
+def test_downsample_short_frame_returned_as_is():
+    df = series(charts.MAX_POINTS)
+    assert charts.downsample(df, "Date", "Stocks") is df
+
+def test_downsample_keeps_every_column():
+    df = series(3000).assign(Stocks_MA7=lambda d: d["Stocks"].rolling(7, min_periods=1).mean())
+    for method in ("lttb", "minmax"):
+        out = charts.downsample(df, "Date", "Stocks", method, max_points=120)
+        assert len(out) <= 120
+        assert list(out.columns) == list(df.columns)
+        pd.testing.assert_frame_equal(out, df.loc[out.index])
+
+def test_long_series_chart_is_reduced_and_webgl():
+    df = series(5000)
+    fig = charts.line_chart_with_arrow(df, "Date", "Stocks", "Stocks")
+    assert len(fig.data[0].x) == charts.MAX_POINTS
+    assert fig.data[0].type == "scattergl"
+    assert charts.line_chart_with_arrow(series(30), "Date", "Stocks", "Stocks").data[0].type == "scatter"
+
+def test_figure_cache_lru():
+    cache = charts.FigureCache(size=2)
+    built = []
+    build = lambda key: (lambda: built.append(key) or key)
+    for key in ("a", "b", "a", "c", "b"):
+        cache.get(key, build(key))
+    assert built == ["a", "b", "c", "b"]  # "b" évincé par "c" (le moins récemment utilisé)
+    assert (cache.hits, cache.misses) == (1, 4)
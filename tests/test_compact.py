@@ -0,0 +1,84 @@
+# Représentation compacte : colonnes, format de fichier, score XP et empreinte mémoire (compact.py, store.py)
+import numpy as np
+import pandas as pd
+import pytest
+
+import compact
+import store
+from storage import typed
+
+def journal(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"Date": pd.date_range("2020-01-01", periods=n, freq="D")})
+    for c in compact.HABIT_COLS:
+        df[c] = rng.integers(0, 2, n)
+    df["XP"] = rng.integers(0, 101, n)
+    for c in compact.FIXED_COLS:
+        df[c] = rng.integers(-100_000, 100_000, n) / 100
+    df["Twitch"] = rng.integers(0, 500, n)
+    df["UpdatedAt"] = rng.integers(1_600_000_000_000, 1_800_000_000_000, n)
+    return typed(df)
+
+# ---------------------------
+# Colonnes et fichier
+# ---------------------------
+def test_schema_is_38_bytes_per_row():
+    assert compact.BYTES_PER_ROW == 38
+
+def test_pack_unpack_round_trip():
+    df = journal(500)
+    cols = compact.pack(df)
+    assert {c: str(a.dtype) for c, a in cols.items()} == compact.COMPACT_SCHEMA
+    pd.testing.assert_frame_equal(typed(compact.unpack(cols)), df)
+
+def test_pack_drops_rows_without_date():
+    df = pd.DataFrame({"Date": ["2026-01-01", None], "XP": [10, 20]})
+    assert compact.pack(df)["XP"].tolist() == [10]
+
+def test_pack_row_matches_pack():
+    df = journal(20, seed=3)
+    cols = compact.pack(df)
+    for i, row in enumerate(df.to_dict("records")):
+        packed = compact.pack_row(row)
+        assert packed == {c: cols[c][i].item() for c in compact.COMPACT_SCHEMA}
+        assert compact.unpack_row(cols, i) == row
+
+def test_encode_decode_round_trip():
+    df = journal(1000)
+    raw = compact.encode(df)
+    assert raw.startswith(compact.MAGIC)
+    assert len(raw) < len(df.to_csv(index=False))
+    pd.testing.assert_frame_equal(typed(compact.decode(raw)), df)
+
+def test_decode_rejects_other_files():
+    with pytest.raises(ValueError):
+        compact.decode(b"Date,XP\n2026-01-01,10\n")
+
+# ---------------------------
+# Score XP
+# ---------------------------
+def test_xp_score_rule():
+    all_habits = (1 << len(compact.HABIT_COLS)) - 1
+    scores = compact.xp_score([0, 0, all_habits, all_habits, 0b101], [5.0, compact.PHONE_GOAL, 5.0, 1.0, 2.0])
+    assert scores.tolist() == [0, 12, 87, 100, 37]  # habitudes + écran ≤ objectif, sur 8
+
+def test_habit_bits_and_popcount():
+    bits = compact.habit_bits({"School": 1, "Prayer": True, "Budget": 1, "Sport": 0})
+    assert bits == 0b1000101
+    assert compact.popcount([bits, 0, 255]).tolist() == [3, 0, 8]
+
+# ---------------------------
+# Empreinte mémoire du journal
+# ---------------------------
+def test_store_footprint_after_import_and_append():
+    n = 20_000
+    js = store.JournalStore.from_frame(journal(n))
+    per_row = compact.BYTES_PER_ROW + len(store.DERIVED_COLS) * np.dtype(store.DERIVED_DTYPE).itemsize
+    assert js.nbytes() == n * per_row  # import : capacité ajustée au nombre de lignes
+    js.upsert({"Date": "2100-01-01", "XP": 10})
+    capacity = len(js._cols["Day"])
+    assert capacity - n - 1 <= max(n * (store.GROWTH_FACTOR - 1), store.INITIAL_CAPACITY)
+    assert js.nbytes() == capacity * per_row
+    assert js.nbytes(views=True) == js.nbytes()  # aucune vue en cache après modification
+    view = js.frame("2099-12-01")
+    assert js.nbytes(views=True) == js.nbytes() + view.size * store.VIEW_ITEMSIZE
@@ -0,0 +1,125 @@
+# Export versionné des statistiques et serveur ETag (export.py)
+import http.client
+import json
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import export
+from charts import MAX_POINTS
+from storage import typed
+
+def journal(n: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(2)
+    return typed(pd.DataFrame({
+        "Date": pd.date_range("2025-01-01", periods=n, freq="D"),
+        "Sport": rng.integers(0, 2, n), "XP": rng.integers(0, 101, n), "Phone": rng.integers(0, 600, n) / 100,
+        "Weight": rng.integers(7000, 8000, n) / 100, "Stocks": rng.integers(-2000, 2000, n) / 100,
+        "Expenses": rng.integers(0, 5000, n) / 100,
+    }))
+
+def publish_files(root: str, df: pd.DataFrame) -> bool:
+    return export.publish(root, export.build(df, (1000.0, 500.0)))
+
+# ---------------------------
+# Contenu et publication
+# ---------------------------
+def test_build_version_depends_only_on_content():
+    df = journal()
+    payload = export.build(df)
+    assert payload["schema"] == export.SCHEMA
+    assert export.build(df.copy())["version"] == payload["version"]
+    assert export.content_version({**payload, "generated_at": "plus tard"}) == payload["version"]
+    df.loc[10, "Expenses"] += 1
+    assert export.build(df)["version"] != payload["version"]
+
+def test_build_payload_is_strict_json():
+    payload = export.build(journal(3))  # corrélations sans variance : NaN -> null
+    assert json.loads(json.dumps(payload, allow_nan=False))["range"]["days"] == 3
+
+def test_build_series_are_downsampled():
+    series = export.build(journal(3000))["series"]
+    assert len(series["Stocks"]["x"]) <= MAX_POINTS
+    assert len(series["Stocks"]["ma7"]) == len(series["Stocks"]["y"])
+
+def test_publish_skips_unchanged_version(tmp_path):
+    root = str(tmp_path / "export")
+    df = journal()
+    assert publish_files(root, df)
+    stat = os.stat(os.path.join(root, export.JSON_NAME))
+    assert not publish_files(root, df)
+    assert os.stat(os.path.join(root, export.JSON_NAME)).st_mtime_ns == stat.st_mtime_ns
+    df.loc[0, "XP"] = 0 if df.loc[0, "XP"] else 100
+    assert publish_files(root, df)
+    assert export.published_version(root) == export.build(df, (1000.0, 500.0))["version"]
+
+def test_export_files_etag_follows_content(tmp_path):
+    files = export.ExportFiles(str(tmp_path))
+    assert files.get("stats.json") is None
+    (tmp_path / "stats.json").write_bytes(b'{"version": "a"}')
+    data, etag = files.get("stats.json")
+    assert data == b'{"version": "a"}' and etag.startswith('"')
+    assert files.get("stats.json") == (data, etag)
+    (tmp_path / "stats.json").write_bytes(b'{"version": "bb"}')
+    assert files.get("stats.json")[1] != etag
+
+# ---------------------------
+# URLs et serveur
+# ---------------------------
+def test_resolve():
+    assert export.resolve("/") == "export/index.html"
+    assert export.resolve("/stats.json?x=1") == "export/stats.json"
+    assert export.resolve("/alice/stats.json", "alice") == "users/alice/export/stats.json"
+    assert export.resolve("/alice/", "bob") is None
+    assert export.resolve("/alice/") is None
+    assert export.resolve("/../secret/stats.json", "alice") is None
+    assert export.resolve("/a/b/stats.json", "a") is None
+
+@pytest.fixture
+def server(tmp_path):
+    publish_files(str(tmp_path / "export"), journal())
+    publish_files(str(tmp_path / "users" / "alice" / "export"), journal(50))
+    started = []
+
+    def start(users: bool):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), export.make_handler(export.ExportFiles(str(tmp_path)), users))
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        started.append(httpd)
+        return httpd.server_address[1]
+    yield start
+    for httpd in started:
+        httpd.shutdown()
+        httpd.server_close()
+
+def get(port: int, path: str, **headers):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers=headers)
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp.status, resp.getheader("ETag"), body
+
+def test_server_etag_and_304(server):
+    port = server(users=False)
+    status, etag, body = get(port, "/stats.json")
+    assert status == 200 and json.loads(body)["schema"] == export.SCHEMA
+    status, etag2, body = get(port, "/stats.json", **{"If-None-Match": etag})
+    assert (status, etag2, body) == (304, etag, b"")
+    assert get(port, "/stats.json", **{"If-None-Match": '"autre"'})[0] == 200
+    assert get(port, "/")[0] == 200
+
+def test_server_user_exports(server, monkeypatch):
+    monkeypatch.delenv("BLISHKO_USER_HEADER", raising=False)
+    port = server(users=True)
+    assert get(port, "/alice/stats.json", **{"X-Forwarded-User": "alice"})[0] == 200
+    assert get(port, "/alice/stats.json", **{"X-Forwarded-User": "bob"})[0] == 404
+    assert get(port, "/alice/stats.json")[0] == 404
+    assert get(port, "/alice/../../export/stats.json", **{"X-Forwarded-User": "alice"})[0] == 404
+
+def test_server_without_users_flag_hides_user_exports(server):
+    port = server(users=False)
+    assert get(port, "/alice/stats.json", **{"X-Forwarded-User": "alice"})[0] == 404
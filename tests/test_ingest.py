@@ -0,0 +1,33 @@
+# Import en masse (ingest.py) : préparation des lignes et fusion dans les données locales
+import pandas as pd
+
+import compact
+import ingest
+import storage
+
+def test_keep_xp_stays_aligned_after_a_bad_date():
+    raw = pd.DataFrame({"Date": ["2026-01-01", "garbage", "2026-01-03", "2026-01-04"], "XP": [10, 20, 30, 40]})
+    df = ingest.prepare(raw, keep_xp=True, at=1)
+    assert df["Date"].dt.day.tolist() == [1, 3, 4]
+    assert df["XP"].tolist() == [10, 30, 40]
+
+def test_xp_recomputed_and_last_duplicate_wins():
+    raw = pd.DataFrame({"Date": ["2026-01-01", "2026-01-02", "2026-01-01"], "Phone": [5.0, 1.0, 1.0],
+                        "Sport": ["oui", "", "x"], "XP": [99, 99, 99]})
+    df = ingest.prepare(raw, at=7)
+    habits = compact.pack(df)["Habits"]
+    assert df["XP"].tolist() == compact.xp_score(habits, df["Phone"].to_numpy()).tolist()
+    assert df["Sport"].tolist() == [1, 0] and df["Phone"].tolist() == [1.0, 1.0]
+    assert (df["UpdatedAt"] == 7).all()
+
+def test_ingest_merges_into_local_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = storage.CsvStorage()
+    path = backend.path_for(storage.DATA_STEM)
+    backend.write(path, storage.ensure_columns(pd.DataFrame([{"Date": "2026-01-01", "XP": 12, "UpdatedAt": 1},
+                                                             {"Date": "2026-01-05", "XP": 50, "UpdatedAt": 1}])))
+    new = ingest.prepare(pd.DataFrame({"Date": ["2026-01-01", "2026-01-02"], "Phone": [1.0, 1.0]}), at=2)
+    assert ingest.ingest(new, backend, layout="single") == path
+    merged = backend.read(path)
+    assert merged["Date"].dt.day.tolist() == [1, 2, 5]
+    assert merged["UpdatedAt"].tolist() == [2, 2, 1]
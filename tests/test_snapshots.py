@@ -0,0 +1,112 @@
+# Snapshots dédupliqués et restauration partielle (snapshots.py)
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import snapshots
+from storage import CsvStorage, typed
+
+def journal(start: str = "2026-01-01", periods: int = 90, xp: int = 50) -> pd.DataFrame:
+    dates = pd.date_range(start, periods=periods, freq="D")
+    return typed(pd.DataFrame({"Date": dates, "XP": xp, "Stocks": [i * 1.5 for i in range(periods)], "UpdatedAt": 1}))
+
+class DeferredFiles(snapshots.LocalFiles):
+    """Écritures des blocs différées (comme la file GitHub) ; `fail` : blocs refusés."""
+
+    def __init__(self, base: str, fail: bool = False):
+        super().__init__(base)
+        self.fail = fail
+        self.pending = []
+
+    def write(self, path, data, message="", on_done=None, on_failed=None):
+        if "/chunks/" not in path:
+            return super().write(path, data, message, on_done, on_failed)
+        self.pending.append((path, data, on_done, on_failed))
+
+    def flush(self):
+        for path, data, on_done, on_failed in self.pending:
+            if self.fail:
+                on_failed(OSError("refusé"))
+            else:
+                super().write(path, data, on_done=on_done)
+        self.pending = []
+
+# ---------------------------
+# Création
+# ---------------------------
+def test_unchanged_months_are_not_rewritten(tmp_path):
+    snaps = snapshots.Snapshots(snapshots.LocalFiles(str(tmp_path)))
+    df = journal()  # janvier, février, mars
+    first = snaps.create(df, at=datetime(2026, 4, 1))
+    assert first["new_chunks"] == 3
+    assert snaps.create(df, at=datetime(2026, 4, 2))["new_chunks"] == 0
+    df.loc[df["Date"] == "2026-03-10", "XP"] = 99
+    third = snaps.create(df, at=datetime(2026, 4, 3))
+    assert third["new_chunks"] == 1
+    assert len(list((tmp_path / "snapshots" / "chunks").iterdir())) == 4
+    assert [s["id"] for s in snaps.list_snapshots()] == ["20260401_000000", "20260402_000000", "20260403_000000"]
+    assert snaps.storage_bytes() == sum(p.stat().st_size for p in (tmp_path / "snapshots" / "chunks").iterdir())
+
+def test_same_second_gets_a_suffix(tmp_path):
+    snaps = snapshots.Snapshots(snapshots.LocalFiles(str(tmp_path)))
+    at = datetime(2026, 4, 1, 12)
+    snaps.create(journal(periods=3), at=at)
+    assert snaps.create(journal(periods=3), at=at)["id"] == "20260401_120000_2"
+
+def test_empty_journal_creates_nothing(tmp_path):
+    snaps = snapshots.Snapshots(snapshots.LocalFiles(str(tmp_path)))
+    assert snaps.create(journal(periods=0)) is None
+    assert snaps.latest() is None
+
+def test_encode_chunk_is_canonical():
+    df = journal(periods=10)
+    assert snapshots.encode_chunk(df) == snapshots.encode_chunk(df.iloc[::-1])
+
+# ---------------------------
+# Écritures différées / en échec
+# ---------------------------
+def test_index_written_once_chunks_confirmed(tmp_path):
+    files = DeferredFiles(str(tmp_path))
+    snaps = snapshots.Snapshots(files)
+    snaps.create(journal(), at=datetime(2026, 4, 1))
+    assert snapshots.Snapshots(snapshots.LocalFiles(str(tmp_path))).latest() is None
+    files.flush()
+    assert snapshots.Snapshots(snapshots.LocalFiles(str(tmp_path))).latest()["id"] == "20260401_000000"
+
+def test_failed_chunk_never_indexed(tmp_path):
+    files = DeferredFiles(str(tmp_path), fail=True)
+    snaps = snapshots.Snapshots(files)
+    snaps.create(journal(), at=datetime(2026, 4, 1))
+    files.flush()
+    assert snaps.latest() is None
+    assert not (tmp_path / "snapshots" / "index.json").exists()
+
+# ---------------------------
+# Restauration
+# ---------------------------
+def test_restore_window_reads_only_overlapping_chunks(tmp_path):
+    files = snapshots.LocalFiles(str(tmp_path))
+    snaps = snapshots.Snapshots(files)
+    df = journal()
+    snap = snaps.create(df, at=datetime(2026, 4, 1))
+    pd.testing.assert_frame_equal(snaps.restore(snap), df)
+    january = snaps.get(snap)["months"]["2026-01"]["hash"]
+    (tmp_path / snaps.chunk_path(january)).unlink()  # janvier hors fenêtre : jamais lu
+    window = snaps.restore(snap["id"], "2026-02-27", "2026-03-02")
+    assert window["Date"].dt.strftime("%m-%d").tolist() == ["02-27", "02-28", "03-01", "03-02"]
+    with pytest.raises(FileNotFoundError):
+        snaps.restore(snap)
+    with pytest.raises(KeyError):
+        snaps.restore("19700101_000000")
+
+def test_import_backups(tmp_path):
+    old = str(tmp_path / "data_2026_backup_20260101_080000.csv")
+    new = str(tmp_path / "data_2026_backup_20260201_080000.csv")
+    CsvStorage().write(old, journal(periods=20))
+    CsvStorage().write(new, journal(periods=40))
+    snaps = snapshots.Snapshots(snapshots.LocalFiles(str(tmp_path / "store")))
+    created = snapshots.import_backups(snaps, [new, old])
+    assert [s["id"] for s in created] == ["20260101_080000", "20260201_080000"]
+    assert [s["new_chunks"] for s in created] == [1, 2]  # janvier complet réécrit, février nouveau
+    assert len(snaps.restore(snaps.latest())) == 40
@@ -0,0 +1,103 @@
+# Backends de stockage, migration et partitions mensuelles (storage.py)
+import os
+
+import pandas as pd
+import pytest
+
+import storage
+
+def journal(n: int = 40, start: str = "2026-01-20") -> pd.DataFrame:
+    dates = pd.date_range(start, periods=n, freq="D")
+    return storage.typed(pd.DataFrame({
+        "Date": dates,
+        "School": [i % 2 for i in range(n)],
+        "Sport": [(i // 3) % 2 for i in range(n)],
+        "XP": [i % 101 for i in range(n)],
+        "Phone": [round(1.25 + (i % 7) * 0.5, 2) for i in range(n)],
+        "Stocks": [round(1000 + i * 12.34, 2) for i in range(n)],
+        "Expenses": [round((i % 5) * 9.99, 2) for i in range(n)],
+        "Twitch": [i * 3 for i in range(n)],
+        "UpdatedAt": [1_700_000_000_000 + i for i in range(n)],
+    }))
+
+def same(a: pd.DataFrame, b: pd.DataFrame):
+    pd.testing.assert_frame_equal(storage.typed(a), storage.typed(b), check_dtype=False)
+
+# ---------------------------
+# Aller-retour par backend
+# ---------------------------
+@pytest.mark.parametrize("name", sorted(storage.BACKENDS))
+def test_backend_round_trip(tmp_path, name):
+    backend = storage.get_storage(name)
+    path = backend.path_for(str(tmp_path / "data_2026"))
+    df = journal()
+    backend.write(path, df)
+    same(backend.read(path), df)
+    assert isinstance(storage.storage_for_path(path), storage.BACKENDS[name])
+
+@pytest.mark.parametrize("name", ["csv", "parquet", "compact"])
+def test_remote_backends_encode_decode(name):
+    backend = storage.get_storage(name)
+    df = journal(5)
+    same(backend.decode(backend.encode(df)), df)
+
+def test_unknown_backend_and_extension():
+    with pytest.raises(ValueError):
+        storage.get_storage("xml")
+    with pytest.raises(ValueError):
+        storage.storage_for_path("data_2026.xlsx")
+
+@pytest.mark.parametrize("name", sorted(storage.BACKENDS))
+def test_upsert_replaces_one_day(tmp_path, name):
+    backend = storage.get_storage(name)
+    path = backend.path_for(str(tmp_path / "data_2026"))
+    df = journal(10)
+    backend.write(path, df)
+    backend.upsert(path, [{"Date": "2026-01-22", "XP": 99, "Phone": 2.5, "UpdatedAt": 1_800_000_000_000},
+                         {"Date": "2026-03-01", "XP": 7, "UpdatedAt": 1_800_000_000_000}])
+    out = backend.read(path)
+    assert len(out) == 11
+    assert out.loc[out["Date"] == "2026-01-22", "XP"].tolist() == [99]
+    assert out["Date"].is_monotonic_increasing
+
+# ---------------------------
+# Migration
+# ---------------------------
+@pytest.mark.parametrize("target", ["parquet", "compact", "sqlite"])
+def test_migrate_from_csv(tmp_path, monkeypatch, target):
+    monkeypatch.chdir(tmp_path)
+    df = journal()
+    storage.CsvStorage().write("data_2026.csv", df)
+    written = storage.migrate(["data_2026.csv"], target, remove=True)
+    assert written == [storage.get_storage(target).path_for("data_2026")]
+    assert not os.path.exists("data_2026.csv")
+    same(storage.storage_for_path(written[0]).read(written[0]), df)
+
+def test_migrate_skips_same_backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage.CsvStorage().write("data_2026.csv", journal(3))
+    assert storage.migrate(["data_2026.csv"], "csv") == []
+
+# ---------------------------
+# Partitions
+# ---------------------------
+def test_partitions_write_read_window(tmp_path):
+    parts = storage.Partitions(storage.CsvStorage(), str(tmp_path / "data"))
+    df = journal()  # 2026-01-20 -> 2026-02-28
+    manifest = parts.write_all(df)
+    assert sorted(manifest["partitions"]) == ["2026-01", "2026-02"]
+    assert manifest["partitions"]["2026-01"]["rows"] == 12
+    same(parts.read(), df)
+    window = parts.read("2026-02-01", "2026-02-10")
+    assert window["Date"].dt.day.tolist() == list(range(1, 11))
+
+def test_partitions_upsert_and_archive(tmp_path):
+    parts = storage.Partitions(storage.CsvStorage(), str(tmp_path / "data"))
+    parts.write_all(journal())
+    manifest = parts.upsert([{"Date": "2026-03-02", "XP": 40, "Stocks": 5.5}])
+    assert manifest["partitions"]["2026-03"]["rows"] == 1
+    assert storage.Partitions.expired(manifest, "2026-02-15") == ["2026-01"]
+    manifest = parts.archive(["2026-01"])
+    assert "2026-01" in manifest["archived"] and "2026-01" not in manifest["partitions"]
+    assert os.path.exists(parts.archive_path("2026-01"))
+    assert parts.read()["Date"].min() == pd.Timestamp("2026-02-01")
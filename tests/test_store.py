@@ -0,0 +1,86 @@
+# Journal en mémoire indexé par date (store.py)
+import pandas as pd
+
+from store import JournalStore
+
+def day(date: str, updated: int = 1, **values) -> dict:
+    return {"Date": date, "XP": 50, "Phone": 2.0, "UpdatedAt": updated, **values}
+
+def dates(rows) -> list:
+    return [r["Date"].strftime("%Y-%m-%d") for r in rows]
+
+# ---------------------------
+# Upsert
+# ---------------------------
+def test_upsert_keeps_dates_sorted_in_any_order():
+    store = JournalStore(capacity=2)  # force plusieurs agrandissements
+    for d in ("2026-01-05", "2026-01-01", "2026-01-09", "2026-01-03", "2026-01-07"):
+        store.upsert(day(d))
+    assert len(store) == 5
+    assert dates(store) == ["2026-01-01", "2026-01-03", "2026-01-05", "2026-01-07", "2026-01-09"]
+
+def test_upsert_same_day_replaces_row():
+    store = JournalStore()
+    store.upsert(day("2026-01-02", XP=25, Stocks=10.5))
+    version = store.version
+    store.upsert(day("2026-01-02", XP=75, Stocks=-3.25))
+    assert len(store) == 1
+    row = store.get("2026-01-02")
+    assert (row["XP"], row["Stocks"]) == (75, -3.25)
+    assert store.version > version
+
+def test_upsert_retroactive_day_shifts_following_rows():
+    store = JournalStore()
+    store.upsert_many([day("2026-01-01", XP=10), day("2026-01-03", XP=30)])
+    store.upsert(day("2026-01-02", XP=20))
+    assert [r["XP"] for r in store] == [10, 20, 30]
+
+# ---------------------------
+# Import en masse
+# ---------------------------
+def test_import_rows_latest_update_wins():
+    store = JournalStore()
+    store.upsert_many([day("2026-01-01", 200, XP=75), day("2026-01-02", 100, XP=25)])
+    store.import_rows([day("2026-01-01", 100, XP=12), day("2026-01-02", 300, XP=87), day("2026-01-03", 100)])
+    assert [r["XP"] for r in store] == [75, 87, 50]
+
+def test_import_rows_tie_prefers_imported_row():
+    store = JournalStore()
+    store.upsert(day("2026-01-01", 5, XP=12))
+    store.import_rows(pd.DataFrame([day("2026-01-01", 5, XP=62)]))
+    assert store.get("2026-01-01")["XP"] == 62
+
+def test_import_rows_empty_is_a_no_op():
+    store = JournalStore.from_frame(pd.DataFrame([day("2026-01-01")]))
+    version = store.version
+    store.import_rows([])
+    assert len(store) == 1 and store.version == version
+
+# ---------------------------
+# Lecture
+# ---------------------------
+def test_get_previous_last():
+    store = JournalStore()
+    store.upsert_many([day("2026-01-01", XP=10), day("2026-01-04", XP=40)])
+    assert store.get("2026-01-02") is None
+    assert store.previous("2026-01-04")["XP"] == 10
+    assert store.previous("2026-01-03")["XP"] == 10
+    assert store.previous("2026-01-01") is None
+    assert store.last()["XP"] == 40
+    assert JournalStore().last() is None
+
+def test_range_and_frame_window():
+    store = JournalStore.from_frame(pd.DataFrame([day(f"2026-01-{d:02d}", XP=d) for d in range(1, 21)]))
+    assert dates(store.range("2026-01-05", "2026-01-07")) == ["2026-01-05", "2026-01-06", "2026-01-07"]
+    df = store.frame("2026-01-18")
+    assert df["XP"].tolist() == [18, 19, 20]
+    assert store.frame("2026-01-18") is df  # même plage, pas de modification : vue en cache
+    assert store.frame("2026-02-01").empty
+    assert store.column("XP", end="2026-01-02").tolist() == [1, 2]
+
+def test_frame_is_rebuilt_after_upsert():
+    store = JournalStore.from_frame(pd.DataFrame([day("2026-01-01", XP=10)]))
+    df = store.frame()
+    df.loc[0, "XP"] = 99  # la vue rendue ne partage pas la mémoire du journal
+    store.upsert(day("2026-01-02", XP=20))
+    assert store.frame()["XP"].tolist() == [10, 20]
@@ -0,0 +1,81 @@
+# Agrégats incrémentaux et moyennes mobiles (summary.py, store.py)
+import math
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import summary
+from store import JournalStore
+from storage import typed
+
+def journal(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return typed(pd.DataFrame([{
+        "Date": pd.Timestamp("2026-01-15") + pd.Timedelta(days=i),
+        "XP": rng.randint(0, 100),
+        "Phone": rng.randint(0, 800) / 100,
+        "Stocks": rng.randint(-5000, 5000) / 100,
+        "Crypto": rng.randint(-5000, 5000) / 100,
+        "Expenses": rng.randint(0, 9000) / 100,
+    } for i in range(n)]))
+
+def assert_same(a: summary.Summary, b: summary.Summary):
+    assert a.count == b.count
+    assert a.months.keys() == b.months.keys()
+    for c in summary.SUM_COLS:
+        assert a.total(c) == pytest.approx(b.total(c))
+        for key in a.months:
+            assert a.month(key)[c] == pytest.approx(b.month(key)[c])
+
+def test_incremental_summary_matches_from_frame():
+    df = journal(60)
+    store = JournalStore()
+    for i in np.random.default_rng(3).permutation(len(df)):  # ordre de saisie quelconque
+        store.upsert(df.iloc[i].to_dict())
+    assert_same(store.summary, summary.Summary.from_frame(df))
+
+def test_replace_updates_totals_and_roi():
+    df = journal(40)
+    store = JournalStore.from_frame(df)
+    edit = {**df.iloc[10].to_dict(), "Stocks": 1234.5, "Crypto": -0.5}
+    store.upsert(edit)
+    df.loc[10, ["Stocks", "Crypto"]] = [1234.5, -0.5]
+    expected = summary.Summary.from_frame(df)
+    assert_same(store.summary, expected)
+    assert store.summary.net_gain == pytest.approx(df["Stocks"].sum() + df["Crypto"].sum())
+    assert store.summary.roi(1000) == pytest.approx(expected.net_gain / 10)
+    assert store.summary.roi(0) is None
+    assert store.summary.mean("XP") == pytest.approx(df["XP"].mean())
+
+def test_summary_from_months_matches_from_frame():
+    full = summary.Summary.from_frame(journal(90))
+    assert_same(summary.Summary.from_months(full.months), full)
+
+def test_empty_summary():
+    empty = summary.Summary.from_frame(journal(0))
+    assert empty.count == 0 and math.isnan(empty.mean("XP"))
+
+def test_removing_last_row_of_a_month_drops_the_month():
+    s = summary.Summary()
+    row = {"Date": "2026-03-04", "XP": 10, "Stocks": 2.0}
+    s.add(row)
+    s.add(row, -1)
+    assert s.month("2026-03") is None and s.count == 0
+
+def test_incremental_rolling_matches_pandas():
+    df = journal(50)
+    store = JournalStore()
+    order = list(range(len(df)))
+    random.Random(1).shuffle(order)
+    for i in order:
+        store.upsert(df.iloc[i].to_dict())
+    store.upsert({**df.iloc[20].to_dict(), "Expenses": 500.0})  # modification au milieu
+    df.loc[20, "Expenses"] = 500.0
+    expected = summary.add_rolling(df)
+    view = store.frame(derived=True)
+    for c in summary.ROLLING_COLS:
+        col = summary.rolling_col(c)
+        np.testing.assert_allclose(view[col], expected[col], atol=0.01)
+        np.testing.assert_allclose(store.column(col), expected[col], atol=0.01)
@@ -0,0 +1,165 @@
+# Fusion des versions concurrentes, file d'attente hors ligne et acquittement (storage.py, sync.py)
+import hashlib
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import storage
+import sync
+
+def day(date: str, updated: int, **values) -> dict:
+    return {"Date": date, "XP": 50, "Phone": 2.0, "UpdatedAt": updated, **values}
+
+def frame(*rows) -> pd.DataFrame:
+    return storage.ensure_columns(pd.DataFrame(list(rows)))
+
+# ---------------------------
+# Fusion ligne à ligne
+# ---------------------------
+def test_reconcile_keeps_latest_update_per_day():
+    local = frame(day("2026-01-01", 200, XP=75), day("2026-01-02", 100, XP=25))
+    remote = frame(day("2026-01-01", 100, XP=12), day("2026-01-02", 300, XP=87), day("2026-01-03", 100))
+    merged = storage.reconcile(local, remote)
+    assert merged["XP"].tolist() == [75, 87, 50]  # local plus récent, distant plus récent, journée distante seule
+
+def test_reconcile_with_empty_side():
+    rows = frame(day("2026-01-01", 1))
+    assert storage.reconcile(rows, frame()) is rows
+    assert storage.reconcile(frame(), rows) is rows
+
+def test_latest_rows_tie_keeps_last_seen():
+    rows = frame(day("2026-01-01", 5, XP=12), day("2026-01-01", 5, XP=62), day("2026-01-01", 4, XP=100))
+    assert storage.latest_rows(rows)["XP"].tolist() == [62]
+
+def test_merge_journal_text_is_a_union():
+    a, b, c = (storage.journal_record(day(f"2026-01-0{i}", i)) for i in (1, 2, 3))
+    merged = storage.merge_journal_text(a + b.rstrip("\n"), b + c)
+    assert merged == a + b + c
+    assert storage.replay_journal(frame(), merged)["Date"].dt.day.tolist() == [1, 2, 3]
+
+def test_unsynced_skips_days_already_newer_on_remote():
+    queued = frame(day("2026-01-01", 200), day("2026-01-02", 200), day("2026-01-03", 200))
+    remote = frame(day("2026-01-01", 100), day("2026-01-02", 300))
+    assert storage.unsynced(queued, remote)["Date"].dt.day.tolist() == [1, 3]
+    assert storage.unsynced(queued, frame()).shape[0] == 3  # rien sur GitHub : tout est à pousser
+
+# ---------------------------
+# File d'attente locale
+# ---------------------------
+def test_outbox_ack_up_to_mark(tmp_path):
+    path = str(tmp_path / sync.OUTBOX_FILENAME)
+    outbox = sync.Outbox(path)
+    first = outbox.add([day("2026-01-01", 1), day("2026-01-02", 2)])
+    second = outbox.add([day("2026-01-03", 3)])
+    assert (first, second, outbox.mark(), len(outbox)) == (2, 3, 3, 3)
+    outbox.ack(first)
+    assert [r["Date"] for r in outbox.pending()] == ["2026-01-03"]
+    outbox.ack(second)
+    assert len(outbox) == 0 and not (tmp_path / sync.OUTBOX_FILENAME).exists()
+    outbox.ack(second)  # rien à retirer
+
+def test_outbox_survives_restart(tmp_path):
+    path = str(tmp_path / sync.OUTBOX_FILENAME)
+    sync.Outbox(path).add([day("2026-01-01", 1)])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("{tronqué\n")  # écriture interrompue
+    reopened = sync.Outbox(path)
+    assert [r["Date"] for r in reopened.pending()] == ["2026-01-01"]
+    assert reopened.add([day("2026-01-02", 2)]) == 2  # la numérotation continue
+
+# ---------------------------
+# Writer GitHub : conflits et acquittement
+# ---------------------------
+class Conflict(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+class Blob:
+    def __init__(self, raw: bytes):
+        self.decoded_content = raw
+        self.sha = hashlib.sha1(raw + str(time.time_ns()).encode()).hexdigest()
+
+class Remote:
+    """Dépôt en mémoire (create_file / update_file / get_contents de PyGithub)."""
+
+    def __init__(self, fail: bool = False):
+        self.files = {}
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def get_contents(self, path):
+        if path not in self.files:
+            raise Conflict(404)
+        return self.files[path]
+
+    def _put(self, path, content):
+        blob = self.files[path] = Blob(content.encode() if isinstance(content, str) else content)
+        return {"content": blob}
+
+    def create_file(self, path, message, content):
+        with self.lock:
+            if self.fail:
+                raise Conflict(500)
+            if path in self.files:
+                raise Conflict(422)
+            return self._put(path, content)
+
+    def update_file(self, path, message, content, sha):
+        with self.lock:
+            if self.fail:
+                raise Conflict(500)
+            if self.files.get(path) is None or self.files[path].sha != sha:
+                raise Conflict(409)
+            return self._put(path, content)
+
+@pytest.fixture
+def writer(monkeypatch):
+    monkeypatch.setattr(sync, "RETRY_DELAY", 0.0)
+    return sync.WriteBehind(coalesce_seconds=0.0)
+
+def test_conflict_merges_remote_lines(writer, tmp_path):
+    remote = Remote()
+    other = storage.journal_record(day("2026-01-01", 100))
+    remote._put("journal.jsonl", other)  # écrit par un autre appareil, sha inconnu ici
+    mine = storage.journal_record(day("2026-01-02", 200))
+    outbox = sync.Outbox(str(tmp_path / sync.OUTBOX_FILENAME))
+    mark = outbox.add([json.loads(mine)])
+    done = []
+
+    def on_done(cf):
+        done.append(cf)
+        outbox.ack(mark)
+    writer.submit(sync.WriteJob(remote, "journal.jsonl", mine, "Journal", sha=None, on_done=on_done,
+                                merge=lambda raw: storage.merge_journal_text(raw.decode("utf-8"), mine)))
+    assert writer.flush(5)
+    assert remote.files["journal.jsonl"].decoded_content.decode() == other + mine
+    assert done and len(outbox) == 0
+    assert writer.overall() == sync.SYNCED
+
+def test_failed_push_keeps_queue(writer, tmp_path):
+    remote = Remote(fail=True)
+    outbox = sync.Outbox(str(tmp_path / sync.OUTBOX_FILENAME))
+    mark = outbox.add([day("2026-01-01", 1)])
+    failed = []
+    writer.submit(sync.WriteJob(remote, "data.csv", "x", "Update", on_done=lambda cf: outbox.ack(mark), on_failed=failed.append))
+    assert writer.flush(5)
+    assert failed and len(outbox) == 1
+    assert writer.overall() == sync.FAILED
+
+def test_settled_statuses_expire(writer, monkeypatch):
+    writer.submit(sync.WriteJob(Remote(fail=True), "snapshots/chunks/x.csv.gz", b"x", "Chunk"))
+    assert writer.flush(5) and writer.overall() == sync.FAILED
+    monkeypatch.setattr(sync, "STATUS_TTL", -1)
+    assert writer.overall() is None
+
+def test_overall_scoped_to_user_folder(writer):
+    writer.submit(sync.WriteJob(Remote(fail=True), "users/bob/data/2026-01.csv", "x", "Update"))
+    writer.submit(sync.WriteJob(Remote(), "users/alice/data/2026-01.csv", "x", "Update"))
+    assert writer.flush(5)
+    assert writer.overall("users/alice/") == sync.SYNCED
+    assert writer.overall("users/bob/") == sync.FAILED
+    assert writer.overall("users/carol/") is None
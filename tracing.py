@@ -0,0 +1,190 @@
+# tracing.py - Blishko's Mindset : spans et compteurs par rerun
+#
+# Une trace par rerun (ou par écriture du writer) : spans nommés imbriqués, compteurs,
+# puis un enregistrement JSONL à la fin. Sans trace active, `span` ne coûte presque rien.
+# Stdlib uniquement, utilisable depuis storage / store / sync.
+from typing import Optional, Callable, Dict, List, Any
+from collections import deque
+from contextlib import contextmanager
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger("blishko")
+
+LOG_MAX_BYTES = 5 * 1024 * 1024  # rotation du fichier JSONL (un seul .1 conservé)
+HISTORY_SIZE = 200  # reruns gardés en mémoire pour les percentiles
+
+_trace: contextvars.ContextVar = contextvars.ContextVar("blishko_trace", default=None)
+_parent: contextvars.ContextVar = contextvars.ContextVar("blishko_span", default=None)
+_sinks: List[Callable[[dict], None]] = []
+
+class Trace:
+    def __init__(self, kind: str = "rerun", session: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.session = session
+        self.at = time.time()
+        self.t0 = time.perf_counter()
+        self.spans: List[dict] = []
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self) -> dict:
+        return {"trace": self.id, "kind": self.kind, "session": self.session, "at": self.at,
+                "ms": round((time.perf_counter() - self.t0) * 1000, 3),
+                "spans": [dict(s) for s in self.spans], "counters": dict(self.counters)}
+
+def start(kind: str = "rerun", session: Optional[str] = None) -> Trace:
+    t = Trace(kind, session)
+    _trace.set(t)
+    _parent.set(None)
+    return t
+
+def current() -> Optional[Trace]:
+    return _trace.get()
+
+def finish() -> Optional[dict]:
+    # clôt la trace active et la transmet aux sinks (fichier JSONL, historique)
+    t = _trace.get()
+    if t is None:
+        return None
+    _trace.set(None)
+    rec = t.record()
+    for sink in list(_sinks):
+        try:
+            sink(rec)
+        except Exception as e:
+            logger.warning("Trace non enregistrée: %s", e)
+    return rec
+
+@contextmanager
+def run(kind: str, session: Optional[str] = None):
+    # trace autonome (thread d'écriture, commandes)
+    token = _trace.set(None)
+    start(kind, session)
+    try:
+        yield
+    finally:
+        finish()
+        _trace.reset(token)
+
+@contextmanager
+def span(name: str, **attrs):
+    t = _trace.get()
+    if t is None:
+        yield attrs
+        return
+    parent = _parent.get()
+    begin = time.perf_counter()
+    rec = {"name": name, "start_ms": round((begin - t.t0) * 1000, 3), "ms": None,
+           "depth": 0 if parent is None else t.spans[parent]["depth"] + 1, "parent": parent}
+    with t._lock:
+        index = len(t.spans)
+        t.spans.append(rec)
+    token = _parent.set(index)
+    try:
+        yield attrs  # l'appelant peut compléter les attributs (taille, hit...)
+    finally:
+        _parent.reset(token)
+        rec.update(attrs, ms=round((time.perf_counter() - begin) * 1000, 3))
+
+@contextmanager
+def scope(name: str, session: Optional[str] = None):
+    # span dans le rerun en cours ; trace dédiée (kind "fragment") quand un fragment est relancé seul
+    if _trace.get() is not None:
+        with span(name):
+            yield
+        return
+    start("fragment", session)
+    try:
+        with span(name):
+            yield
+    finally:
+        finish()
+
+def count(name: str, n: float = 1):
+    t = _trace.get()
+    if t is not None:
+        with t._lock:
+            t.counters[name] = t.counters.get(name, 0) + n
+
+def gauge(name: str, value: float):
+    t = _trace.get()
+    if t is not None:
+        with t._lock:
+            t.counters[name] = value
+
+def propagate(fn: Callable) -> Callable:
+    # pour les pools de threads : le travail est rattaché au span courant
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+def github_rate_limit(repo):
+    # quota de l'API GitHub, tel que renvoyé dans les en-têtes X-RateLimit-* de la dernière réponse
+    requester = getattr(repo, "requester", None)
+    remaining, limit = getattr(requester, "rate_limiting", (-1, -1))
+    if limit >= 0:
+        gauge("github.rate_remaining", remaining)
+        gauge("github.rate_limit", limit)
+        gauge("github.rate_reset", getattr(requester, "rate_limiting_resettime", 0))
+
+def add_sink(fn: Callable[[dict], None]):
+    if fn not in _sinks:
+        _sinks.append(fn)
+
+# ---------------------------
+# Journal JSONL + historique
+# ---------------------------
+class Recorder:
+    """Écrit chaque trace en JSONL et garde les derniers reruns pour les percentiles."""
+
+    def __init__(self, path: Optional[str] = None, history: int = HISTORY_SIZE):
+        self.path = path
+        self.history: deque = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def __call__(self, rec: dict):
+        with self._lock:
+            if rec["kind"] in ("rerun", "fragment"):
+                self.history.append(rec)
+            if not self.path:
+                return
+            if os.path.exists(self.path) and os.path.getsize(self.path) > LOG_MAX_BYTES:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+
+    def recent(self) -> List[dict]:
+        with self._lock:
+            return list(self.history)
+
+    def percentiles(self, q=(50, 95)) -> Dict[str, Dict[str, Any]]:
+        """Durée totale du rerun et temps cumulé par nom de span : p50 / p95 sur les reruns récents."""
+        samples: Dict[str, List[float]] = {}
+        for rec in self.recent():
+            samples.setdefault(rec["kind"], []).append(rec["ms"])
+            per_name: Dict[str, float] = {}
+            for s in rec["spans"]:
+                if s["ms"] is not None:
+                    per_name[s["name"]] = per_name.get(s["name"], 0.0) + s["ms"]
+            for name, ms in per_name.items():
+                samples.setdefault(name, []).append(ms)
+        out = {}
+        for name, values in samples.items():
+            values = sorted(values)
+            out[name] = {"n": len(values), **{f"p{p}": _quantile(values, p) for p in q}}
+        return out
+
+def _quantile(values: List[float], p: float) -> float:
+    # percentile par interpolation linéaire (valeurs triées)
+    if len(values) == 1:
+        return values[0]
+    pos = (len(values) - 1) * p / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return round(values[lo] + (values[hi] - values[lo]) * (pos - lo), 3)